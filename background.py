@@ -0,0 +1,153 @@
+import logging
+import os
+import threading
+import time
+
+import cache
+import db
+
+# ==========================================
+# 백그라운드 사전 계산 (화면 입력을 메모리 스냅샷으로 유지)
+# ==========================================
+# - get("home", pid) 는 메모리 스냅샷을 바로 돌려줌 (처음 한 번만 동기 계산)
+# - 데몬 스레드가 REFRESH_SECONDS 마다, 그리고 쓰기 (cache.invalidate) 직후 읽힌 적 있는 항목을 다시 계산
+#   주기 갱신은 읽기 캐시를 거치지 않음 -> 다른 프로세스 (manage.py 등) 의 쓰기도 반영됨
+# - 이 프로세스에서 쓴 직후의 읽기는 갱신을 최대 WRITE_WAIT_SECONDS 기다림 (방금 저장한 값이 바로 보이도록)
+# - IDLE_SECONDS 동안 읽히지 않은 항목은 갱신 대상에서 빠짐
+# - JOBS: 읽기와 상관없이 같은 주기 / 의존 테이블 쓰기 직후에 돌리는 갱신 작업 (추이 차트 사전 집계)
+REFRESH_SECONDS = float(os.environ.get("INVENTORY_REFRESH_SECONDS", 60))
+WRITE_WAIT_SECONDS = 3.0
+IDLE_SECONDS = 1800
+
+SOURCES = {
+    "home": db.get_home_bundle,
+}
+JOBS = {
+    "rollups": (db.refresh_rollups, {"inventory_events"}),
+}
+
+logger = logging.getLogger("inventory.background")
+
+_cond = threading.Condition()
+_entries = {}  # (name, args) -> {"value", "at", "error", "read", "gen", "done"}
+_jobs_dirty = set()
+_thread = None
+
+
+def _dirty(e):
+    return e["gen"] > e["done"]
+
+
+def _fetch(name, args):
+    # @cached 함수면 캐시를 건너뛰고 원래 함수를 호출
+    fn = SOURCES[name]
+    return getattr(fn, "__wrapped__", fn)(*args)
+
+
+def _refresh(key):
+    with _cond:
+        e = _entries.get(key)
+        gen = e["gen"] if e else 0
+    try:
+        value, error = _fetch(*key), None
+    except Exception as ex:
+        logger.exception("refresh failed: %s%s", key[0], key[1])
+        value, error = None, f"{type(ex).__name__}: {ex}"
+    with _cond:
+        e = _entries.setdefault(key, {"read": time.monotonic(), "gen": gen, "done": -1})
+        if error is None:
+            e["value"], e["at"] = value, time.time()
+        e["error"] = error
+        e["done"] = max(e["done"], gen)
+        _cond.notify_all()
+    return error
+
+
+def _run_job(name):
+    try:
+        JOBS[name][0]()
+    except Exception:
+        logger.exception("job failed: %s", name)
+
+
+def _on_write(tables):
+    # 바뀐 테이블에 의존하는 스냅샷 / 작업만 갱신 대상으로 표시
+    with _cond:
+        for (name, _), e in _entries.items():
+            deps = getattr(SOURCES[name], "tables", None)
+            if deps is None or deps & tables:
+                e["gen"] += 1
+        _jobs_dirty.update(name for name, (_, deps) in JOBS.items() if deps & tables)
+        _cond.notify_all()
+
+
+def _loop(interval):
+    last_full = time.monotonic()
+    while True:
+        with _cond:
+            _cond.wait_for(lambda: _jobs_dirty or any(_dirty(e) for e in _entries.values()),
+                           timeout=max(0.0, last_full + interval - time.monotonic()))
+            now = time.monotonic()
+            for k in [k for k, e in _entries.items() if now - e["read"] > IDLE_SECONDS]:
+                del _entries[k]
+            full = now >= last_full + interval
+            keys = [k for k, e in _entries.items() if full or _dirty(e)]
+            jobs = list(JOBS) if full else sorted(_jobs_dirty)
+            _jobs_dirty.clear()
+        if full:
+            last_full = now
+        for key in keys:
+            _refresh(key)
+        for name in jobs:
+            _run_job(name)
+
+
+def running():
+    return _thread is not None and _thread.is_alive()
+
+
+def start(interval=REFRESH_SECONDS):
+    # 프로세스당 1개 (Streamlit rerun 마다 호출해도 됨)
+    global _thread
+    with _cond:
+        if running():
+            return _thread
+        cache.on_invalidate(_on_write)
+        _thread = threading.Thread(target=_loop, args=(interval,), name="inventory-refresh", daemon=True)
+        _thread.start()
+    return _thread
+
+
+def get(name, *args):
+    # -> (값, 정보). 정보: at (갱신 시각, epoch 초) / age (초) / refreshing / error (마지막 갱신 실패)
+    key = (name, args)
+    with _cond:
+        e = _entries.get(key)
+        if e is not None:
+            e["read"] = time.monotonic()
+            if "value" in e and _dirty(e) and running():
+                _cond.notify_all()
+                _cond.wait_for(lambda: not _dirty(e), timeout=WRITE_WAIT_SECONDS)
+    if e is None or "value" not in e or (_dirty(e) and not running()):
+        # 첫 읽기 (또는 스레드 없이 쓰는 경우) 는 동기 계산, 실패하면 예외 그대로
+        value = _fetch(name, args)
+        with _cond:
+            e = _entries.setdefault(key, {"gen": 0, "done": -1})
+            e.update(value=value, at=time.time(), error=None, read=time.monotonic(), done=e["gen"])
+    with _cond:
+        info = {"at": e["at"], "age": time.time() - e["at"], "refreshing": _dirty(e), "error": e["error"]}
+        return cache._copy(e["value"]), info
+
+
+def status():
+    # 사이드바 표시용: 가장 오래된 스냅샷 나이 / 갱신 대기 수 / 마지막 오류
+    with _cond:
+        ready = [e for e in _entries.values() if "value" in e]
+        now = time.time()
+        return {
+            "running": running(),
+            "entries": len(ready),
+            "oldest_age": max((now - e["at"] for e in ready), default=None),
+            "pending": sum(_dirty(e) for e in _entries.values()),
+            "error": next((e["error"] for e in _entries.values() if e.get("error")), None),
+        }
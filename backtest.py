@@ -0,0 +1,253 @@
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, text
+
+import forecast_engine
+import usage_estimator
+
+# ==========================================
+# 예측 정확도 백테스트 (과거 기준일 재현)
+# ==========================================
+# 기준일 c 마다 "c 시점에 알던 것" 만으로 예측을 다시 계산하고, 이후 실제 스냅샷과 비교
+# - 실적 사용량: c 이전 days 일의 스냅샷 + 입고 (usage_estimator)
+# - 재고: c 이전 마지막 스냅샷 / 입고 예정: c 이전에 발주되어 (c, c+hor] 에 도착한 입고
+# - 실제 일 사용량: c 직전 스냅샷 ~ c+hor 이전 마지막 스냅샷 구간의 소비량 / 일수
+# - 규칙 (RULES): hybrid = 실적 있으면 실적, 없으면 이론 (compute_forecast 의 final) / actual / theory / max
+# - 점수: MAPE, bias (sum(예측-실적)/sum(실적)), 결품일 / 과잉일 (계획대로 발주했을 때 실제 소비로 계산)
+# 가동률 이력은 저장하지 않으므로 예측 / 이론 모두 기준 가동률 (AREA_REF_OCC) 사용
+#   python backtest.py synth --out backtest.db --items 200 --years 3
+#   python backtest.py run --db backtest.db --days 7 14 28 --horizons 7 14 --workers 4
+RULES = ["hybrid", "actual", "theory", "max"]
+SCORE_COLS = ["cutoff", "days", "horizon", "rule", "item_id", "target_area", "pred", "actual", "err", "ape",
+              "stockout_days", "overstock_days"]
+MIN_ACTUAL_DAYS = 3  # 실제 사용량 구간이 이보다 짧으면 채점하지 않음
+
+
+def _int_col(s):
+    # 기존 SQLite inventory.db 는 total_units 를 8바이트 BLOB (int64 little-endian) 으로 저장한 행이 있음
+    return pd.to_numeric(s.map(lambda v: int.from_bytes(v, "little", signed=True) if isinstance(v, bytes) else v),
+                         errors="coerce").fillna(0).astype(float)
+
+
+def load_history(source):
+    # source: SQLite 파일 경로 또는 SQLAlchemy URL -> {"items", "snaps", "deliveries"}
+    url = source if "://" in source else f"sqlite:///{source}"
+    engine = create_engine(url)
+    with engine.connect() as conn:
+        items = pd.read_sql(text("SELECT * FROM items"), conn)
+        snaps = pd.read_sql(text("SELECT id, item_id, snap_date, total_units FROM snapshots"), conn)
+        deliveries = pd.read_sql(text("SELECT * FROM deliveries"), conn)
+    engine.dispose()
+
+    defaults = {"target_area": forecast_engine.DEFAULT_AREA, "units_per_room": 0.0, "min_order_cs": 0}
+    for col, val in defaults.items():
+        items[col] = items[col].fillna(val) if col in items.columns else val
+    for col in forecast_engine.NUMERIC_COLS[1:]:
+        if col in items.columns:
+            items[col] = _int_col(items[col])
+    snaps["snap_date"] = pd.to_datetime(snaps["snap_date"], errors="coerce")
+    snaps["total_units"] = _int_col(snaps["total_units"])
+    # 초안 (status='draft') 은 실제 입고가 아니므로 제외
+    if "status" in deliveries.columns:
+        deliveries = deliveries[deliveries["status"].fillna("confirmed") == "confirmed"]
+    deliveries = pd.DataFrame({
+        "item_id": deliveries["item_id"],
+        "order_date": pd.to_datetime(deliveries["order_date"], errors="coerce"),
+        "arrival_date": pd.to_datetime(deliveries["arrival_date"], errors="coerce"),
+        "units": _int_col(deliveries["total_units"]),
+    })
+    return {"items": items, "snaps": snaps.dropna(subset=["snap_date"]), "deliveries": deliveries.dropna(subset=["arrival_date"])}
+
+
+def cutoff_dates(hist, step_days=7, start=None, end=None, warmup=28, horizon=30):
+    # 첫 스냅샷 + warmup ~ 마지막 스냅샷 - horizon 을 step_days 간격으로
+    first, last = hist["snaps"]["snap_date"].min(), hist["snaps"]["snap_date"].max()
+    if pd.isna(first):
+        return []
+    lo = pd.Timestamp(start) if start else first + pd.Timedelta(days=warmup)
+    hi = pd.Timestamp(end) if end else last - pd.Timedelta(days=horizon)
+    return list(pd.date_range(lo, hi, freq=f"{step_days}D"))
+
+
+def _last_snapshot(snaps, lo, hi):
+    # 품목별 (lo, hi] 안의 마지막 스냅샷 -> item_id 인덱스 (snap_date, total_units)
+    s = snaps[(snaps["snap_date"] > lo) & (snaps["snap_date"] <= hi)]
+    return s.sort_values(["item_id", "snap_date", "id"], kind="stable").groupby("item_id").tail(1).set_index("item_id")
+
+
+def actual_usage(hist, cutoff, horizon):
+    # 실제 일 사용량: c 직전 스냅샷 (hor 일 이내) ~ c+hor 이전 마지막 스냅샷 사이의 (재고 + 입고 - 재고) / 일수
+    snaps, dl = hist["snaps"], hist["deliveries"]
+    s0 = _last_snapshot(snaps, cutoff - pd.Timedelta(days=horizon), cutoff)
+    s1 = _last_snapshot(snaps, cutoff, cutoff + pd.Timedelta(days=horizon))
+    both = s0[["snap_date", "total_units"]].join(s1[["snap_date", "total_units"]], how="inner", lsuffix="0", rsuffix="1")
+    both["gap"] = (both["snap_date1"] - both["snap_date0"]).dt.days
+    both = both[both["gap"] >= MIN_ACTUAL_DAYS]
+    # 입고는 그날 아침 (같은 날 재고 조사보다 먼저) -> (s0, s1] 구간
+    d = dl[dl["item_id"].isin(both.index)].join(both[["snap_date0", "snap_date1"]], on="item_id")
+    d = d[(d["arrival_date"] > d["snap_date0"]) & (d["arrival_date"] <= d["snap_date1"])]
+    received = d.groupby("item_id")["units"].sum().reindex(both.index, fill_value=0.0)
+    rate = (both["total_units0"] + received - both["total_units1"]) / both["gap"]
+    return rate.clip(lower=0)
+
+
+def rule_usage(merged, rule):
+    sim, theory = merged["simulated_usage"].to_numpy(float), merged["theory_daily_usage"].to_numpy(float)
+    if rule == "hybrid":
+        return merged["final_daily_usage"].to_numpy(float)
+    if rule == "actual":
+        return sim
+    if rule == "theory":
+        return theory
+    if rule == "max":
+        return np.maximum(sim, theory)
+    raise ValueError(f"unknown rule: {rule}")
+
+
+def evaluate_cutoff(hist, cutoff, days_list=(14,), horizons=(7,), rules=RULES, estimator=None):
+    # 기준일 하나 -> SCORE_COLS 행 (days x horizon x rule x 품목)
+    c = pd.Timestamp(cutoff)
+    snaps, dl = hist["snaps"], hist["deliveries"]
+    known = snaps[snaps["snap_date"] <= c]
+    received = dl[dl["arrival_date"] <= c]
+    last = _last_snapshot(known, pd.Timestamp.min, c)
+    stock_df = hist["items"].copy()
+    stock_df["current_stock"] = stock_df["id"].map(last["total_units"]).fillna(0.0)
+    stock_df = stock_df[stock_df["id"].isin(last.index)]
+
+    out = []
+    for days in days_list:
+        lo = c - pd.Timedelta(days=days)
+        usage = usage_estimator.estimate_usage(known[known["snap_date"] >= lo], received[received["arrival_date"] > lo],
+                                               estimator or usage_estimator.DEFAULT_ESTIMATOR, asof=c.date())
+        for hor in horizons:
+            actual = actual_usage(hist, c, hor)
+            if actual.empty:
+                continue
+            # c 시점에 이미 발주되어 있던 입고 예정
+            pending = dl[(dl["order_date"].isna() | (dl["order_date"] <= c))
+                         & (dl["arrival_date"] > c) & (dl["arrival_date"] <= c + pd.Timedelta(days=hor))]
+            incoming = pending.groupby("item_id", as_index=False)["units"].sum().rename(columns={"units": "incoming_units"})
+            merged = forecast_engine.compute_forecast(stock_df, usage, incoming, hor)
+            merged = merged[merged["id"].isin(actual.index)]
+            act = merged["id"].map(actual).to_numpy(float)
+            stock, inc = merged["current_stock"].to_numpy(float), merged["incoming_units"].to_numpy(float)
+            safety = forecast_engine._num(merged, "safety_stock")
+            cs, upb, bpc = (forecast_engine._num(merged, k) for k in ["cs_total_units", "units_per_box", "boxes_per_cs"])
+            box = np.where(upb > 0, upb, np.divide(cs, bpc, out=np.zeros_like(cs), where=bpc > 0))
+            for rule in rules:
+                pred = rule_usage(merged, rule)
+                order = np.clip(pred * hor + safety - stock - inc, 0, None)
+                order = forecast_engine.round_order_packs(order, cs, box, forecast_engine._num(merged, "min_order_cs"))[2]
+                # 계획대로 발주 (기준일 입고로 가정) 했을 때 실제 소비로 기간 말 재고
+                end = stock + inc + order - act * hor
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    stockout = np.where(act > 0, np.clip(-end / act, 0, hor), 0.0)
+                    overstock = np.where(act > 0, np.clip((end - safety) / act, 0, None), np.nan)
+                    ape = np.where(act > 0, np.abs(pred - act) / act, np.nan)
+                out.append(pd.DataFrame({
+                    "cutoff": c.date(), "days": days, "horizon": hor, "rule": rule,
+                    "item_id": merged["id"].to_numpy(), "target_area": merged["target_area"].to_numpy(),
+                    "pred": pred, "actual": act, "err": pred - act, "ape": ape,
+                    "stockout_days": stockout, "overstock_days": overstock,
+                }))
+    return pd.concat(out, ignore_index=True) if out else pd.DataFrame(columns=SCORE_COLS)
+
+
+# 프로세스 풀: 워커마다 이력을 한 번만 읽어 둠
+_HIST = None
+
+
+def _init_worker(source):
+    global _HIST
+    _HIST = load_history(source)
+
+
+def _run_cutoff(args):
+    return evaluate_cutoff(_HIST, *args)
+
+
+def run_backtest(source, cutoffs=None, days_list=(14,), horizons=(7,), rules=RULES, estimator=None, workers=None, step_days=7):
+    # workers: 프로세스 수 (None = CPU 수, 1 = 같은 프로세스)
+    workers = workers or os.cpu_count() or 1
+    hist = load_history(source) if workers == 1 or cutoffs is None else None
+    if cutoffs is None:
+        cutoffs = cutoff_dates(hist, step_days, warmup=max(days_list), horizon=max(horizons))
+    tasks = [(c, days_list, horizons, rules, estimator) for c in cutoffs]
+    if not tasks:
+        return pd.DataFrame(columns=SCORE_COLS)
+    if workers == 1:
+        parts = [evaluate_cutoff(hist, *t) for t in tasks]
+    else:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(source,)) as ex:
+            parts = list(ex.map(_run_cutoff, tasks, chunksize=max(1, len(tasks) // (workers * 4))))
+    return pd.concat(parts, ignore_index=True)
+
+
+def summarize(scores, by=("days", "horizon", "rule")):
+    by = list(by)
+    if scores.empty:
+        return pd.DataFrame(columns=by + ["n", "mape", "bias", "stockout_days", "stockout_rate", "overstock_days"])
+    g = scores.assign(so=scores["stockout_days"] > 0).groupby(by)
+    out = pd.DataFrame({
+        "n": g.size(),
+        "mape": g["ape"].mean(),
+        "bias": g["err"].sum() / g["actual"].sum().where(lambda s: s > 0),
+        "stockout_days": g["stockout_days"].mean(),
+        "stockout_rate": g["so"].mean(),
+        "overstock_days": g["overstock_days"].mean(),
+    })
+    return out.reset_index()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="予測精度バックテスト")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("synth", help="合成履歴データを SQLite に書き込む")
+    p.add_argument("--out", default="backtest.db")
+    p.add_argument("--items", type=int, default=200)
+    p.add_argument("--years", type=float, default=3)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--counts", default="mixed", choices=["mixed", "weekly", "daily"], help="棚卸しの頻度")
+    p.add_argument("--replace", action="store_true", help="既存の items / snapshots / deliveries を削除してから書き込む")
+
+    p = sub.add_parser("run", help="過去の基準日ごとに予測を再計算して採点")
+    p.add_argument("--db", default="inventory.db", help="SQLite ファイルまたは SQLAlchemy URL")
+    p.add_argument("--start", default=None)
+    p.add_argument("--end", default=None)
+    p.add_argument("--step", type=int, default=7, help="基準日の間隔 (日)")
+    p.add_argument("--days", type=int, nargs="+", default=[7, 14, 28, 60], help="実績期間 (日)")
+    p.add_argument("--horizons", type=int, nargs="+", default=[7, 14, 30], help="予測期間 (日)")
+    p.add_argument("--rules", nargs="+", default=RULES, choices=RULES)
+    p.add_argument("--estimator", default=None, choices=usage_estimator.ESTIMATORS)
+    p.add_argument("--workers", type=int, default=None)
+    p.add_argument("--out", default=None, help="品目ごとのスコア CSV")
+    args = ap.parse_args()
+
+    if args.cmd == "synth":
+        import synthetic_data
+
+        items, snaps, deliveries = synthetic_data.generate(args.items, args.years, seed=args.seed, counts=args.counts)
+        n = synthetic_data.write_sqlite(args.out, items, snaps, deliveries, replace=args.replace)
+        print(f"{args.out}: items={n[0]} snapshots={n[1]} deliveries={n[2]}")
+    elif args.cmd == "run":
+        hist = load_history(args.db)
+        cutoffs = cutoff_dates(hist, args.step, args.start, args.end, max(args.days), max(args.horizons))
+        scores = run_backtest(args.db, cutoffs, args.days, args.horizons, args.rules, args.estimator, args.workers)
+        print(f"cutoffs={len(cutoffs)} rows={len(scores)}")
+        pd.set_option("display.width", 200)
+        print(summarize(scores).round(3).to_string(index=False))
+        print()
+        print(summarize(scores, ["target_area", "days", "horizon", "rule"]).round(3).to_string(index=False))
+        if args.out:
+            scores.to_csv(args.out, index=False)
+            print(f"{args.out}: {len(scores)} rows")
+
+
+if __name__ == "__main__":
+    main()
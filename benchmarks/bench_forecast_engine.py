@@ -0,0 +1,223 @@
+# 예측 엔진 벤치마크: 기존 row-wise apply() 경로 vs 컬럼 단위 엔진
+# + 가동률 캘린더 경로 (품목 x 날짜 행렬) 의 긴 예측 기간 소요 시간
+# + 포장 단위 올림 (CS + 箱 / 최소 발주 수량): 품목별 루프 vs round_order_packs
+# 사용법: python benchmarks/bench_forecast_engine.py [--sizes 1000 10000 100000] [--calendar-days 120]
+import argparse
+import os
+import sys
+import time
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import forecast_engine  # noqa: E402
+
+
+def make_inputs(n, seed=0):
+    rng = np.random.default_rng(seed)
+    ids = np.arange(1, n + 1)
+    stock = pd.DataFrame({
+        "id": ids,
+        "name": [f"item-{i}" for i in ids],
+        "target_area": rng.choice(["ALL", "STD", "HAK", None], size=n, p=[0.4, 0.4, 0.15, 0.05]),
+        "unit": rng.choice(["本", "枚", "個"], size=n),
+        "units_per_room": np.where(rng.random(n) < 0.3, 0.0, rng.integers(1, 40, n) / 10),
+        "cs_total_units": np.where(rng.random(n) < 0.2, 0, rng.integers(10, 500, n)),
+        "units_per_box": rng.integers(0, 50, n),
+        "boxes_per_cs": rng.integers(0, 20, n),
+        "safety_stock": rng.integers(0, 300, n),
+        "current_stock": rng.integers(0, 3000, n).astype(float),
+    })
+    has_usage = rng.random(n) < 0.7
+    usage = pd.DataFrame({"id": ids[has_usage], "daily_avg_usage": rng.random(has_usage.sum()) * 80})
+    has_inc = rng.random(n) < 0.25
+    incoming = pd.DataFrame({"item_id": ids[has_inc], "incoming_units": rng.integers(1, 1000, has_inc.sum()).astype(float)})
+    return stock, usage, incoming
+
+
+def legacy_forecast(stock, usage, incoming, hor, occ_all, occ_std, occ_hak):
+    # page_forecast_general() 의 기존 구현 그대로
+    merged = stock.merge(usage, on="id", how="left").fillna(0)
+    merged = merged.merge(incoming, left_on="id", right_on="item_id", how="left").fillna(0)
+
+    def apply_occupancy_rate(row):
+        base_usage = float(row["daily_avg_usage"])
+        area = row.get("target_area", "ALL")
+        ref_occ = 90.0
+        target_occ = occ_all * 100
+        if area == "STD":
+            ref_occ = 93.0
+            target_occ = occ_std * 100
+        elif area == "HAK":
+            ref_occ = 70.0
+            target_occ = occ_hak * 100
+        if base_usage == 0: return 0.0
+        factor = target_occ / ref_occ if ref_occ > 0 else 1.0
+        return base_usage * factor
+
+    ROOMS_ALL = 238; ROOMS_STD = 225; ROOMS_HAK = 13
+    def calculate_theory_daily(row):
+        area = row.get("target_area", "ALL")
+        upr = float(row.get("units_per_room", 0.0))
+        if upr <= 0: return 0.0
+        if area == "STD": return ROOMS_STD * occ_std * upr
+        elif area == "HAK": return ROOMS_HAK * occ_hak * upr
+        else: return ROOMS_ALL * occ_all * upr
+
+    merged["simulated_usage"] = merged.apply(apply_occupancy_rate, axis=1)
+    merged["theory_usage"] = merged.apply(calculate_theory_daily, axis=1)
+
+    def pick_usage(row):
+        actual = float(row["simulated_usage"])
+        theory = float(row["theory_usage"])
+        return actual if actual > 0 else theory
+
+    merged["final_daily_usage"] = merged.apply(pick_usage, axis=1)
+    merged["forecast"] = merged["final_daily_usage"] * hor
+    merged["order_units"] = (merged["forecast"] + merged["safety_stock"] - merged["current_stock"] - merged["incoming_units"]).apply(lambda x: x if x > 0 else 0)
+
+    def convert_to_cs(row):
+        units_needed = row["order_units"]
+        cs_size = row.get("cs_total_units", 0)
+        unit_name = row.get("unit", "")
+        if units_needed <= 0:
+            return "-"
+        if cs_size > 0:
+            return f"{units_needed / cs_size:.1f} CS"
+        else:
+            return f"{int(units_needed)} {unit_name}"
+
+    merged["order_display"] = merged.apply(convert_to_cs, axis=1)
+    res = merged.sort_values("order_units", ascending=False)
+    res["final_daily_usage"] = res["final_daily_usage"].apply(lambda x: round(x, 1))
+    res["current_stock"] = res["current_stock"].apply(lambda x: int(x))
+    return res
+
+
+def engine_forecast(stock, usage, incoming, hor, occ_all, occ_std, occ_hak):
+    occ = {"ALL": occ_all, "STD": occ_std, "HAK": occ_hak}
+    merged = forecast_engine.compute_forecast(stock, usage, incoming, hor, occ)
+    res = merged.sort_values("order_units", ascending=False)
+    res["final_daily_usage"] = res["final_daily_usage"].round(1)
+    res["current_stock"] = res["current_stock"].astype(np.int64)
+    return res
+
+
+def check_parity(a, b):
+    a = a.sort_values("id").reset_index(drop=True)
+    b = b.sort_values("id").reset_index(drop=True)
+    for col in ["final_daily_usage", "order_units", "current_stock"]:
+        np.testing.assert_allclose(a[col].astype(float), b[col].astype(float), rtol=1e-9, atol=1e-9)
+    assert (a["order_display"].astype(str) == b["order_display"].astype(str)).all(), "order_display mismatch"
+
+
+def make_calendar(days, seed=0):
+    # 요일 프로필 + 일부 날짜의 PMS 예측이 섞인 가동률 캘린더
+    rng = np.random.default_rng(seed)
+    areas = pd.DataFrame({"property_id": 1, "area": list(forecast_engine.AREA_ROOMS),
+                          "rooms": list(forecast_engine.AREA_ROOMS.values()), "ref_occ": list(forecast_engine.AREA_REF_OCC.values())})
+    profiles = pd.DataFrame([(1, a, d, rng.uniform(0.5, 1.0)) for a in areas["area"] for d in range(8)],
+                            columns=["property_id", "area", "day_type", "occ"])
+    dates = forecast_engine.horizon_dates(date.today(), days)
+    forecast = pd.DataFrame([(1, a, d, rng.uniform(0.3, 1.0)) for a in areas["area"] for d in dates[::3]],
+                            columns=["property_id", "area", "occ_date", "occ"])
+    holidays = rng.random(days) < 0.05
+    return forecast_engine.occupancy_calendar(date.today(), days, areas, forecast, profiles, holidays)
+
+
+def check_flat_calendar(stock, usage, incoming, days):
+    # 프로필 / 예측이 없는 캘린더 = 기준 가동률 일정 -> 일정 가동률 경로와 같은 결과
+    areas = pd.DataFrame({"property_id": 1, "area": list(forecast_engine.AREA_ROOMS),
+                          "rooms": list(forecast_engine.AREA_ROOMS.values()), "ref_occ": list(forecast_engine.AREA_REF_OCC.values())})
+    cal = forecast_engine.occupancy_calendar(date.today(), days, areas)
+    a = forecast_engine.compute_forecast(stock.assign(property_id=1), usage, incoming, days)
+    b = forecast_engine.compute_forecast(stock.assign(property_id=1), usage, incoming, days, occ_calendar=cal)
+    for col in ["forecast", "order_units", "final_daily_usage"]:
+        np.testing.assert_allclose(a[col], b[col], rtol=1e-9, atol=1e-9)
+
+
+def reference_packs(units, cs, box, moq):
+    # 품목별 분기 (비교용)
+    out = []
+    for u, c, b, m in zip(units, cs, box, moq):
+        if u <= 1e-9:
+            out.append((0, 0, 0))
+            continue
+        if c > 0 and b > 0:
+            qc = int(u // c)
+            qb = int(np.ceil((u - qc * c) / b - 1e-9))
+            if qb * b >= c:
+                qc, qb = qc + 1, 0
+        elif c > 0:
+            qc, qb = int(np.ceil(u / c - 1e-9)), 0
+        elif b > 0:
+            qc, qb = 0, int(np.ceil(u / b - 1e-9))
+        else:
+            out.append((0, 0, int(max(np.ceil(u - 1e-9), m))))
+            continue
+        if c > 0 and qc * c + qb * b < m * c:
+            qc, qb = int(m), 0
+        elif c <= 0:
+            qb = int(max(qb, m))
+        out.append((qc, qb, int(np.ceil(qc * c + qb * b - 1e-9))))
+    return [np.array(col, dtype=np.int64) for col in zip(*out)] if out else [np.zeros(0, dtype=np.int64)] * 3
+
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--calendar-days", type=int, default=120)
+    args = ap.parse_args()
+
+    params = (7, 0.85, 0.95, 0.6)
+    print(f"{'items':>8} {'row-wise(s)':>12} {'engine(s)':>10} {'speedup':>8}")
+    for n in args.sizes:
+        stock, usage, incoming = make_inputs(n)
+        check_parity(legacy_forecast(stock, usage, incoming, *params), engine_forecast(stock, usage, incoming, *params))
+        t_old = best_of(lambda: legacy_forecast(stock, usage, incoming, *params), args.repeat)
+        t_new = best_of(lambda: engine_forecast(stock, usage, incoming, *params), args.repeat)
+        print(f"{n:>8} {t_old:>12.4f} {t_new:>10.4f} {t_old / t_new:>7.1f}x")
+
+    days = args.calendar_days
+    cal = make_calendar(days)
+    print(f"\noccupancy calendar, horizon={days} days")
+    print(f"{'items':>8} {'flat(s)':>10} {'calendar(s)':>12}")
+    for n in args.sizes:
+        stock, usage, incoming = make_inputs(n)
+        check_flat_calendar(stock, usage, incoming, days)
+        stock = stock.assign(property_id=1)
+        t_flat = best_of(lambda: forecast_engine.compute_forecast(stock, usage, incoming, days), args.repeat)
+        t_cal = best_of(lambda: forecast_engine.compute_forecast(stock, usage, incoming, days, occ_calendar=cal), args.repeat)
+        print(f"{n:>8} {t_flat:>10.4f} {t_cal:>12.4f}")
+
+    print("\npack rounding (CS + box, MOQ)")
+    print(f"{'items':>8} {'per-item(s)':>12} {'vector(s)':>10}")
+    for n in args.sizes:
+        stock, _, _ = make_inputs(n)
+        rng = np.random.default_rng(1)
+        units = np.where(rng.random(n) < 0.3, 0.0, rng.random(n) * 3000)
+        cs, box = stock["cs_total_units"].to_numpy(float), stock["units_per_box"].to_numpy(float)
+        moq = rng.integers(0, 4, n).astype(float)
+        ref = reference_packs(units, cs, box, moq)
+        new = forecast_engine.round_order_packs(units, cs, box, moq)
+        for a, b in zip(ref, new):
+            assert (a == b).all(), "pack rounding mismatch"
+        t_old = best_of(lambda: reference_packs(units, cs, box, moq), 1)
+        t_new = best_of(lambda: forecast_engine.round_order_packs(units, cs, box, moq), args.repeat)
+        print(f"{n:>8} {t_old:>12.4f} {t_new:>10.4f}")
+
+
+if __name__ == "__main__":
+    main()
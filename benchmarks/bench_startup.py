@@ -0,0 +1,120 @@
+# 기동 / rerun 시간 벤치마크
+# - 새 프로세스에서 app.py 첫 실행 (import + 스키마 확인 + 홈 화면) 시간 = 콜드 스타트
+# - 같은 세션에서 페이지별 rerun 시간 (페이지 모듈은 처음 열 때만 import)
+# - import app 만으로 무거운 모듈 (altair / 파일 가져오기 / 다른 페이지) 이 올라오지 않는지
+# - 스키마가 최신인 DB 에서 init_db 가 DDL 없이 조회만 하는지 (실행 SQL 수)
+# 사용법:
+#   python benchmarks/bench_startup.py                               # 임시 SQLite (합성 1년 x 200 품목)
+#   python benchmarks/bench_startup.py --db-url postgresql://...     # 기존 DB (읽기만)
+#   python benchmarks/bench_startup.py --max-cold-ms 8000 --max-rerun-ms 1500
+# 실패 시 종료 코드 1
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+# import app 시점에는 없어야 하는 모듈 (해당 페이지를 열 때 import)
+LAZY_MODULES = ["altair", "stock_import", "occupancy_import", "views.items", "views.stock", "views.forecast", "views.order_calendar", "views.trends"]
+# 최신 스키마에서 init_db 가 실행해도 되는 SQL 수 (has_table 확인 + 버전 조회)
+MAX_INIT_STATEMENTS = 2
+
+# 새 프로세스에서 실행: 콜드 스타트 -> 페이지별 첫 방문 / 재방문 rerun 시간 (ms) 을 JSON 으로 출력
+APP_RUN = r"""
+import json, sys, time
+t0 = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file(sys.argv[1], default_timeout=300)
+at.run()
+out = {"cold_ms": (time.perf_counter() - t0) * 1000, "pages": {}, "errors": [e.message for e in at.exception]}
+for visit in ["first", "again"]:
+    for label in at.sidebar.radio[0].options:
+        t1 = time.perf_counter()
+        at.sidebar.radio[0].set_value(label).run()
+        out["pages"].setdefault(label, {})[visit] = (time.perf_counter() - t1) * 1000
+        out["errors"] += [e.message for e in at.exception]
+print(json.dumps(out))
+"""
+
+IMPORT_RUN = r"""
+import json, sys, time
+t0 = time.perf_counter()
+import app
+ms = (time.perf_counter() - t0) * 1000
+print(json.dumps({"import_ms": ms, "loaded": [m for m in json.loads(sys.argv[1]) if m in sys.modules]}))
+"""
+
+
+def run_json(code, *argv, env=None):
+    p = subprocess.run([sys.executable, "-c", code, *argv], cwd=ROOT, env=env, capture_output=True, text=True)
+    if p.returncode:
+        sys.exit(p.stderr[-2000:])
+    return json.loads(p.stdout.strip().splitlines()[-1])
+
+
+def count_init_statements(url):
+    # 최신으로 올린 뒤, 새 프로세스의 init_db 와 같은 schema.migrate 를 한 번 더 돌려 실행된 SQL 을 셈
+    from sqlalchemy import event
+    import db
+    import schema
+    db.set_db_url(url)
+    db.init_db()
+    engine = db.get_engine()
+    seen = []
+    event.listen(engine, "before_cursor_execute", lambda conn, cur, stmt, *a: seen.append(stmt))
+    t0 = time.perf_counter()
+    schema.migrate(engine, db.DEFAULT_PROPERTY_ID)
+    return seen, (time.perf_counter() - t0) * 1000
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--db-url", help="생략하면 합성 데이터로 임시 SQLite 를 만듦")
+    ap.add_argument("--items", type=int, default=200)
+    ap.add_argument("--years", type=float, default=1)
+    ap.add_argument("--max-cold-ms", type=float, default=15000, help="콜드 스타트 예산")
+    ap.add_argument("--max-rerun-ms", type=float, default=3000, help="재방문 rerun 예산 (페이지별)")
+    args = ap.parse_args()
+
+    url = args.db_url
+    if not url:
+        import synthetic_data
+        path = os.path.join(tempfile.mkdtemp(), "startup.db")
+        synthetic_data.write_sqlite(path, *synthetic_data.generate(n_items=args.items, years=args.years))
+        url = f"sqlite:///{path}"
+    env = dict(os.environ, INVENTORY_DB_URL=url)
+    failures = []
+
+    stmts, ms = count_init_statements(url)
+    print(f"init_db on up-to-date schema: {len(stmts)} statements {ms:.1f}ms")
+    if len(stmts) > MAX_INIT_STATEMENTS:
+        failures.append(f"init_db ran {len(stmts)} statements: " + " | ".join(" ".join(s.split())[:60] for s in stmts[:5]))
+
+    imp = run_json(IMPORT_RUN, json.dumps(LAZY_MODULES), env=env)
+    print(f"import app: {imp['import_ms']:.0f}ms")
+    if imp["loaded"]:
+        failures.append(f"loaded at import: {', '.join(imp['loaded'])}")
+
+    res = run_json(APP_RUN, os.path.join(ROOT, "app.py"), env=env)
+    print(f"cold start (new process, home page): {res['cold_ms']:.0f}ms")
+    if res["cold_ms"] > args.max_cold_ms:
+        failures.append(f"cold start {res['cold_ms']:.0f}ms > {args.max_cold_ms:.0f}ms")
+    for label, v in res["pages"].items():
+        print(f"  {label:<20} first {v['first']:7.0f}ms  again {v['again']:7.0f}ms")
+        if v["again"] > args.max_rerun_ms:
+            failures.append(f"{label}: rerun {v['again']:.0f}ms > {args.max_rerun_ms:.0f}ms")
+    failures += [f"app error: {e}" for e in res["errors"][:5]]
+
+    for f in failures:
+        print("FAIL", f)
+    print("OK" if not failures else f"{len(failures)} failures")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+# 추이 차트 사전 집계 벤치마크 + 정합성 확인
+# - 차트 조회 (품목 / 구역, 3개월 / 1년 / 3년) 가 TARGET_MS 안에 끝나는지
+# - 집계 재고가 원장과 맞는지: 조사일 = 센 수량, 오늘 = ledger.replay 의 장부 재고
+# - 증분 갱신 (소급 입력 / 삭제 / 날짜 변경 후) 결과가 전체 재구축과 같은지
+# 사용법:
+#   python benchmarks/bench_trends.py                               # 임시 SQLite (합성 3년 x 200 품목)
+#   python benchmarks/bench_trends.py --db-url postgresql://...     # 기존 DB (테스트 입력은 끝나면 삭제)
+# 실패 시 종료 코드 1
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+TARGET_MS = 100
+NOTE = "bench_trends"
+ROLLUP_COLS = ["item_id", "grain", "bucket", "stock", "usage", "arrivals", "counted"]
+
+
+def timed(fn, repeat=5):
+    best, out = None, None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        ms = (time.perf_counter() - t0) * 1000
+        best = ms if best is None else min(best, ms)
+    return out, best
+
+
+def dump(conn):
+    df = pd.read_sql(text(f"SELECT {', '.join(ROLLUP_COLS)} FROM item_rollups ORDER BY item_id, grain, bucket"), conn)
+    df["bucket"] = df["bucket"].astype(str)
+    return df
+
+
+def same(a, b):
+    if a.shape != b.shape or not (a[["item_id", "grain", "bucket"]].to_numpy() == b[["item_id", "grain", "bucket"]].to_numpy()).all():
+        return False
+    for c in ["stock", "usage", "arrivals", "counted"]:
+        x, y = pd.to_numeric(a[c]).to_numpy(dtype=float), pd.to_numeric(b[c]).to_numpy(dtype=float)
+        if not np.allclose(x, y, equal_nan=True):
+            return False
+    return True
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--db-url", help="생략하면 합성 데이터로 임시 SQLite 를 만듦")
+    ap.add_argument("--items", type=int, default=200)
+    ap.add_argument("--years", type=float, default=3)
+    args = ap.parse_args()
+
+    import db
+    import ledger
+    import rollups
+    if args.db_url:
+        db.set_db_url(args.db_url)
+    else:
+        import synthetic_data
+        path = os.path.join(tempfile.mkdtemp(), "trends.db")
+        synthetic_data.write_sqlite(path, *synthetic_data.generate(n_items=args.items, years=args.years))
+        db.set_db_url(f"sqlite:///{path}")
+    db.init_db()
+    failures = []
+
+    n, ms = timed(lambda: db.refresh_rollups(full=True), repeat=1)
+    rows = int(db.read_df("SELECT COUNT(*) AS n FROM item_rollups")["n"].iloc[0])
+    print(f"{db.dialect_name()}: full build {n} items, {rows} rows {ms:.0f}ms")
+    _, ms = timed(db.refresh_rollups, repeat=1)
+    print(f"  refresh (nothing new): {ms:.1f}ms")
+
+    items = db.get_items_df()
+    today = date.today()
+    engine = db.get_engine()
+    with engine.connect() as conn:
+        # 조회 시간 (캐시를 거치지 않음)
+        for days in [90, 365, 365 * 3]:
+            start = today - timedelta(days=days)
+            worst_item = worst_area = 0.0
+            for _, it in items.head(20).iterrows():
+                (df, grain), ms = timed(lambda: rollups.item_trend(conn, it["id"], start, today))
+                worst_item = max(worst_item, ms)
+            for (pid, area), _ in items.groupby(["property_id", items["target_area"].fillna("ALL")]):
+                (df, grain), ms = timed(lambda: rollups.area_trend(conn, area, start, today, pid))
+                worst_area = max(worst_area, ms)
+            print(f"  {days:>4} days ({grain}, {len(df)} points): item max {worst_item:5.1f}ms  area max {worst_area:5.1f}ms")
+            if max(worst_item, worst_area) > TARGET_MS:
+                failures.append(f"{days} days: chart query over {TARGET_MS}ms")
+
+        # 원장과 비교: 조사일 재고 = 센 수량 / 오늘 재고 = 장부 재고
+        day = pd.read_sql(text("SELECT item_id, bucket, stock, counted FROM item_rollups WHERE grain = 'day'"), conn)
+        counted = day[day["counted"].notna()]
+        bad = (pd.to_numeric(counted["stock"]) - pd.to_numeric(counted["counted"])).abs() > 1e-6
+        if bad.any():
+            failures.append(f"{int(bad.sum())} count days where stock != counted")
+        last = day[day["bucket"].astype(str) == today.isoformat()].set_index("item_id")["stock"]
+        book = ledger.replay(conn, today).set_index("item_id")["book_stock"].reindex(last.index)
+        bad = (pd.to_numeric(last) - book).abs() > 1e-6
+        if bad.any():
+            failures.append(f"{int(bad.sum())} items where today's stock != ledger book stock")
+
+    # 증분 갱신 = 전체 재구축 (소급 조사 / 입고 / 삭제 / 날짜 변경)
+    iids = [int(i) for i in items["id"].head(3)]
+    back = (today - timedelta(days=200)).isoformat()
+    db.add_snapshot(iids[0], back, 0, 0, 999, NOTE, NOTE)
+    db.add_snapshot(iids[1], today.isoformat(), 0, 0, 5, NOTE, NOTE)
+    db.add_delivery(iids[2], back, (today - timedelta(days=3)).isoformat(), 0, 0, 48, NOTE)
+    db.add_adjustment(iids[2], (today - timedelta(days=1)).isoformat(), -4, NOTE)
+    db.add_snapshot(iids[1], back, 0, 0, 321, NOTE, NOTE)
+    sid = int(db.read_df("SELECT id FROM snapshots WHERE item_id = :iid AND snap_date = :dt AND counter = :note",
+                         {"iid": iids[1], "dt": back, "note": NOTE})["id"].iloc[0])
+    db.delete_snapshot(sid)
+    n, ms = timed(db.refresh_rollups, repeat=1)
+    print(f"  incremental refresh after writes: {n} items {ms:.1f}ms")
+    with engine.connect() as conn:
+        tx = conn.begin()
+        inc = dump(conn)
+        rollups.refresh(conn, full=True)
+        if not same(inc, dump(conn)):
+            failures.append("incremental refresh differs from full rebuild")
+        tx.rollback()
+        tx = conn.begin()
+        t0 = time.perf_counter()
+        n = rollups.refresh(conn, today + timedelta(days=1))
+        ms = (time.perf_counter() - t0) * 1000
+        print(f"  day rollover: {n} items {ms:.0f}ms")
+        inc = dump(conn)
+        rollups.refresh(conn, today + timedelta(days=1), full=True)
+        if not same(inc, dump(conn)):
+            failures.append("day rollover differs from full rebuild")
+        tx.rollback()
+
+    if args.db_url:
+        db.execute("DELETE FROM snapshots WHERE note = :note", {"note": NOTE}, label="bench.cleanup")
+        db.execute("DELETE FROM deliveries WHERE note = :note", {"note": NOTE}, label="bench.cleanup")
+        db.execute("DELETE FROM inventory_events WHERE note = :note OR (ref_table = 'snapshots' AND ref_id = :sid)",
+                   {"note": NOTE, "sid": sid}, label="bench.cleanup")
+        db.rebuild_stock_state()
+        db.refresh_rollups(full=True)
+
+    for f in failures:
+        print("FAIL", f)
+    print("OK" if not failures else f"{len(failures)} failures")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+# 일평균 사용량 계산 벤치마크 + 정합성 확인
+# 기존 Python 루프(get_usage_from_snapshots_legacy) vs 새 구현(get_usage_from_snapshots, estimator="sql")
+# + 입고 반영 추정 (usage_estimator: weighted / ewma / mad) 소요 시간과
+#   입고 / 이상치가 섞인 합성 이력에서 실제 일 사용량을 얼마나 복원하는지 비교
+# 사용법:
+#   python benchmarks/bench_usage.py                      # 임시 SQLite (groupby().diff() 경로)
+#   python benchmarks/bench_usage.py --db-url postgresql://...   # Postgres (LAG() 경로)
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, text
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+
+def build_sqlite(path, n_items, n_snaps, seed=0):
+    rng = np.random.default_rng(seed)
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.begin() as conn:
+        conn.execute(text("""
+            CREATE TABLE snapshots (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, item_id INTEGER, snap_date TEXT,
+                qty_cs INTEGER DEFAULT 0, qty_box INTEGER DEFAULT 0, total_units INTEGER DEFAULT 0, note TEXT
+            )
+        """))
+    today = date.today()
+    item_id = rng.integers(1, n_items + 1, n_snaps)
+    offset = rng.integers(0, 90, n_snaps)
+    df = pd.DataFrame({
+        "item_id": item_id,
+        "snap_date": [(today - timedelta(days=int(o))).isoformat() for o in offset],
+        "total_units": rng.integers(0, 2000, n_snaps),
+    })
+    df.to_sql("snapshots", engine, if_exists="append", index=False, chunksize=10_000)
+    with engine.begin() as conn:
+        conn.execute(text("""
+            CREATE TABLE deliveries (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, property_id INTEGER DEFAULT 1, item_id INTEGER, order_date TEXT, arrival_date TEXT,
+                qty_cs INTEGER DEFAULT 0, qty_box INTEGER DEFAULT 0, total_units INTEGER DEFAULT 0, note TEXT,
+                status TEXT DEFAULT 'confirmed'
+            )
+        """))
+    n_dels = n_snaps // 10
+    dels = pd.DataFrame({
+        "item_id": rng.integers(1, n_items + 1, n_dels),
+        "arrival_date": [(today - timedelta(days=int(o))).isoformat() for o in rng.integers(0, 90, n_dels)],
+        "total_units": rng.integers(100, 2000, n_dels),
+    })
+    dels.to_sql("deliveries", engine, if_exists="append", index=False, chunksize=10_000)
+    return engine
+
+
+def synthetic_history(n_items, days, seed=0):
+    # 품목별 일정 사용량 + 입고(보충) + 가끔 세기 실수(이상치) -> (스냅샷, 입고, 실제 일 사용량)
+    rng = np.random.default_rng(seed)
+    true_rate = rng.uniform(1, 50, n_items)
+    start = pd.Timestamp(date.today()) - pd.Timedelta(days=days)
+    snaps, recs = [], []
+    for i in range(n_items):
+        count_days = np.sort(rng.choice(np.arange(days + 1), size=max(3, days // 5), replace=False))
+        arr_days = np.sort(rng.choice(np.arange(1, days + 1), size=max(1, days // 20), replace=False))
+        lot = true_rate[i] * 20
+        for d in count_days:
+            stock = 5 * lot + lot * (arr_days <= d).sum() - true_rate[i] * d
+            if rng.random() < 0.05:
+                stock *= rng.uniform(0.3, 0.7)  # 세기 실수
+            snaps.append((i + 1, start + pd.Timedelta(days=int(d)), stock))
+        recs += [(i + 1, start + pd.Timedelta(days=int(d)), lot) for d in arr_days]
+    snaps = pd.DataFrame(snaps, columns=["item_id", "snap_date", "total_units"])
+    snaps["id"] = np.arange(1, len(snaps) + 1)
+    recs = pd.DataFrame(recs, columns=["item_id", "arrival_date", "units"])
+    return snaps, recs, pd.Series(true_rate, index=np.arange(1, n_items + 1))
+
+
+def accuracy(n_items, days):
+    import usage_estimator
+    snaps, recs, truth = synthetic_history(n_items, days)
+    print(f"\nsynthetic history: {n_items} items x {days} days (restocks + 5% miscounts)")
+    print(f"{'estimator':>10} {'MAPE':>8} {'bias':>8}")
+    for m in usage_estimator.ESTIMATORS:
+        est = usage_estimator.estimate_usage(snaps, recs, m).set_index("id")["daily_avg_usage"]
+        est = est.reindex(truth.index).fillna(0)
+        err = (est - truth) / truth
+        print(f"{m:>10} {err.abs().mean():>8.1%} {err.mean():>+8.1%}")
+
+
+def compare(a, b):
+    a = a.sort_values("id").reset_index(drop=True)
+    b = b.sort_values("id").reset_index(drop=True)
+    assert list(a["id"].astype(int)) == list(b["id"].astype(int)), "item set mismatch"
+    np.testing.assert_allclose(a["daily_avg_usage"].astype(float), b["daily_avg_usage"].astype(float), rtol=1e-9)
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - t0
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--db-url", default=None, help="기존 DB 에 대해 실행 (생략 시 임시 SQLite 생성)")
+    ap.add_argument("--items", type=int, default=2_000)
+    ap.add_argument("--snaps", type=int, default=100_000)
+    ap.add_argument("--days", type=int, default=60)
+    ap.add_argument("--accuracy-items", type=int, default=300)
+    args = ap.parse_args()
+
+    import db
+    if args.db_url:
+        db.set_db_url(args.db_url)
+    else:
+        tmp = os.path.join(tempfile.mkdtemp(), "usage_bench.db")
+        build_sqlite(tmp, args.items, args.snaps)
+        db.set_db_url(f"sqlite:///{tmp}")
+
+    legacy, t_old = timed(lambda: db.get_usage_from_snapshots_legacy(args.days))
+    new, t_new = timed(lambda: db.get_usage_from_snapshots(args.days, estimator="sql"))
+    compare(legacy, new)
+    print(f"dialect={db.get_engine().dialect.name} rows(items)={len(new)}")
+    print(f"legacy loop : {t_old:.3f}s")
+    print(f"new         : {t_new:.3f}s ({t_old / t_new:.1f}x)")
+    for m in ["weighted", "ewma", "mad"]:
+        est, t_est = timed(lambda: db.get_usage_from_snapshots(args.days, estimator=m))
+        print(f"{m:<12}: {t_est:.3f}s (items={len(est)})")
+
+    accuracy(args.accuracy_items, args.days)
+
+
+if __name__ == "__main__":
+    main()
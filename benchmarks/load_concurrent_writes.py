@@ -0,0 +1,184 @@
+# 동시 입력 부하 테스트: 재고 조사 중 여러 명이 동시에 저장하는 상황 재현
+# - 제출자 N 명 (스레드) 이 소수의 품목에 재고 / 입고 예정 / 품목 수정을 동시에 보냄 (일부는 같은 키로 다시 보냄 = 더블 탭)
+# - 커넥션 대기 초과 등으로 실패하면 사람이 다시 누르는 것처럼 같은 키로 재시도 (멱등이므로 중복 없음)
+# - 끝나면 검사: (품목, 날짜, 조사자) 중복 없음 / 입고 예정은 키당 1건 / row_version = 성공한 수정 수 / item_stock_state 정합
+# 사용법:
+#   python benchmarks/load_concurrent_writes.py                               # 임시 SQLite (합성 데이터)
+#   python benchmarks/load_concurrent_writes.py --db-url postgresql://...     # 기존 DB (끝나면 테스트 행 삭제)
+# 실패 시 종료 코드 1
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+NOTE = "loadtest"
+SEND_ATTEMPTS = 3
+
+
+def pct(values, q):
+    return float(np.percentile(values, q)) if values else 0.0
+
+
+def send(fn, local):
+    # 실패하면 같은 인자 (= 같은 멱등 키) 로 다시 보냄
+    for attempt in range(SEND_ATTEMPTS):
+        try:
+            return fn()
+        except Exception as ex:
+            if attempt == SEND_ATTEMPTS - 1:
+                raise
+            local["resends"] += 1
+            local["last_error"] = f"{type(ex).__name__}: {ex}".splitlines()[0]
+
+
+def submitter(w, args, item_ids, stats, lock):
+    import db
+    rng = random.Random(args.seed + w)
+    counter = f"load-{w % args.counters}"
+    today = date.today()
+    local = {"snap": [], "delivery": [], "update": [], "dup_snap": 0, "dup_delivery": 0, "conflicts": 0,
+             "updates_ok": {}, "keys": set(), "errors": [], "resends": 0, "last_error": None}
+    for _ in range(args.submits):
+        time.sleep(rng.uniform(0, 2 * args.think))
+        iid = rng.choice(item_ids)
+        op = rng.random()
+        t0 = time.perf_counter()
+        try:
+            if op < 0.6:
+                key = uuid.uuid4().hex
+                d = (today - timedelta(days=rng.randint(0, 2))).isoformat()
+                qc, tot = rng.randint(0, 5), rng.randint(0, 500)
+                send(lambda: db.add_snapshot(iid, d, qc, 0, tot, NOTE, counter, key), local)
+                if rng.random() < args.retry_rate and not send(lambda: db.add_snapshot(iid, d, qc, 0, tot, NOTE, counter, key), local):
+                    local["dup_snap"] += 1
+                local["snap"].append(time.perf_counter() - t0)
+            elif op < 0.85:
+                key = uuid.uuid4().hex
+                a = (today + timedelta(days=rng.randint(1, 10))).isoformat()
+                tot = rng.randint(10, 300)
+                local["keys"].add(key)
+                send(lambda: db.add_delivery(iid, today.isoformat(), a, 0, 0, tot, NOTE, key), local)
+                if rng.random() < args.retry_rate:
+                    if send(lambda: db.add_delivery(iid, today.isoformat(), a, 0, 0, tot, NOTE, key), local):
+                        local["errors"].append(f"delivery key {key} stored twice")
+                    else:
+                        local["dup_delivery"] += 1
+                local["delivery"].append(time.perf_counter() - t0)
+            else:
+                # 읽고 -> 고치고 -> 저장. 충돌하면 다시 읽어서 재시도
+                for _attempt in range(5):
+                    r = send(lambda: db.read_df("SELECT * FROM items WHERE id = :id", {"id": iid}, label="load.item"), local).iloc[0]
+                    ok = send(lambda: db.update_item_logic(
+                        iid, r["name"], r["target_area"], float(r["units_per_room"] or 0), r["unit"],
+                        int(r["cs_total_units"] or 0), int(r["units_per_box"] or 0), int(r["boxes_per_cs"] or 0),
+                        int(r["safety_stock"] or 0), r["supplier"], int(r["min_order_cs"] or 0), version=int(r["row_version"])), local)
+                    if ok:
+                        local["updates_ok"][iid] = local["updates_ok"].get(iid, 0) + 1
+                        break
+                    local["conflicts"] += 1
+                local["update"].append(time.perf_counter() - t0)
+        except Exception as ex:
+            local["errors"].append(f"{type(ex).__name__}: {ex}".splitlines()[0])
+    with lock:
+        for k in ["snap", "delivery", "update", "errors"]:
+            stats[k] += local[k]
+        for k in ["dup_snap", "dup_delivery", "conflicts", "resends"]:
+            stats[k] += local[k]
+        stats["last_error"] = local["last_error"] or stats["last_error"]
+        stats["keys"] |= local["keys"]
+        for iid, n in local["updates_ok"].items():
+            stats["updates_ok"][iid] = stats["updates_ok"].get(iid, 0) + n
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--db-url", help="생략하면 합성 데이터로 임시 SQLite 를 만듦")
+    ap.add_argument("--workers", type=int, default=50)
+    ap.add_argument("--submits", type=int, default=20, help="제출자 1명당 제출 수")
+    ap.add_argument("--items", type=int, default=10, help="동시에 건드리는 품목 수 (작을수록 경합이 심함)")
+    ap.add_argument("--counters", type=int, default=10, help="조사자 이름 수 (같은 이름끼리는 같은 행을 덮어씀)")
+    ap.add_argument("--retry-rate", type=float, default=0.3, help="같은 키로 다시 보내는 비율")
+    ap.add_argument("--think", type=float, default=1.0, help="제출 간격 평균 (초, 0~2배 균등). 0 = 쉬지 않고 보냄")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--keep", action="store_true", help="테스트 행을 지우지 않음")
+    args = ap.parse_args()
+
+    import db
+    if args.db_url:
+        db.set_db_url(args.db_url)
+    else:
+        import synthetic_data
+        path = os.path.join(tempfile.mkdtemp(), "load.db")
+        synthetic_data.write_sqlite(path, *synthetic_data.generate(n_items=max(args.items, 50), years=0.5, seed=args.seed))
+        db.set_db_url(f"sqlite:///{path}")
+    db.init_db()
+    if not args.db_url:
+        db.rebuild_stock_state()
+    item_ids = [int(i) for i in db.get_items_df()["id"].head(args.items)]
+    if not item_ids:
+        sys.exit("no items")
+    versions = db.read_df("SELECT id, row_version FROM items").set_index("id")["row_version"].astype(int)
+    print(f"{db.dialect_name()}: workers={args.workers} submits={args.submits} items={len(item_ids)}")
+
+    stats = {"snap": [], "delivery": [], "update": [], "errors": [], "dup_snap": 0, "dup_delivery": 0, "conflicts": 0,
+             "keys": set(), "updates_ok": {}, "resends": 0, "last_error": None}
+    lock = threading.Lock()
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(args.workers) as ex:
+        for f in [ex.submit(submitter, w, args, item_ids, stats, lock) for w in range(args.workers)]:
+            f.result()
+    wall = time.perf_counter() - t0
+
+    n_ops = len(stats["snap"]) + len(stats["delivery"]) + len(stats["update"])
+    print(f"  {n_ops} submits in {wall:.1f}s ({n_ops / wall:.0f}/s)")
+    for op in ["snap", "delivery", "update"]:
+        lat = [x * 1000 for x in stats[op]]
+        print(f"  {op:<9} n={len(lat):>5}  p50={pct(lat, 50):7.1f}ms  p95={pct(lat, 95):7.1f}ms  max={max(lat, default=0):7.1f}ms")
+    print(f"  duplicate submits ignored: snapshots={stats['dup_snap']} deliveries={stats['dup_delivery']}"
+          f"  version conflicts (retried)={stats['conflicts']}")
+    if stats["resends"]:
+        print(f"  resent after error: {stats['resends']} (last: {stats['last_error']})")
+
+    failures = [f"error: {e}" for e in stats["errors"][:10]]
+    dups = db.read_df("""
+        SELECT item_id, snap_date, counter, COUNT(*) AS n FROM snapshots WHERE note = :note
+        GROUP BY item_id, snap_date, counter HAVING COUNT(*) > 1
+    """, {"note": NOTE})
+    if not dups.empty:
+        failures.append(f"{len(dups)} duplicate (item_id, snap_date, counter) snapshots")
+    n_del = int(db.read_df("SELECT COUNT(*) AS n FROM deliveries WHERE note = :note", {"note": NOTE})["n"].iloc[0])
+    if n_del != len(stats["keys"]):
+        failures.append(f"deliveries: {n_del} rows for {len(stats['keys'])} keys")
+    after = db.read_df("SELECT id, row_version FROM items").set_index("id")["row_version"].astype(int)
+    for iid, n in stats["updates_ok"].items():
+        if after[iid] != versions[iid] + n:
+            failures.append(f"item {iid}: row_version {versions[iid]} -> {after[iid]}, {n} updates succeeded")
+    bad = db.check_stock_state()
+    bad = bad[bad["item_id"].isin(item_ids)]
+    if not bad.empty:
+        failures.append(f"item_stock_state mismatch for {len(bad)} items")
+
+    if args.db_url and not args.keep:
+        db.execute("DELETE FROM snapshots WHERE note = :note", {"note": NOTE}, label="load.cleanup")
+        db.execute("DELETE FROM deliveries WHERE note = :note", {"note": NOTE}, label="load.cleanup")
+        db.execute("DELETE FROM inventory_events WHERE note = :note", {"note": NOTE}, label="load.cleanup")
+        db.rebuild_stock_state()
+
+    for f in failures:
+        print("FAIL", f)
+    print("OK" if not failures else f"{len(failures)} failures")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# 종단 성능 벤치마크 (pytest-benchmark): 주요 조회 / 계산 경로를 백엔드별 같은 합성 데이터로 측정
+# - 조회: get_latest_stock_df / get_usage_from_snapshots / get_future_deliveries (매 라운드 읽기 캐시를 비운 뒤)
+# - 파이프라인: 홈 (get_home_bundle + compute_forecast) / 예측 (forecast_service.run_plan) / 캘린더 한 달 (조회 + 주별 HTML)
+# 사용법 (기준값은 benchmarks/baselines/<머신>/ 에 저장, pytest.ini 의 --benchmark-storage):
+#   python -m pytest benchmarks                                         # 측정만
+#   python -m pytest benchmarks --benchmark-save=baseline               # 기준값 저장
+#   python -m pytest benchmarks --benchmark-compare --benchmark-compare-fail=median:50%   # 마지막 기준값보다 50% 느리면 실패
+#   INVENTORY_TEST_PG_URL=postgresql://... python -m pytest benchmarks  # Postgres 도 측정 (duckdb-engine 이 있으면 DuckDB 사본도)
+import calendar
+from datetime import date
+
+import pytest
+
+import cache
+
+ROUNDS = 5
+
+
+def run(benchmark, fn):
+    # 라운드마다 읽기 캐시를 비우고 1회 실행 -> 마지막 결과
+    return benchmark.pedantic(fn, setup=cache.clear, rounds=ROUNDS, warmup_rounds=1)
+
+
+@pytest.fixture(params=[1, None], ids=["property", "all"])
+def pid(request):
+    return request.param
+
+
+def test_latest_stock(benchmark, bench_db, bench_dataset, pid):
+    df = run(benchmark, lambda: bench_db.get_latest_stock_df(pid))
+    assert len(df) == bench_dataset["items"]
+
+
+@pytest.mark.parametrize("estimator", [None, "sql"], ids=["default", "sql"])
+def test_usage_60d(benchmark, bench_db, estimator):
+    df = run(benchmark, lambda: bench_db.get_usage_from_snapshots(60, 1, estimator=estimator))
+    assert not df.empty
+
+
+def test_future_deliveries_30d(benchmark, bench_db):
+    run(benchmark, lambda: bench_db.get_future_deliveries(30, 1))
+
+
+def home_compute(db, bundle):
+    import forecast_engine
+    return forecast_engine.compute_forecast(bundle["stock"], None, None, db.STATE_HORIZON_DAYS, occ_calendar=bundle["occ_calendar"],
+                                            arrivals=bundle["arrivals"], lead_times=bundle["lead_times"])
+
+
+def test_home_bundle(benchmark, bench_db):
+    run(benchmark, lambda: bench_db.get_home_bundle(1))
+
+
+def test_home_compute(benchmark, bench_db):
+    bundle = bench_db.get_home_bundle(1)
+    run(benchmark, lambda: home_compute(bench_db, bundle))
+
+
+def test_home_pipeline(benchmark, bench_db):
+    run(benchmark, lambda: home_compute(bench_db, bench_db.get_home_bundle(1)))
+
+
+def test_forecast_compute(benchmark, bench_db):
+    import forecast_engine
+    b = bench_db.get_forecast_bundle(14, 7, 1)
+    plan = run(benchmark, lambda: forecast_engine.build_order_plan(b["stock"], b["usage"], b["incoming"], b["occ_calendar"], 7,
+                                                                   arrivals=b["arrivals"], lead_times=b["lead_times"]))
+    assert len(plan) > 0
+
+
+def test_forecast_pipeline(benchmark, bench_db):
+    import forecast_service
+    run(benchmark, lambda: forecast_service.run_plan(14, 7, None, 1))
+
+
+def test_calendar_month(benchmark, bench_db):
+    from views import order_calendar
+    first = date.today().replace(day=1)
+    nxt = date(first.year + first.month // 12, first.month % 12 + 1, 1)
+
+    def month():
+        by_day = order_calendar.group_deliveries_by_day(bench_db.get_deliveries_between(first.isoformat(), nxt.isoformat(), 1))
+        return [order_calendar.build_week_html(first.year, first.month, w, by_day) for w in calendar.monthcalendar(first.year, first.month)]
+
+    weeks = run(benchmark, month)
+    assert len(weeks) >= 4
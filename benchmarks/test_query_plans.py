@@ -0,0 +1,68 @@
+# 실행 계획 회귀 확인: 핫 쿼리가 schema.INDEXES 의 인덱스를 타는지 (정렬 / 전체 스캔 없이)
+# - Postgres: EXPLAIN (FORMAT JSON) 의 Index Name, Sort / SubPlan 노드가 없어야 함
+# - SQLite: EXPLAIN QUERY PLAN 에서 대상 테이블 접근이 모두 인덱스 경유, 최신 재고는 ORDER BY 용 임시 B-tree 없음
+# - duckdb 데이터셋은 본 DB 가 SQLite 라 같은 계획이므로 건너뜀 (DuckDB 사본은 인덱스를 만들지 않음)
+import json
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import text
+
+# 이보다 작은 테이블은 Postgres 플래너가 Seq Scan 을 고르므로 건너뜀
+MIN_ROWS = 1_000
+
+
+def cases(db):
+    # (이름, 테이블, sql, params, 허용 인덱스) - 시설 단위 입고 예정은 시설이 하나뿐이면 기간 인덱스가 더 선택적이라 둘 다 허용
+    latest = db.LATEST_SNAPS_SQL.get(db.dialect_name(), db.LATEST_SNAPS_SQL["default"])
+    window = {"today": date.today().isoformat(), "end": (date.today() + timedelta(days=7)).isoformat()}
+    pid = db.DEFAULT_PROPERTY_ID
+    return [
+        ("latest_stock", "snapshots", latest.format(where=""), {}, {"ix_snapshots_prop_item_date"}),
+        ("latest_stock.property", "snapshots", latest.format(where="WHERE property_id = :pid"), {"pid": pid},
+         {"ix_snapshots_prop_item_date"}),
+        ("future_deliveries", "deliveries", db.FUTURE_DELIVERIES_SQL.format(item_filter=""), window, {"ix_deliveries_arrival_item"}),
+        ("future_deliveries.property", "deliveries", db.FUTURE_DELIVERIES_SQL.format(item_filter=" AND property_id = :pid"),
+         {**window, "pid": pid}, {"ix_deliveries_prop_arrival", "ix_deliveries_arrival_item"}),
+    ]
+
+
+def walk(node):
+    yield node
+    for child in node.get("Plans", []):
+        yield from walk(child)
+
+
+def check_postgresql(conn, table, sql, params, indexes):
+    conn.execute(text(f"ANALYZE {table}"))
+    if conn.execute(text(f"SELECT COUNT(*) FROM {table}")).scalar() < MIN_ROWS:
+        pytest.skip(f"{table} < {MIN_ROWS} rows")
+    row = conn.execute(text("EXPLAIN (FORMAT JSON) " + sql), params).scalar()
+    nodes = list(walk((row if isinstance(row, list) else json.loads(row))[0]["Plan"]))
+    types = [n["Node Type"] for n in nodes]
+    used = {n["Index Name"] for n in nodes if n.get("Index Name")}
+    plan = f"{' > '.join(types)} (indexes: {sorted(used)})"
+    assert used & indexes, plan
+    assert "Sort" not in types, plan
+    assert not any(n.get("Subplan Name") for n in nodes), plan
+
+
+def check_sqlite(conn, table, sql, params, indexes):
+    details = [r[3] for r in conn.execute(text("EXPLAIN QUERY PLAN " + sql), params)]
+    plan = " | ".join(details)
+    # 대상 테이블 (별칭 포함) 접근 줄: "SCAN snapshots USING ..." / "SEARCH s2 USING ..."
+    access = [d for d in details if d.split()[0] in ("SCAN", "SEARCH") and "USING" in d and "PRIMARY KEY" not in d]
+    assert access, plan
+    assert all(any(ix in d for ix in indexes) for d in access), plan
+    assert not any(d.startswith(f"SCAN {table}") and "INDEX" not in d for d in details), plan
+    assert "USE TEMP B-TREE FOR ORDER BY" not in details, plan
+
+
+@pytest.mark.parametrize("case", range(4), ids=["latest_stock", "latest_stock.property", "future_deliveries", "future_deliveries.property"])
+def test_hot_query_uses_index(bench_db, bench_dataset, case):
+    if bench_dataset["backend"] == "duckdb":
+        pytest.skip("main DB is SQLite (same plan as the sqlite dataset)")
+    name, table, sql, params, indexes = cases(bench_db)[case]
+    check = check_postgresql if bench_db.dialect_name() == "postgresql" else check_sqlite
+    with bench_db.get_engine().connect() as conn:
+        check(conn, table, sql, params, indexes)
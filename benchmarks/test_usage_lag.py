@@ -0,0 +1,46 @@
+# 일평균 사용량: 기존 Python 루프 (get_usage_from_snapshots_legacy) vs 새 구현 (estimator="sql")
+# - Postgres / DuckDB 사본: LAG() 집계를 DB 안에서, SQLite: 원본 행 + groupby().diff()
+# - 두 구현의 품목별 결과가 같고, 새 구현이 루프보다 빠른지 확인
+import time
+
+import numpy as np
+import pytest
+
+import cache
+
+DAYS = 60
+
+
+def compare(a, b):
+    a = a.sort_values("id").reset_index(drop=True)
+    b = b.sort_values("id").reset_index(drop=True)
+    assert list(a["id"].astype(int)) == list(b["id"].astype(int)), "item set mismatch"
+    np.testing.assert_allclose(a["daily_avg_usage"].astype(float), b["daily_avg_usage"].astype(float), rtol=1e-9)
+
+
+def best_of(fn, n=3):
+    times = []
+    for _ in range(n):
+        cache.clear()
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def test_usage_matches_legacy_loop(bench_db):
+    compare(bench_db.get_usage_from_snapshots_legacy(DAYS), bench_db.get_usage_from_snapshots(DAYS, estimator="sql"))
+
+
+def test_usage_faster_than_legacy_loop(bench_db):
+    legacy = best_of(lambda: bench_db.get_usage_from_snapshots_legacy(DAYS))
+    new = best_of(lambda: bench_db.get_usage_from_snapshots(DAYS, estimator="sql"))
+    assert new < legacy, f"sql {new * 1000:.1f}ms >= legacy loop {legacy * 1000:.1f}ms"
+
+
+@pytest.mark.parametrize("impl", ["legacy", "sql"])
+def test_usage_all_properties(benchmark, bench_db, impl):
+    fn = (lambda: bench_db.get_usage_from_snapshots_legacy(DAYS)) if impl == "legacy" else \
+        (lambda: bench_db.get_usage_from_snapshots(DAYS, estimator="sql"))
+    df = benchmark.pedantic(fn, setup=cache.clear, rounds=5, warmup_rounds=1)
+    assert not df.empty
@@ -0,0 +1,118 @@
+import threading
+import time
+from datetime import date
+from functools import wraps
+
+import pandas as pd
+
+# ==========================================
+# 읽기 함수 캐시 (테이블별 버전 카운터로 무효화)
+# ==========================================
+# - 캐시 키 = (함수, 인자, 의존 테이블들의 현재 버전, 오늘 날짜)
+# - 쓰기 함수는 invalidate("snapshots") 처럼 바뀐 테이블만 버전을 올림
+#   -> 그 테이블에 의존하는 항목만 무효화되고 나머지는 그대로 재사용
+# - 버전은 프로세스 단위이므로 다른 프로세스의 쓰기는 ttl 로만 반영됨
+
+DEFAULT_TTL = 300
+MAX_ENTRIES = 512
+
+_lock = threading.RLock()
+_versions = {}
+_entries = {}
+_stats = {}
+_evicted = 0
+_listeners = []
+
+
+def _stat(name):
+    return _stats.setdefault(name, {"hits": 0, "misses": 0})
+
+
+def _copy(value):
+    # 호출 측에서 DataFrame 을 수정해도 캐시 원본이 바뀌지 않도록
+    if isinstance(value, pd.DataFrame):
+        return value.copy()
+    if isinstance(value, dict):
+        return {k: _copy(v) for k, v in value.items()}
+    if isinstance(value, tuple):
+        return tuple(_copy(v) for v in value)
+    return value
+
+
+def table_version(table):
+    with _lock:
+        return _versions.get(table, 0)
+
+
+def invalidate(*tables):
+    global _evicted
+    with _lock:
+        for tbl in tables:
+            _versions[tbl] = _versions.get(tbl, 0) + 1
+        stale = [k for k, e in _entries.items() if e["tables"] & set(tables)]
+        for k in stale:
+            del _entries[k]
+        _evicted += len(stale)
+        listeners = list(_listeners)
+    for fn in listeners:
+        fn(set(tables))
+
+
+def on_invalidate(fn):
+    # 쓰기 후 알림 (background 의 재계산 트리거): fn(바뀐 테이블 set)
+    with _lock:
+        if fn not in _listeners:
+            _listeners.append(fn)
+
+
+def clear():
+    with _lock:
+        _entries.clear()
+
+
+def cached(*tables, ttl=DEFAULT_TTL):
+    # @cached("items", "snapshots") 처럼 의존 테이블을 선언
+    deps = frozenset(tables)
+
+    def deco(fn):
+        name = fn.__name__
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with _lock:
+                key = (name, args, tuple(sorted(kwargs.items())),
+                       tuple(_versions.get(tbl, 0) for tbl in sorted(deps)), date.today())
+                entry = _entries.get(key)
+                if entry is not None and entry["expires"] > time.monotonic():
+                    _stat(name)["hits"] += 1
+                    return _copy(entry["value"])
+                _stat(name)["misses"] += 1
+            value = fn(*args, **kwargs)
+            with _lock:
+                if len(_entries) >= MAX_ENTRIES:
+                    # 가장 먼저 만료되는 항목부터 정리
+                    for k in sorted(_entries, key=lambda k: _entries[k]["expires"])[: MAX_ENTRIES // 4]:
+                        del _entries[k]
+                _entries[key] = {"value": value, "tables": deps, "expires": time.monotonic() + ttl}
+            return _copy(value)
+
+        wrapper.tables = deps
+        return wrapper
+
+    return deco
+
+
+def stats():
+    # {"hits": n, "misses": n, "hit_rate": r, "entries": n, "by_function": {...}}
+    with _lock:
+        by_fn = {k: dict(v) for k, v in _stats.items()}
+        hits = sum(v["hits"] for v in by_fn.values())
+        misses = sum(v["misses"] for v in by_fn.values())
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+            "entries": len(_entries),
+            "evicted_by_writes": _evicted,
+            "by_function": by_fn,
+        }
@@ -0,0 +1,123 @@
+# 테스트 / 벤치마크 공용 fixture (tests/ 와 benchmarks/ 가 같이 사용)
+# - sqlite: 임시 파일
+# - postgresql: INVENTORY_TEST_PG_URL (테스트 전용 DB) 이 있을 때만. 새 스키마를 만들고 search_path 로 격리
+#   예: INVENTORY_TEST_PG_URL="postgresql+psycopg2://postgres@localhost:5432/inventory_test" python -m pytest
+# - duckdb (벤치마크만): duckdb-engine 이 설치되어 있을 때만. 본 DB 는 SQLite, 이력 집계는 DuckDB 사본 (sync_analytics)
+# 없는 백엔드는 skip
+import os
+import sys
+import uuid
+from contextlib import contextmanager, nullcontext
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+PG_URL = os.environ.get("INVENTORY_TEST_PG_URL")
+BACKENDS = ["sqlite", "postgresql"]
+BENCH_BACKENDS = ["sqlite", "postgresql", "duckdb"]
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("inventory benchmarks")
+    group.addoption("--bench-items", type=int, default=500, help="benchmarks/ 합성 데이터 품목 수")
+    group.addoption("--bench-years", type=float, default=3, help="benchmarks/ 합성 데이터 기간 (년)")
+
+
+def _pg_schema_url(name):
+    url = make_url(PG_URL)
+    return url.set(query={**url.query, "options": f"-csearch_path={name}"})
+
+
+def _skip_missing(backend):
+    if backend == "postgresql" and not PG_URL:
+        pytest.skip("INVENTORY_TEST_PG_URL not set")
+    if backend == "duckdb":
+        pytest.importorskip("duckdb_engine")
+
+
+@contextmanager
+def _pg_schema(prefix):
+    # 새 스키마 -> 그 스키마만 보는 접속 URL (문자열). 끝나면 삭제
+    name = f"{prefix}_{uuid.uuid4().hex[:12]}"
+    admin = create_engine(PG_URL)
+    with admin.begin() as conn:
+        conn.execute(text(f"CREATE SCHEMA {name}"))
+    try:
+        yield _pg_schema_url(name).render_as_string(hide_password=False)
+    finally:
+        with admin.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA {name} CASCADE"))
+        admin.dispose()
+
+
+@pytest.fixture(params=BACKENDS)
+def backend(request):
+    _skip_missing(request.param)
+    return request.param
+
+
+@pytest.fixture
+def empty_db_url(backend, tmp_path):
+    # -> 빈 DB 의 접속 URL (문자열)
+    if backend == "sqlite":
+        yield f"sqlite:///{tmp_path / 'test.db'}"
+        return
+    with _pg_schema("test") as url:
+        yield url
+
+
+@pytest.fixture
+def app_db(empty_db_url):
+    # 현재 스키마로 올린 빈 DB 에 db 모듈을 연결 -> db 모듈
+    import cache
+    import db
+    db.set_db_url(empty_db_url)
+    db.init_db()
+    cache.clear()
+    yield db
+    db.set_db_url(None)
+
+
+# ==========================================
+# 벤치마크용 합성 데이터 (세션당 백엔드별 1회 생성)
+# ==========================================
+@pytest.fixture(scope="session", params=BENCH_BACKENDS)
+def bench_dataset(request, tmp_path_factory):
+    # -> {"backend", "db_url", "analytics_url", "items"}
+    import db
+    import synthetic_data
+    backend = request.param
+    _skip_missing(backend)
+    items = request.config.getoption("--bench-items")
+    data = synthetic_data.generate(items, request.config.getoption("--bench-years"))
+    tmp = tmp_path_factory.mktemp(backend)
+    with (_pg_schema("bench") if backend == "postgresql" else nullcontext(f"sqlite:///{tmp / 'bench.db'}")) as url:
+        synthetic_data.write_db(url, *data, replace=True)
+        db.set_analytics_url(None)
+        db.set_db_url(url)
+        db.init_db()
+        db.rebuild_stock_state()
+        analytics = None
+        if backend == "duckdb":
+            analytics = f"duckdb:///{tmp / 'history.duckdb'}"
+            db.sync_analytics(analytics)
+        yield {"backend": backend, "db_url": url, "analytics_url": analytics, "items": items}
+        db.set_analytics_url(None)
+        db.set_db_url(None)
+
+
+@pytest.fixture
+def bench_db(bench_dataset):
+    # 해당 백엔드의 합성 DB 에 db 모듈을 연결 (이미 연결되어 있으면 그대로) -> db 모듈
+    import cache
+    import db
+    if db.DB_URL != bench_dataset["db_url"]:
+        db.set_db_url(bench_dataset["db_url"])
+        db.init_db()
+    if db.ANALYTICS_URL != bench_dataset["analytics_url"]:
+        db.set_analytics_url(bench_dataset["analytics_url"])
+    cache.clear()
+    return db
@@ -0,0 +1,1102 @@
+import importlib.util
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+import pandas as pd
+from sqlalchemy import create_engine, event, text, bindparam
+from sqlalchemy.engine import make_url
+
+import forecast_engine
+import jp_holidays
+import ledger
+import metrics
+import rollups
+import schema
+import usage_estimator
+from cache import cached, invalidate
+
+logger = logging.getLogger("inventory.db")
+
+# ==========================================
+# 1. 접속 설정 및 커넥션 풀
+# ==========================================
+DB_URL_MISSING = "接続先 DB が未設定です。環境変数 INVENTORY_DB_URL または .streamlit/secrets.toml の db_url を設定してください (CLI は --db-url も可)"
+
+def _resolve_db_url():
+    # 우선순위: 환경변수 > st.secrets. 둘 다 없으면 None (접속하는 시점에 DB_URL_MISSING 으로 실패)
+    if os.environ.get("INVENTORY_DB_URL"):
+        return os.environ["INVENTORY_DB_URL"]
+    try:
+        import streamlit as st
+        return st.secrets["db_url"]
+    except Exception:
+        return None
+
+DB_URL = _resolve_db_url()
+
+def _require_db_url():
+    if not DB_URL:
+        raise RuntimeError(DB_URL_MISSING)
+    return DB_URL
+
+# Supabase 풀러(PgBouncer 트랜잭션 모드, 6543) 앞에서 쓰는 풀 설정
+POOL_OPTIONS = {
+    "pool_pre_ping": True,   # 풀러가 끊은 커넥션을 재사용하지 않도록 체크아웃 시 확인
+    "pool_size": int(os.environ.get("INVENTORY_DB_POOL_SIZE", 5)),
+    "max_overflow": int(os.environ.get("INVENTORY_DB_MAX_OVERFLOW", 5)),
+    "pool_recycle": 300,     # 풀러 idle timeout 보다 짧게
+    "pool_timeout": 10,
+    "pool_use_lifo": True,   # 최근 커넥션 위주로 재사용 -> 남는 커넥션은 자연히 recycle
+}
+SLOW_QUERY_MS = 500
+
+def _connect_args(url):
+    if url.get_backend_name() == "sqlite":
+        # 다른 스레드가 쓰는 중이면 바로 실패하지 않고 기다림
+        return {"timeout": 30}
+    if url.get_backend_name() != "postgresql":
+        return {}
+    args = {"application_name": "inventory-sql"}
+    if url.get_driver_name() == "psycopg":
+        # 트랜잭션 모드 풀러에서는 서버측 prepared statement 를 쓰면 안 됨
+        args["prepare_threshold"] = None
+    else:
+        args["connect_timeout"] = 10
+    return args
+
+def _sqlite_pragmas(dbapi_conn, _):
+    # WAL: 백그라운드 갱신 스레드의 읽기와 쓰기가 서로 막지 않도록 / 외래키: ON DELETE CASCADE 를 Postgres 와 같게
+    cur = dbapi_conn.cursor()
+    cur.execute("PRAGMA journal_mode=WAL")
+    cur.execute("PRAGMA foreign_keys=ON")
+    cur.close()
+
+def _make_engine(url):
+    # postgresql (원격 풀러) / sqlite (로컬 파일) / duckdb (분석용 사본, duckdb-engine 필요)
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend == "duckdb" and importlib.util.find_spec("duckdb_engine") is None:
+        raise RuntimeError("DuckDB には duckdb / duckdb-engine が必要です (pip install duckdb duckdb-engine)")
+    opts = POOL_OPTIONS if backend == "postgresql" else {}
+    engine = create_engine(url, connect_args=_connect_args(url), **opts)
+    if backend == "sqlite":
+        event.listen(engine, "connect", _sqlite_pragmas)
+    return engine
+
+_engine = None
+_engine_lock = threading.Lock()
+
+def get_engine():
+    # 프로세스당 엔진 1개 (Streamlit rerun 사이에도 모듈 상태로 유지)
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = _make_engine(_require_db_url())
+    return _engine
+
+def set_db_url(url):
+    # CLI / 벤치마크에서 접속 대상을 바꿀 때
+    global DB_URL, _engine
+    with _engine_lock:
+        if _engine is not None:
+            _engine.dispose()
+        DB_URL, _engine = url, None
+
+def dialect_name():
+    return get_engine().dialect.name
+
+# ==========================================
+# 1-1. 읽기 / 쓰기 API (쿼리별 지연시간 로깅)
+# ==========================================
+@contextmanager
+def _timed(label):
+    # 로그 + metrics (번들 안의 개별 쿼리는 번들 아래 단계로 기록)
+    t0 = time.perf_counter()
+    with metrics.timer("query", label) as info:
+        try:
+            yield info
+        finally:
+            ms = (time.perf_counter() - t0) * 1000
+            logger.log(logging.WARNING if ms >= SLOW_QUERY_MS else logging.INFO,
+                       "%s %.1fms rows=%s", label, ms, info["rows"])
+
+def read_df(sql, params=None, label=None, conn=None):
+    # 읽기 전용 (SELECT / WITH) -> DataFrame. conn 을 주면 그 커넥션에서 실행
+    stmt = text(sql) if isinstance(sql, str) else sql
+    with _timed(label or " ".join(str(stmt).split())[:60]) as info:
+        if conn is not None:
+            df = pd.read_sql(stmt, conn, params=params)
+        else:
+            with get_engine().connect() as c:
+                df = pd.read_sql(stmt, c, params=params)
+        info["rows"] = len(df)
+    return df
+
+def execute(sql, params=None, label=None):
+    # 쓰기 (INSERT / UPDATE / DELETE) 를 자체 트랜잭션에서 실행 -> 영향 행 수
+    with _timed(label or " ".join(sql.split())[:60]) as info:
+        with get_engine().begin() as conn:
+            res = conn.execute(text(sql), params or {})
+        info["rows"] = res.rowcount
+    return res.rowcount
+
+def transaction():
+    # 여러 쓰기를 한 트랜잭션으로 묶을 때: with transaction() as conn: ...
+    return get_engine().begin()
+
+def read_bundle(queries, label="bundle", engine=None):
+    # {이름: (sql, params)} 를 커넥션 1회 체크아웃으로 모두 실행 -> {이름: DataFrame}
+    out = {}
+    with _timed(label) as info:
+        with (engine or get_engine()).connect() as conn:
+            for name, (sql, params) in queries.items():
+                out[name] = read_df(sql, params, label=f"{label}.{name}", conn=conn)
+        info["rows"] = sum(len(df) for df in out.values())
+    return out
+
+def read_history_bundle(queries, history, label="bundle"):
+    # 화면 입력 (queries) + 이력 집계 (history). 분석용 사본이 없으면 커넥션 1회로 함께 실행
+    if not ANALYTICS_URL:
+        return read_bundle({**queries, **history}, label=label)
+    return {**read_bundle(queries, label=label), **read_bundle(history, label=f"{label}.history", engine=get_analytics_engine())}
+
+# ==========================================
+# 1-2. 분석용 로컬 사본 (선택)
+# ==========================================
+# INVENTORY_ANALYTICS_URL (sqlite:///history.db / duckdb:///history.duckdb) 이 있으면 무거운 이력 집계
+# (실적 사용량 / 리드타임) 만 그 사본에서 읽음 -> 원격 풀러 왕복 없이 로컬 디스크 속도
+# 사본은 manage.py sync-analytics 로 통째로 갱신 (그 사이의 쓰기는 다음 동기화까지 반영되지 않음)
+ANALYTICS_URL = os.environ.get("INVENTORY_ANALYTICS_URL")
+ANALYTICS_TABLES = ["items", "snapshots", "deliveries"]
+# LAG() / STDDEV_SAMP 집계를 DB 안에서 하는 방언 (그 외는 원본 행을 받아 pandas 로 벡터 계산)
+# 집계 SQL 의 실수 변환은 DOUBLE PRECISION (DuckDB 의 FLOAT 는 4바이트)
+IN_DB_AGG_DIALECTS = {"postgresql", "duckdb"}
+_analytics_engine = None
+
+def get_analytics_engine():
+    # 사본이 없으면 본 DB 엔진
+    global _analytics_engine
+    if not ANALYTICS_URL:
+        return get_engine()
+    if _analytics_engine is None:
+        with _engine_lock:
+            if _analytics_engine is None:
+                _analytics_engine = _make_engine(ANALYTICS_URL)
+    return _analytics_engine
+
+def set_analytics_url(url):
+    global ANALYTICS_URL, _analytics_engine
+    with _engine_lock:
+        if _analytics_engine is not None:
+            _analytics_engine.dispose()
+        ANALYTICS_URL, _analytics_engine = url, None
+
+def history_dialect():
+    return get_analytics_engine().dialect.name
+
+def sync_analytics(url=None, chunksize=50_000):
+    # 본 DB -> 분석용 사본 (ANALYTICS_TABLES 전체 교체: 삭제도 반영되도록 증분이 아닌 전체 복사) -> {테이블: 행 수}
+    if url:
+        set_analytics_url(url)
+    if not ANALYTICS_URL:
+        raise RuntimeError("INVENTORY_ANALYTICS_URL (または --url) が未設定です")
+    target = get_analytics_engine()
+    counts = {}
+    with _timed("sync_analytics") as info:
+        with get_engine().connect() as src:
+            for table in ANALYTICS_TABLES:
+                n = 0
+                for chunk in pd.read_sql(text(f"SELECT * FROM {table} ORDER BY id"), src, chunksize=chunksize):
+                    chunk.to_sql(table, target, if_exists="replace" if n == 0 else "append", index=False)
+                    n += len(chunk)
+                if n == 0:
+                    pd.read_sql(text(f"SELECT * FROM {table} WHERE 1 = 0"), src).to_sql(table, target, if_exists="replace", index=False)
+                counts[table] = n
+        if target.dialect.name != "duckdb":
+            # DuckDB 는 컬럼 스캔이라 인덱스 불필요
+            with target.begin() as conn:
+                for ddl in schema.INDEXES:
+                    if ddl.split(" ON ")[1].split()[0] in ANALYTICS_TABLES:
+                        conn.execute(text(ddl))
+        info["rows"] = sum(counts.values())
+    invalidate(*ANALYTICS_TABLES)
+    return counts
+
+# ==========================================
+# 2. 스키마 초기화
+# ==========================================
+DEFAULT_PROPERTY_ID = 1
+_schema_url = None  # init_db 를 마친 DB_URL
+_schema_lock = threading.Lock()
+
+def init_db(force=False):
+    # 버전 확인은 프로세스당 1회 (Streamlit rerun 마다 돌지 않도록). 접속 대상이 바뀌면 다시 확인
+    # 스키마가 최신이면 schema_version 조회만, 아니면 schema.migrate 가 1회 올림. force=True 면 버전과 상관없이 재실행
+    global _schema_url
+    _require_db_url()
+    if _schema_url == DB_URL and not force:
+        return False
+    with _schema_lock:
+        if _schema_url == DB_URL and not force:
+            return False
+        applied = schema.migrate(get_engine(), DEFAULT_PROPERTY_ID, force=force)
+        _schema_url = DB_URL
+        return applied
+
+# ==========================================
+# 3. 데이터 쿼리 함수
+# ==========================================
+def force_numeric(df, cols):
+    if df is None or df.empty: return df
+    for c in cols:
+        if c in df.columns:
+            df[c] = pd.to_numeric(df[c], errors='coerce').fillna(0)
+    return df
+
+def _prop_cond(col, property_id, params):
+    # property_id 가 None 이면 전체 시설 (조건 없음)
+    if property_id is None:
+        return []
+    params["pid"] = int(property_id)
+    return [f"{col} = :pid"]
+
+def _where(conds):
+    return ("WHERE " + " AND ".join(conds)) if conds else ""
+
+@cached("properties", ttl=600)
+def get_properties_df():
+    return read_df("SELECT * FROM properties ORDER BY id", label="properties")
+
+@cached("properties", ttl=600)
+def get_property_areas_df(property_id=None):
+    params = {}
+    sql = f"SELECT * FROM property_areas {_where(_prop_cond('property_id', property_id, params))} ORDER BY property_id, area"
+    return force_numeric(read_df(sql, params, label="property_areas"), ["rooms", "ref_occ"])
+
+def add_property(code, name, areas):
+    # areas: {"ALL": (rooms, ref_occ), ...}
+    with transaction() as conn:
+        pid = conn.execute(text("INSERT INTO properties (code, name) VALUES (:code, :name) RETURNING id"),
+                           {"code": code, "name": name}).scalar()
+        conn.execute(text("INSERT INTO property_areas (property_id, area, rooms, ref_occ) VALUES (:pid, :area, :rooms, :ref)"),
+                     [{"pid": pid, "area": a, "rooms": r, "ref": o} for a, (r, o) in areas.items()])
+    invalidate("properties")
+    return pid
+
+@cached("items", ttl=60)
+def get_items_df(property_id=None):
+    params = {}
+    df = read_df(f"SELECT * FROM items {_where(_prop_cond('property_id', property_id, params))} ORDER BY id", params, label="items")
+    return force_numeric(df, ["cs_total_units", "units_per_box", "boxes_per_cs", "safety_stock", "units_per_room", "min_order_cs"])
+
+def add_item(name, area, upr, unit, cs, upb, bpc, safe, property_id=None, supplier=None, moq=0):
+    sql = """
+    INSERT INTO items (property_id, name, target_area, units_per_room, unit, cs_total_units, units_per_box, boxes_per_cs, safety_stock,
+                       supplier, min_order_cs)
+    VALUES (:pid, :name, :area, :upr, :unit, :cs, :upb, :bpc, :safe, :supplier, :moq)
+    """
+    execute(sql, {"pid": property_id or DEFAULT_PROPERTY_ID, "name": name, "area": area, "upr": upr, "unit": unit,
+                  "cs": cs, "upb": upb, "bpc": bpc, "safe": safe, "supplier": supplier or None, "moq": moq}, label="add_item")
+    invalidate("items")
+
+def update_item_logic(iid, name, area, upr, unit, cs, upb, bpc, safe, supplier=None, moq=0, version=None):
+    # version: 화면에 읽어 온 row_version. 그 사이 다른 사람이 고쳤으면 갱신하지 않고 False (낙관적 잠금)
+    sql = """
+    UPDATE items SET name=:name, target_area=:area, units_per_room=:upr, unit=:unit, cs_total_units=:cs, 
+    units_per_box=:upb, boxes_per_cs=:bpc, safety_stock=:safe, supplier=:supplier, min_order_cs=:moq,
+    row_version = row_version + 1 WHERE id=:id
+    """
+    params = {"name": name, "area": area, "upr": upr, "unit": unit, "cs": cs, "upb": upb, "bpc": bpc, "safe": safe,
+              "supplier": supplier or None, "moq": moq, "id": iid}
+    if version is not None:
+        sql += " AND row_version = :version"
+        params["version"] = int(version)
+    n = execute(sql, params, label="update_item")
+    invalidate("items")
+    return n > 0
+
+def delete_item_logic(iid):
+    cnt = read_bundle({
+        "s": ("SELECT COUNT(*) as cnt FROM snapshots WHERE item_id=:id", {"id": iid}),
+        "d": ("SELECT COUNT(*) as cnt FROM deliveries WHERE item_id=:id", {"id": iid}),
+    }, label="item_refs")
+    s_cnt = int(pd.to_numeric(cnt["s"]["cnt"]).iloc[0])
+    d_cnt = int(pd.to_numeric(cnt["d"]["cnt"]).iloc[0])
+    
+    if s_cnt == 0 and d_cnt == 0:
+        execute("DELETE FROM items WHERE id=:id", {"id": iid}, label="delete_item")
+        invalidate("items")
+        return True, 0, 0
+    return False, s_cnt, d_cnt
+
+def _lock_items(conn, item_ids):
+    # [Postgres] 같은 품목의 쓰기를 직렬화 (품목 id 순으로 잠가 교착 방지)
+    # READ COMMITTED 에서 잠그지 않으면 동시에 쓴 두 트랜잭션이 서로의 행을 못 본 채 item_stock_state 를 덮어씀
+    # SQLite 는 쓰기 트랜잭션이 원래 하나씩만 실행됨
+    if conn.dialect.name != "postgresql" or not item_ids: return
+    conn.execute(text("SELECT id FROM items WHERE id IN :ids ORDER BY id FOR UPDATE")
+                 .bindparams(bindparam("ids", expanding=True)), {"ids": sorted({int(i) for i in item_ids})})
+
+# [Postgres] 백그라운드 / 관리 작업끼리 프로세스 간 직렬화 (트랜잭션 단위라 풀러 트랜잭션 모드에서도 사용 가능)
+ROLLUP_LOCK_KEY = 7402
+COMPACT_LOCK_KEY = 7403
+
+def _advisory_xact_lock(conn, key, wait=True):
+    # wait=False: 다른 곳에서 잡고 있으면 기다리지 않고 False. SQLite 는 쓰기 트랜잭션이 원래 하나씩이므로 항상 True
+    if conn.dialect.name != "postgresql": return True
+    if wait:
+        conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": key})
+        return True
+    return bool(conn.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": key}).scalar())
+
+# property_id 는 품목에서 복사 (시설별 인덱스로 이력을 나누기 위한 비정규화)
+# 같은 품목 / 날짜 / 조사자는 1행 (다시 세면 덮어씀). 같은 멱등 키로 다시 오면 (더블 탭 / 재실행) 아무것도 하지 않음
+# {values}: SNAPSHOT_ROW 을 행 수만큼 (n = 행 번호). 바뀌지 않은 재전송은 RETURNING 에 나오지 않음
+SNAPSHOT_ROW = "((SELECT property_id FROM items WHERE id = :iid{n}), :iid{n}, :dt{n}, :qc{n}, :qb{n}, :tot{n}, :note{n}, :counter{n}, :key{n})"
+SNAPSHOT_UPSERT_SQL = """
+    INSERT INTO snapshots (property_id, item_id, snap_date, qty_cs, qty_box, total_units, note, counter, idempotency_key)
+    VALUES {values}
+    ON CONFLICT (item_id, snap_date, counter) DO UPDATE SET
+        qty_cs = EXCLUDED.qty_cs, qty_box = EXCLUDED.qty_box, total_units = EXCLUDED.total_units, note = EXCLUDED.note,
+        idempotency_key = EXCLUDED.idempotency_key
+    WHERE EXCLUDED.idempotency_key IS NULL OR snapshots.idempotency_key IS NULL
+       OR snapshots.idempotency_key <> EXCLUDED.idempotency_key
+    RETURNING id
+"""
+SNAPSHOT_ROW_KEYS = ["iid", "dt", "qc", "qb", "tot", "note", "counter", "key"]
+# 다중행 INSERT 1문의 행 수 (SQLite 바인드 변수 상한 32766 / 행당 10개)
+BULK_CHUNK_ROWS = 500
+
+def _upsert_snapshots(conn, rows):
+    # 청크마다 다중행 UPSERT 1문 + 원장 이벤트 1문 -> 실제로 쓴 snapshots.id
+    # 같은 (품목, 날짜, 조사자) 가 한 문장에 두 번 있으면 ON CONFLICT 가 실패하므로 호출 쪽에서 중복 제거
+    ids = []
+    for start in range(0, len(rows), BULK_CHUNK_ROWS):
+        chunk = rows[start:start + BULK_CHUNK_ROWS]
+        values = ",\n           ".join(SNAPSHOT_ROW.format(n=n) for n in range(len(chunk)))
+        params = {f"{k}{n}": r[k] for n, r in enumerate(chunk) for k in SNAPSHOT_ROW_KEYS}
+        written = conn.execute(text(SNAPSHOT_UPSERT_SQL.format(values=values)), params).scalars().all()
+        ledger.record_counts(conn, written)
+        ids += written
+    return ids
+
+def add_snapshot(iid, date, qc, qb, tot, note, counter="", key=None):
+    # counter: 조사자 (빈 문자열 = 이름 없음), key: 폼 제출 1회마다 클라이언트가 만든 멱등 키
+    # -> True (저장) / False (같은 키로 이미 저장됨)
+    with transaction() as conn:
+        _lock_items(conn, [iid])
+        written = bool(_upsert_snapshots(conn, [{"iid": iid, "dt": date, "qc": qc, "qb": qb, "tot": tot, "note": note,
+                                                 "counter": counter or "", "key": key}]))
+        if written:
+            refresh_stock_state(conn, [iid])
+    if written:
+        invalidate("snapshots", "item_stock_state", "inventory_events")
+    return written
+
+def add_snapshots_bulk(records, counter="", key=None):
+    # 재고 일괄 입력: records(iid, dt, qc, qb, tot, note) 를 한 트랜잭션에서 BULK_CHUNK_ROWS 행씩 다중행 UPSERT
+    # 행별 멱등 키 = key:품목:날짜 (같은 제출을 다시 보내도 중복되지 않음). 같은 품목 / 날짜가 여러 행이면 마지막 행
+    # -> 실제로 저장한 행 수 (같은 키로 이미 저장된 행은 제외)
+    if records is None or len(records) == 0: return 0
+    rows = pd.DataFrame(records).drop_duplicates(["iid", "dt"], keep="last").astype(object).to_dict("records")
+    for r in rows:
+        r["counter"] = counter or ""
+        r["key"] = f"{key}:{r['iid']}:{r['dt']}" if key else None
+    iids = sorted({r["iid"] for r in rows})
+    with _timed("add_snapshots_bulk") as info:
+        with transaction() as conn:
+            _lock_items(conn, iids)
+            written = _upsert_snapshots(conn, rows)
+            if written:
+                refresh_stock_state(conn, iids)
+        info["rows"] = len(written)
+    if written:
+        invalidate("snapshots", "item_stock_state", "inventory_events")
+    return len(written)
+
+def delete_snapshot(sid):
+    with transaction() as conn:
+        _lock_items(conn, conn.execute(text("SELECT item_id FROM snapshots WHERE id=:id"), {"id": sid}).scalars().all())
+        iids = conn.execute(text("DELETE FROM snapshots WHERE id=:id RETURNING item_id"), {"id": sid}).scalars().all()
+        ledger.record_voids(conn, "snapshots", [sid] if iids else [])
+        refresh_stock_state(conn, iids)
+    invalidate("snapshots", "item_stock_state", "inventory_events")
+
+def add_delivery(iid, o_date, a_date, qc, qb, tot, note, key=None):
+    # key: 멱등 키 (같은 키는 한 번만 등록) -> True (등록) / False (이미 등록됨)
+    sql = """
+    INSERT INTO deliveries (property_id, item_id, order_date, arrival_date, qty_cs, qty_box, total_units, note, idempotency_key)
+    VALUES ((SELECT property_id FROM items WHERE id = :iid), :iid, :od, :ad, :qc, :qb, :tot, :note, :key)
+    ON CONFLICT (idempotency_key) DO NOTHING RETURNING id
+    """
+    with transaction() as conn:
+        _lock_items(conn, [iid])
+        did = conn.execute(text(sql), {"iid": iid, "od": o_date, "ad": a_date, "qc": qc, "qb": qb, "tot": tot,
+                                       "note": note, "key": key}).scalar()
+        written = did is not None
+        if written:
+            ledger.record_receipts(conn, [did])
+            refresh_stock_state(conn, [iid])
+    if written:
+        invalidate("deliveries", "item_stock_state", "inventory_events")
+    return written
+
+def delete_delivery(did):
+    with transaction() as conn:
+        _lock_items(conn, conn.execute(text("SELECT item_id FROM deliveries WHERE id=:id"), {"id": did}).scalars().all())
+        iids = conn.execute(text("DELETE FROM deliveries WHERE id=:id RETURNING item_id"), {"id": did}).scalars().all()
+        ledger.record_voids(conn, "deliveries", [did] if iids else [])
+        refresh_stock_state(conn, iids)
+    invalidate("deliveries", "item_stock_state", "inventory_events")
+
+def replace_draft_deliveries(records):
+    # 발주 초안 (forecast_engine.draft_deliveries) 저장: 같은 품목의 기존 초안은 교체
+    # 초안은 입고 예정 / 재고 상태 계산에 들어가지 않으므로 item_stock_state 는 갱신하지 않음
+    if records is None or records.empty: return 0
+    rows = records.astype(object).where(records.notna(), None).to_dict("records")
+    with transaction() as conn:
+        conn.execute(text("DELETE FROM deliveries WHERE status = 'draft' AND item_id IN :ids")
+                     .bindparams(bindparam("ids", expanding=True)), {"ids": sorted({int(r["item_id"]) for r in rows})})
+        conn.execute(text("""
+            INSERT INTO deliveries (property_id, item_id, order_date, arrival_date, qty_cs, qty_box, total_units, note, po_ref, status)
+            VALUES ((SELECT property_id FROM items WHERE id = :item_id), :item_id, :order_date, :arrival_date,
+                    :qty_cs, :qty_box, :total_units, :note, :po_ref, 'draft')
+        """), rows)
+    invalidate("deliveries")
+    return len(rows)
+
+def confirm_deliveries(dids):
+    # 초안 -> 확정 (이때부터 입고 예정 / 재고 상태에 반영)
+    if not dids: return 0
+    params = {"ids": [int(d) for d in dids]}
+    with transaction() as conn:
+        _lock_items(conn, conn.execute(text("SELECT item_id FROM deliveries WHERE id IN :ids")
+                                       .bindparams(bindparam("ids", expanding=True)), params).scalars().all())
+        iids = conn.execute(text("UPDATE deliveries SET status = 'confirmed' WHERE id IN :ids AND status = 'draft' RETURNING item_id")
+                            .bindparams(bindparam("ids", expanding=True)), params).scalars().all()
+        ledger.record_receipts(conn, params["ids"] if iids else [])
+        refresh_stock_state(conn, iids)
+    invalidate("deliveries", "item_stock_state", "inventory_events")
+    return len(iids)
+
+def discard_draft_deliveries(dids):
+    if not dids: return 0
+    with transaction() as conn:
+        n = conn.execute(text("DELETE FROM deliveries WHERE id IN :ids AND status = 'draft'")
+                         .bindparams(bindparam("ids", expanding=True)), {"ids": [int(d) for d in dids]}).rowcount
+    invalidate("deliveries")
+    return n
+
+# 품목별 최신 스냅샷 1건 (같은 날짜가 여러 건이면 id 가 큰 쪽)
+# {where}: 시설 조건 (ix_snapshots_prop_item_date 순서 그대로 읽음)
+LATEST_SNAPS_SQL = {
+    "postgresql": """
+        SELECT DISTINCT ON (property_id, item_id) item_id, total_units as current_stock, snap_date as last_snap_date
+        FROM snapshots {where}
+        ORDER BY property_id, item_id, snap_date DESC, id DESC
+    """,
+    # SQLite: (시설, 품목) 마다 인덱스에서 맨 앞 1건만 찾음. ROW_NUMBER() 로 전체 이력을 순위 매기면
+    # 시설 조건이 있을 때 items 와 중첩 루프가 되어 이력 수에 비례해 느려짐 (benchmarks/test_paths.py: 3년 x 500 품목 6.6초 -> 50ms)
+    "default": """
+        SELECT s.item_id, s.total_units as current_stock, s.snap_date as last_snap_date
+        FROM (SELECT DISTINCT property_id, item_id FROM snapshots {where}) k
+        JOIN snapshots s ON s.id = (
+            SELECT s2.id FROM snapshots s2 WHERE s2.property_id = k.property_id AND s2.item_id = k.item_id
+            ORDER BY s2.snap_date DESC, s2.id DESC LIMIT 1)
+    """,
+}
+
+STOCK_NUMERIC_COLS = ["current_stock", "safety_stock", "cs_total_units", "units_per_box", "boxes_per_cs", "units_per_room", "min_order_cs"]
+
+# 품목의 시설 / 구역에 맞는 객실 수·기준 가동률 (구역 정의가 없으면 그 시설의 ALL)
+AREA_JOIN_SQL = """
+    LEFT JOIN property_areas pa ON pa.property_id = i.property_id AND pa.area = COALESCE(i.target_area, 'ALL')
+    LEFT JOIN property_areas pall ON pall.property_id = i.property_id AND pall.area = 'ALL'
+"""
+AREA_COLS_SQL = """COALESCE(pa.area, pall.area) as area_key, COALESCE(pa.rooms, pall.rooms) as area_rooms,
+           COALESCE(pa.ref_occ, pall.ref_occ) as area_ref_occ"""
+
+def _latest_stock_sql(property_id=None):
+    # -> (sql, params)
+    params = {}
+    latest = LATEST_SNAPS_SQL.get(dialect_name(), LATEST_SNAPS_SQL["default"])
+    latest = latest.format(where=_where(_prop_cond("property_id", property_id, params)))
+    return f"""
+    WITH LatestSnaps AS ({latest})
+    SELECT i.*, COALESCE(ls.current_stock, 0) as current_stock, ls.last_snap_date,
+           {AREA_COLS_SQL}
+    FROM items i
+    LEFT JOIN LatestSnaps ls ON i.id = ls.item_id
+    {AREA_JOIN_SQL}
+    {_where(_prop_cond("i.property_id", property_id, params))}
+    ORDER BY i.id
+    """, params
+
+@cached("items", "snapshots", "properties")
+def get_latest_stock_df(property_id=None):
+    df = read_df(*_latest_stock_sql(property_id), label="latest_stock")
+    return force_numeric(df, STOCK_NUMERIC_COLS)
+
+def _page(df, limit, cursor_cols):
+    # limit+1 건을 받아 다음 페이지 유무 판단 -> (현재 페이지, 다음 커서 or None)
+    if len(df) <= limit:
+        return df, None
+    df = df.iloc[:limit]
+    last = df.iloc[-1]
+    return df, tuple(str(last[c]) if c.endswith("date") else int(last[c]) for c in cursor_cols)
+
+@cached("items", "snapshots")
+def get_snapshot_page(after=None, limit=50, name=None, area=None, date_from=None, date_to=None, property_id=None):
+    # 재고 이력 키셋 페이지네이션: (snap_date, id) 내림차순, after = 이전 페이지 마지막 행의 (snap_date, id)
+    params = {"limit": limit + 1}
+    conds = _prop_cond("s.property_id", property_id, params)
+    if name:
+        conds.append("LOWER(i.name) LIKE :name")
+        params["name"] = f"%{name.lower()}%"
+    if area:
+        conds.append("i.target_area = :area")
+        params["area"] = area
+    if date_from:
+        conds.append("s.snap_date >= :dfrom")
+        params["dfrom"] = date_from
+    if date_to:
+        conds.append("s.snap_date <= :dto")
+        params["dto"] = date_to
+    if after:
+        conds.append("(s.snap_date, s.id) < (:a_date, :a_id)")
+        params["a_date"], params["a_id"] = after
+    sql = f"""
+    SELECT s.*, i.name 
+    FROM snapshots s 
+    LEFT JOIN items i ON s.item_id = i.id 
+    {_where(conds)}
+    ORDER BY s.snap_date DESC, s.id DESC LIMIT :limit
+    """
+    return _page(read_df(sql, params, label="snapshot_page"), limit, ["snap_date", "id"])
+
+@cached("items")
+def get_items_page(after=None, limit=50, name=None, area=None, property_id=None):
+    # 품목 마스터 키셋 페이지네이션 (id 오름차순)
+    params = {"limit": limit + 1}
+    conds = _prop_cond("property_id", property_id, params)
+    if name:
+        conds.append("LOWER(name) LIKE :name")
+        params["name"] = f"%{name.lower()}%"
+    if area:
+        conds.append("target_area = :area")
+        params["area"] = area
+    if after:
+        conds.append("id > :after")
+        params["after"] = after[0]
+    df = read_df(f"SELECT * FROM items {_where(conds)} ORDER BY id LIMIT :limit", params, label="items_page")
+    df = force_numeric(df, ["cs_total_units", "units_per_box", "boxes_per_cs", "safety_stock", "units_per_room"])
+    return _page(df, limit, ["id"])
+
+@cached("items", "snapshots")
+def get_snapshot_history():
+    sql = """
+    SELECT s.*, i.name 
+    FROM snapshots s 
+    LEFT JOIN items i ON s.item_id = i.id 
+    ORDER BY s.snap_date DESC, s.id DESC LIMIT 50
+    """
+    return read_df(sql, label="snapshot_history")
+
+@cached("items", "deliveries")
+def get_delivery_list():
+    sql = """
+    SELECT d.*, i.name as item 
+    FROM deliveries d 
+    LEFT JOIN items i ON d.item_id = i.id 
+    ORDER BY d.arrival_date, d.order_date
+    """
+    return read_df(sql, label="delivery_list")
+
+@cached("items", "deliveries")
+def get_deliveries_between(start, end, property_id=None):
+    # 캘린더: 보이는 기간 [start, end) 의 입고 예정만 (ix_deliveries_prop_arrival / ix_deliveries_arrival_item 사용)
+    params = {"start": start, "end": end}
+    conds = _prop_cond("d.property_id", property_id, params) + ["d.arrival_date >= :start AND d.arrival_date < :end"]
+    sql = f"""
+    SELECT d.*, i.name as item 
+    FROM deliveries d 
+    LEFT JOIN items i ON d.item_id = i.id 
+    {_where(conds)}
+    ORDER BY d.arrival_date, d.id
+    """
+    return read_df(sql, params, label="deliveries_between")
+
+@cached("items", "deliveries")
+def get_delivery_page(item_id=None, limit=50, offset=0, property_id=None):
+    params = {"iid": item_id, "limit": limit, "offset": offset}
+    conds = _prop_cond("d.property_id", property_id, params) + (["d.item_id = :iid"] if item_id is not None else [])
+    sql = f"""
+    SELECT d.*, i.name as item 
+    FROM deliveries d 
+    LEFT JOIN items i ON d.item_id = i.id 
+    {_where(conds)}
+    ORDER BY d.arrival_date, d.order_date, d.id
+    LIMIT :limit OFFSET :offset
+    """
+    return read_df(sql, params, label="delivery_page")
+
+@cached("items", "deliveries")
+def get_draft_deliveries(property_id=None):
+    params = {}
+    conds = _prop_cond("d.property_id", property_id, params) + ["d.status = 'draft'"]
+    sql = f"""
+    SELECT d.*, i.name as item, i.supplier, i.unit
+    FROM deliveries d 
+    LEFT JOIN items i ON d.item_id = i.id 
+    {_where(conds)}
+    ORDER BY d.po_ref, d.order_date, d.id
+    """
+    return read_df(sql, params, label="draft_deliveries")
+
+@cached("deliveries")
+def count_deliveries(item_id=None, property_id=None):
+    params = {"iid": item_id}
+    conds = _prop_cond("property_id", property_id, params) + (["item_id = :iid"] if item_id is not None else [])
+    df = read_df(f"SELECT COUNT(*) as cnt FROM deliveries {_where(conds)}", params, label="count_deliveries")
+    return int(pd.to_numeric(df["cnt"]).iloc[0])
+
+# 스냅샷 간 소비량(이전 - 현재) / 경과일수 를 DB 안에서 LAG() 로 계산 -> 품목당 1행만 반환
+USAGE_SQL = """
+WITH s AS (
+    SELECT id, item_id, CAST(snap_date AS DATE) AS d, COALESCE(total_units, 0) AS units
+    FROM snapshots
+    WHERE snap_date >= :cutoff{item_filter}
+), deltas AS (
+    SELECT item_id,
+           LAG(units) OVER w - units AS used,
+           d - LAG(d) OVER w AS gap
+    FROM s
+    WINDOW w AS (PARTITION BY item_id ORDER BY d, id)
+)
+SELECT item_id AS id, AVG(CAST(used AS DOUBLE PRECISION) / gap) AS daily_avg_usage, COUNT(*) AS usage_intervals
+FROM deltas
+WHERE gap > 0 AND used > 0
+GROUP BY item_id
+"""
+
+def _prop_filter(property_id, params):
+    # USAGE_SQL / FUTURE_DELIVERIES_SQL 의 {item_filter} 자리에 넣는 시설 조건
+    return "".join(" AND " + c for c in _prop_cond("property_id", property_id, params))
+
+def _usage_query(days, property_id=None):
+    # (sql, params, 후처리 함수) - 단독 조회와 번들 조회가 같이 사용
+    params = {"cutoff": (date.today() - timedelta(days=days)).isoformat()}
+    flt = _prop_filter(property_id, params)
+    if history_dialect() in IN_DB_AGG_DIALECTS:
+        return USAGE_SQL.format(item_filter=flt), params, lambda df: force_numeric(df, ["daily_avg_usage", "usage_intervals"])
+    # SQLite 등: 원본 행을 가져와 groupby().diff() 로 벡터 계산
+    sql = f"SELECT id, item_id, snap_date, total_units FROM snapshots WHERE snap_date >= :cutoff{flt} ORDER BY item_id, snap_date, id"
+    return sql, params, forecast_engine.daily_usage_from_snapshots
+
+# 입고 반영 추정 (usage_estimator) 입력: 기간 내 스냅샷 원본 + 입고 완료분 (확정, 입고일 <= 오늘)
+USAGE_SNAPS_SQL = "SELECT id, item_id, snap_date, total_units FROM snapshots WHERE snap_date >= :cutoff{item_filter} ORDER BY item_id, snap_date, id"
+RECEIVED_SQL = """
+    SELECT item_id, arrival_date, SUM(total_units) as units
+    FROM deliveries
+    WHERE arrival_date >= :cutoff AND arrival_date <= :today AND status = 'confirmed'{item_filter}
+    GROUP BY item_id, arrival_date
+"""
+
+def _usage_queries(days, property_id=None, estimator=None):
+    # ({이름: (sql, params)}, 후처리 함수(조회 결과 dict)) - estimator: usage_estimator.ESTIMATORS ("sql" = 기존 방식)
+    estimator = estimator or usage_estimator.DEFAULT_ESTIMATOR
+    if estimator == "sql":
+        sql, params, post = _usage_query(days, property_id)
+        return {"usage": (sql, params)}, lambda res: post(res["usage"])
+    params = {"cutoff": (date.today() - timedelta(days=days)).isoformat(), "today": date.today().isoformat()}
+    flt = _prop_filter(property_id, params)
+    queries = {"usage_snaps": (USAGE_SNAPS_SQL.format(item_filter=flt), params),
+               "usage_received": (RECEIVED_SQL.format(item_filter=flt), params)}
+    return queries, lambda res: usage_estimator.estimate_usage(res["usage_snaps"], res["usage_received"], estimator)
+
+@cached("snapshots", "deliveries")
+def get_usage_from_snapshots(days=60, property_id=None, estimator=None):
+    queries, post = _usage_queries(days, property_id, estimator)
+    return post(read_bundle(queries, label="usage", engine=get_analytics_engine()))
+
+def get_usage_from_snapshots_legacy(days=60):
+    # 기존 Python 루프 구현 (비교/검증용으로 유지)
+    cutoff = (date.today() - timedelta(days=days)).isoformat()
+    sql = "SELECT item_id, snap_date, total_units FROM snapshots WHERE snap_date >= :cutoff ORDER BY item_id, snap_date, id"
+    df = read_df(sql, {"cutoff": cutoff}, label="usage_legacy")
+    if df.empty: return pd.DataFrame(columns=["id", "daily_avg_usage"])
+    
+    df["total_units"] = pd.to_numeric(df["total_units"], errors='coerce').fillna(0)
+    df["snap_date"] = pd.to_datetime(df["snap_date"])
+    
+    records = []
+    for item_id, group in df.groupby("item_id"):
+        if len(group) < 2: continue
+        daily_usages = []
+        for i in range(1, len(group)):
+            prev, curr = group.iloc[i-1], group.iloc[i]
+            days_diff = (curr["snap_date"] - prev["snap_date"]).days
+            if days_diff <= 0: continue
+            usage = prev["total_units"] - curr["total_units"]
+            if usage <= 0: continue
+            daily_usages.append(usage / days_diff)
+        if daily_usages:
+            avg = sum(daily_usages) / len(daily_usages)
+            records.append({"id": item_id, "daily_avg_usage": avg})
+    return pd.DataFrame(records)
+
+# 입고 예정 합계 (확정분만, 초안 제외)
+FUTURE_DELIVERIES_SQL = """
+    SELECT item_id, SUM(total_units) as incoming_units 
+    FROM deliveries 
+    WHERE arrival_date > :today AND arrival_date <= :end AND status = 'confirmed'{item_filter}
+    GROUP BY item_id
+"""
+
+def _future_deliveries_query(horizon_days, property_id=None):
+    params = {"today": date.today().isoformat(), "end": (date.today() + timedelta(days=horizon_days)).isoformat()}
+    return FUTURE_DELIVERIES_SQL.format(item_filter=_prop_filter(property_id, params)), params
+
+# 입고일별 입고 예정 (예상 재고 / 결품일 계산용, 같은 인덱스 범위)
+FUTURE_ARRIVALS_SQL = """
+    SELECT item_id, arrival_date, SUM(total_units) as units
+    FROM deliveries
+    WHERE arrival_date > :today AND arrival_date <= :end AND status = 'confirmed'{item_filter}
+    GROUP BY item_id, arrival_date
+"""
+
+def _future_arrivals_query(horizon_days, property_id=None):
+    params = {"today": date.today().isoformat(), "end": (date.today() + timedelta(days=horizon_days)).isoformat()}
+    return FUTURE_ARRIVALS_SQL.format(item_filter=_prop_filter(property_id, params)), params
+
+# 품목별 리드타임 (입고일 - 발주일) 평균 / 표준편차 / 건수: 최근 LEAD_TIME_LOOKBACK_DAYS 일 확정 입고 기준
+# SQLite 에서 복사한 DuckDB 사본은 날짜가 TEXT 라서 DATE 로 바꾼 뒤 뺌
+LEAD_TIME_LOOKBACK_DAYS = 365
+LEAD_TIME_SQL = """
+    SELECT item_id, AVG(CAST(CAST(arrival_date AS DATE) - CAST(order_date AS DATE) AS DOUBLE PRECISION)) as lt_mean,
+           STDDEV_SAMP(CAST(CAST(arrival_date AS DATE) - CAST(order_date AS DATE) AS DOUBLE PRECISION)) as lt_std, COUNT(*) as lt_samples
+    FROM deliveries
+    WHERE order_date >= :since AND arrival_date >= order_date AND status = 'confirmed'{item_filter}
+    GROUP BY item_id
+"""
+
+def _lead_time_query(property_id=None):
+    # (sql, params, 후처리 함수): Postgres / DuckDB 는 DB 안에서 집계, 그 외는 원본 행을 groupby 로 벡터 계산
+    params = {"since": (date.today() - timedelta(days=LEAD_TIME_LOOKBACK_DAYS)).isoformat()}
+    flt = _prop_filter(property_id, params)
+    if history_dialect() in IN_DB_AGG_DIALECTS:
+        return LEAD_TIME_SQL.format(item_filter=flt), params, lambda df: force_numeric(df, forecast_engine.LEAD_TIME_COLS[1:])
+    sql = f"SELECT item_id, order_date, arrival_date FROM deliveries WHERE order_date >= :since AND status = 'confirmed'{flt}"
+    return sql, params, forecast_engine.lead_times_from_deliveries
+
+@cached("deliveries")
+def get_lead_times(property_id=None):
+    sql, params, post = _lead_time_query(property_id)
+    return post(read_bundle({"lead_times": (sql, params)}, label="lead_times", engine=get_analytics_engine())["lead_times"])
+
+@cached("deliveries")
+def get_future_deliveries(horizon_days, property_id=None):
+    df = read_df(*_future_deliveries_query(horizon_days, property_id), label="future_deliveries")
+    if not df.empty:
+        df["incoming_units"] = pd.to_numeric(df["incoming_units"], errors='coerce').fillna(0)
+    return df
+
+# 가동률 캘린더 입력: 구역 정의 / 기간 내 PMS 예측 / 요일 프로필
+def _occupancy_queries(horizon_days, property_id=None):
+    params = {"start": (date.today() + timedelta(days=1)).isoformat(),
+              "end": (date.today() + timedelta(days=horizon_days)).isoformat()}
+    cond = _prop_cond("property_id", property_id, params)
+    return {
+        "areas": (f"SELECT property_id, area, rooms, ref_occ FROM property_areas {_where(cond)} ORDER BY property_id, area", params),
+        "occ_forecast": (f"SELECT property_id, area, occ_date, occ FROM occupancy_forecast "
+                         f"{_where(cond + ['occ_date >= :start AND occ_date <= :end'])}", params),
+        "occ_profiles": (f"SELECT property_id, area, day_type, occ FROM occupancy_profiles {_where(cond)}", params),
+    }
+
+def _occupancy_calendar(res, horizon_days):
+    start = date.today()
+    holidays = jp_holidays.is_holiday(forecast_engine.horizon_dates(start, horizon_days))
+    return forecast_engine.occupancy_calendar(start, horizon_days, force_numeric(res["areas"], ["rooms", "ref_occ"]),
+                                              res["occ_forecast"], res["occ_profiles"], holidays)
+
+@cached("properties", "occupancy")
+def get_occupancy_calendar(horizon_days, property_id=None):
+    return _occupancy_calendar(read_bundle(_occupancy_queries(horizon_days, property_id), label="occupancy"), horizon_days)
+
+@cached("occupancy")
+def get_occupancy_profiles_df(property_id):
+    return read_df("SELECT area, day_type, occ FROM occupancy_profiles WHERE property_id = :pid ORDER BY area, day_type",
+                   {"pid": int(property_id)}, label="occupancy_profiles")
+
+def upsert_occupancy(records):
+    # records: property_id, occ_date, area, occ (같은 키는 덮어씀)
+    if records is None or len(records) == 0: return 0
+    rows = pd.DataFrame(records).astype(object).to_dict("records")
+    with _timed("upsert_occupancy") as info:
+        with transaction() as conn:
+            conn.execute(text("""
+                INSERT INTO occupancy_forecast (property_id, occ_date, area, occ) VALUES (:property_id, :occ_date, :area, :occ)
+                ON CONFLICT (property_id, occ_date, area) DO UPDATE SET occ = EXCLUDED.occ
+            """), rows)
+        info["rows"] = len(rows)
+    invalidate("occupancy")
+    return len(rows)
+
+def set_occupancy_profile(property_id, profile):
+    # profile: {(area, day_type): occ} - 시설의 프로필 전체를 교체 (None / NaN 은 미설정 = 기준 가동률)
+    rows = [{"pid": int(property_id), "area": a, "dt": int(d), "occ": float(v)}
+            for (a, d), v in profile.items() if v is not None and not pd.isna(v)]
+    with transaction() as conn:
+        conn.execute(text("DELETE FROM occupancy_profiles WHERE property_id = :pid"), {"pid": int(property_id)})
+        if rows:
+            conn.execute(text("INSERT INTO occupancy_profiles (property_id, area, day_type, occ) VALUES (:pid, :area, :dt, :occ)"), rows)
+    invalidate("occupancy")
+    return len(rows)
+
+# ==========================================
+# 3-1. 재고 상태 요약 (item_stock_state)
+# ==========================================
+STATE_USAGE_DAYS = 60    # 홈 화면 실적 산출 기간과 동일
+STATE_HORIZON_DAYS = 30  # 홈 화면 예측 기간과 동일
+STATE_COLS = ["item_id", "last_snap_units", "last_snap_date", "daily_avg_usage", "usage_intervals", "usage_std", "pending_units",
+              "refreshed_on"]
+
+def _read(conn, sql, params, item_ids=None, col="item_id"):
+    # item_ids 가 주어지면 해당 품목만 (IN 조건), None 이면 전체
+    sql = sql.format(item_filter=f" AND {col} IN :ids" if item_ids is not None else "")
+    stmt = text(sql)
+    if item_ids is not None:
+        stmt = stmt.bindparams(bindparam("ids", expanding=True))
+        params = {**params, "ids": [int(i) for i in item_ids]}
+    return read_df(stmt, params, conn=conn)
+
+def compute_stock_state(conn, item_ids=None):
+    today = date.today()
+    dialect = conn.dialect.name
+    items = _read(conn, "SELECT id AS item_id FROM items WHERE 1=1{item_filter}", {}, item_ids, col="id")
+
+    latest_sql = LATEST_SNAPS_SQL.get(dialect, LATEST_SNAPS_SQL["default"]).format(where="")
+    latest = _read(conn, f"SELECT * FROM ({latest_sql}) ls WHERE 1=1{{item_filter}}", {}, item_ids)
+
+    cutoff = (today - timedelta(days=STATE_USAGE_DAYS)).isoformat()
+    estimator = usage_estimator.DEFAULT_ESTIMATOR
+    if estimator == "sql" and dialect in IN_DB_AGG_DIALECTS:
+        usage = _read(conn, USAGE_SQL, {"cutoff": cutoff}, item_ids)
+    else:
+        snaps = _read(conn, USAGE_SNAPS_SQL, {"cutoff": cutoff}, item_ids)
+        received = _read(conn, RECEIVED_SQL, {"cutoff": cutoff, "today": today.isoformat()}, item_ids)
+        usage = usage_estimator.estimate_usage(snaps, received, estimator)
+
+    end = (today + timedelta(days=STATE_HORIZON_DAYS)).isoformat()
+    pending = _read(conn, FUTURE_DELIVERIES_SQL, {"today": today.isoformat(), "end": end}, item_ids)
+
+    state = (items
+             .merge(latest.rename(columns={"current_stock": "last_snap_units"}), on="item_id", how="left")
+             .merge(usage.rename(columns={"id": "item_id"}), on="item_id", how="left")
+             .merge(pending.rename(columns={"incoming_units": "pending_units"}), on="item_id", how="left"))
+    state = force_numeric(state, ["last_snap_units", "daily_avg_usage", "usage_intervals", "usage_std", "pending_units"])
+    state["refreshed_on"] = today
+    return state.reindex(columns=STATE_COLS)
+
+def refresh_stock_state(conn, item_ids=None):
+    # 쓰기 함수와 같은 트랜잭션(conn) 안에서 해당 품목의 요약 행을 다시 계산해 UPSERT
+    if item_ids is not None and len(item_ids) == 0: return 0
+    state = compute_stock_state(conn, item_ids)
+    if state.empty: return 0
+    for c in ["last_snap_units", "usage_intervals", "pending_units"]:
+        state[c] = state[c].astype(int)
+    records = state.astype(object).where(state.notna(), None).to_dict("records")
+    cols = ", ".join(STATE_COLS)
+    vals = ", ".join(f":{c}" for c in STATE_COLS)
+    upd = ", ".join(f"{c} = EXCLUDED.{c}" for c in STATE_COLS[1:])
+    conn.execute(text(f"INSERT INTO item_stock_state ({cols}) VALUES ({vals}) ON CONFLICT (item_id) DO UPDATE SET {upd}"), records)
+    return len(records)
+
+def rebuild_stock_state():
+    # 전체 백필 (초기 도입 / 날짜가 바뀌어 기간 집계가 밀렸을 때)
+    with transaction() as conn:
+        conn.execute(text("DELETE FROM item_stock_state"))
+        n = refresh_stock_state(conn)
+    invalidate("item_stock_state")
+    return n
+
+def check_stock_state():
+    # 요약 테이블과 원본 이력에서 새로 계산한 값이 다른 품목만 반환
+    with get_engine().connect() as conn:
+        stored = read_df("SELECT * FROM item_stock_state", conn=conn, label="stock_state")
+        fresh = compute_stock_state(conn)
+    cmp = fresh.merge(stored, on="item_id", how="outer", suffixes=("", "_stored"), indicator=True)
+    bad = cmp["_merge"] != "both"
+    for c in ["last_snap_units", "daily_avg_usage", "usage_intervals", "usage_std", "pending_units"]:
+        bad |= (pd.to_numeric(cmp[c], errors="coerce").fillna(0) - pd.to_numeric(cmp[f"{c}_stored"], errors="coerce").fillna(0)).abs() > 1e-6
+    bad |= cmp["last_snap_date"].astype(str) != cmp["last_snap_date_stored"].astype(str)
+    return cmp[bad].drop(columns="_merge")
+
+# 홈 화면용: 품목 마스터 + 요약 테이블 (이력 스캔 없이 O(품목수))
+STOCK_STATE_SQL = f"""
+    SELECT i.*, st.last_snap_units as current_stock, st.last_snap_date,
+           st.daily_avg_usage, st.usage_std, st.pending_units as incoming_units, st.refreshed_on,
+           {AREA_COLS_SQL}
+    FROM items i
+    LEFT JOIN item_stock_state st ON st.item_id = i.id
+    {AREA_JOIN_SQL}
+    {{where}}
+    ORDER BY i.id
+"""
+
+def _stock_state_query(property_id=None):
+    params = {}
+    return STOCK_STATE_SQL.format(where=_where(_prop_cond("i.property_id", property_id, params))), params
+
+def _fresh_stock_state(df, property_id=None):
+    # 날짜가 바뀌어 기간 집계가 밀렸으면 재구축 후 다시 읽음
+    if df is not None and not df.empty:
+        refreshed = pd.to_datetime(df["refreshed_on"])
+        if (refreshed.isna() | (refreshed < pd.Timestamp(date.today()))).any():
+            rebuild_stock_state()
+            df = read_df(*_stock_state_query(property_id), label="stock_state")
+    return force_numeric(df, STOCK_NUMERIC_COLS + ["daily_avg_usage", "usage_std", "incoming_units"])
+
+@cached("items", "item_stock_state", "properties")
+def get_stock_state_df(property_id=None):
+    return _fresh_stock_state(read_df(*_stock_state_query(property_id), label="stock_state"), property_id)
+
+# ==========================================
+# 3-2. 재고 이벤트 원장 (ledger.py): 조정 입력 / 월말 압축 / 과거 시점 재현
+# ==========================================
+def _property_item_ids(conn, property_id):
+    if property_id is None: return None
+    return conn.execute(text("SELECT id FROM items WHERE property_id = :pid"), {"pid": property_id}).scalars().all()
+
+def add_adjustment(iid, date, qty, note=None):
+    # 파손 / 폐기 / 사내 사용 등 조사 외 증감 (qty 는 부호 포함, 다음 조사까지의 장부 재고와 소비 계산에 반영)
+    with transaction() as conn:
+        _lock_items(conn, [iid])
+        n = ledger.record_adjustment(conn, iid, date, qty, note)
+    invalidate("inventory_events")
+    return n
+
+def compact_ledger(through=None):
+    # 월 1회 (manage.py compact-ledger): 지난달 말까지를 체크포인트로 접음
+    # 접을 이벤트가 있는 품목만 잠그고 (소급 입력이 체크포인트를 지우는 쓰기와 겹치지 않도록) 잠근 뒤 다시 읽어 그 품목만 접음
+    # 품목 목록을 읽은 뒤에야 접을 이벤트가 생긴 품목은 다음 실행에서
+    with _timed("compact_ledger") as info:
+        with transaction() as conn:
+            _advisory_xact_lock(conn, COMPACT_LOCK_KEY)
+            ids = ledger.pending_items(conn, through)
+            _lock_items(conn, ids)
+            info["rows"] = ledger.compact(conn, through, ids)
+    return info["rows"]
+
+def get_stock_at(as_of, property_id=None):
+    # 과거 시점 재현: 품목별 마지막 조사 수량 / 장부 재고 (조사 + 이후 입고 / 조정)
+    with _timed("stock_at") as info:
+        with get_engine().connect() as conn:
+            state = ledger.replay(conn, as_of, _property_item_ids(conn, property_id))
+            params = {}
+            items = read_df(f"SELECT id AS item_id, name, unit FROM items {_where(_prop_cond('property_id', property_id, params))} ORDER BY id",
+                            params, conn=conn, label="items")
+        info["rows"] = len(state)
+    return items.merge(state, on="item_id", how="left")
+
+def get_ledger_usage(days=60, property_id=None, as_of=None):
+    # 체크포인트 기준 구간 일평균 사용량 (두 시점 상태의 누적 소비 차, 일수 가중)
+    end = as_of or date.today()
+    with get_engine().connect() as conn:
+        return ledger.usage_between(conn, end - timedelta(days=days), end, _property_item_ids(conn, property_id))
+
+# ==========================================
+# 3-3. 추이 차트 (rollups.py): 사전 집계 갱신 / 기간 조회
+# ==========================================
+_rollup_lock = threading.Lock()
+
+def refresh_rollups(full=False, wait=False):
+    # 백그라운드 주기 작업 / 원장 쓰기 직후 + manage.py refresh-rollups. 이 프로세스나 다른 프로세스에서 이미 도는 중이면 건너뜀 (-> None)
+    # wait=True (manage.py): 다른 프로세스의 갱신이 끝날 때까지 기다린 뒤 실행
+    # 품목은 잠그지 않음 (쓰기를 막지 않도록): 시작 시점까지의 이벤트만 반영, 그 뒤의 쓰기는 다음 갱신에서 (rollups.refresh)
+    if not _rollup_lock.acquire(blocking=wait): return None
+    rows = None
+    try:
+        with _timed("refresh_rollups") as info:
+            with transaction() as conn:
+                if _advisory_xact_lock(conn, ROLLUP_LOCK_KEY, wait=wait):
+                    rows = info["rows"] = rollups.refresh(conn, full=full)
+    finally:
+        _rollup_lock.release()
+    if rows:
+        invalidate("rollups")
+    return rows
+
+@cached("rollups")
+def get_rollups_built_through():
+    # 집계가 반영된 마지막 날짜 (한 번도 만들지 않았으면 None)
+    v = read_df("SELECT MAX(built_through) AS d FROM rollup_state", label="rollup_state")["d"].iloc[0]
+    return None if v is None or pd.isna(v) else pd.Timestamp(v).date()
+
+@cached("rollups", "items")
+def get_item_trend(item_id, start, end, max_points=rollups.MAX_POINTS):
+    # -> (bucket / stock / usage / arrivals / counted, "day" | "week")
+    with _timed("item_trend") as info:
+        with get_engine().connect() as conn:
+            df, grain = rollups.item_trend(conn, item_id, start, end, max_points)
+        info["rows"] = len(df)
+    return df, grain
+
+@cached("rollups", "items")
+def get_area_trend(area, start, end, property_id=None, max_points=rollups.MAX_POINTS):
+    # 구역 합계 (품목 단위가 섞임 -> 추세 비교용). property_id None = 전체 시설 합계
+    with _timed("area_trend") as info:
+        with get_engine().connect() as conn:
+            df, grain = rollups.area_trend(conn, area, start, end, property_id, max_points)
+        info["rows"] = len(df)
+    return df, grain
+
+# ==========================================
+# 3-4. 화면별 입력 일괄 조회 (커넥션 1회 체크아웃)
+# ==========================================
+@cached("items", "deliveries", "item_stock_state", "properties", "occupancy")
+def get_home_bundle(property_id=None):
+    params = {}
+    conds = _prop_cond("property_id", property_id, params) + ["status = 'confirmed'"]
+    lt_sql, lt_params, lt_post = _lead_time_query(property_id)
+    res = read_history_bundle({
+        "stock": _stock_state_query(property_id),
+        "deliveries": (f"SELECT COUNT(*) as cnt FROM deliveries {_where(conds)}", params),
+        "arrivals": _future_arrivals_query(STATE_HORIZON_DAYS, property_id),
+        **_occupancy_queries(STATE_HORIZON_DAYS, property_id),
+    }, {"lead_times": (lt_sql, lt_params)}, label="home")
+    return {
+        "stock": _fresh_stock_state(res["stock"], property_id),
+        "arrivals": force_numeric(res["arrivals"], ["units"]),
+        "lead_times": lt_post(res["lead_times"]),
+        "occ_calendar": _occupancy_calendar(res, STATE_HORIZON_DAYS),
+        "delivery_count": int(pd.to_numeric(res["deliveries"]["cnt"]).iloc[0]),
+    }
+
+@cached("items", "snapshots", "deliveries", "properties", "occupancy")
+def get_forecast_bundle(days, horizon_days, property_id=None, estimator=None):
+    usage_queries, usage_post = _usage_queries(days, property_id, estimator)
+    lt_sql, lt_params, lt_post = _lead_time_query(property_id)
+    res = read_history_bundle({
+        "stock": _latest_stock_sql(property_id),
+        "incoming": _future_deliveries_query(horizon_days, property_id),
+        "arrivals": _future_arrivals_query(horizon_days, property_id),
+        **_occupancy_queries(horizon_days, property_id),
+    }, {**usage_queries, "lead_times": (lt_sql, lt_params)}, label="forecast")
+    incoming = res["incoming"]
+    if not incoming.empty:
+        incoming["incoming_units"] = pd.to_numeric(incoming["incoming_units"], errors='coerce').fillna(0)
+    return {
+        "stock": force_numeric(res["stock"], STOCK_NUMERIC_COLS),
+        "usage": usage_post(res),
+        "incoming": incoming,
+        "arrivals": force_numeric(res["arrivals"], ["units"]),
+        "lead_times": lt_post(res["lead_times"]),
+        "occ_calendar": _occupancy_calendar(res, horizon_days),
+    }
+
@@ -0,0 +1,98 @@
+# 발주 계획 HTTP API (표준 라이브러리만 사용)
+#   python manage.py serve-api --port 8502
+#   GET /health
+#   GET /plan?days=14&horizon=7&occ_ALL=0.9&occ_STD=0.93&occ_HAK=0.7[&property=1]   # 즉시 계산 (생략 시 전체 시설)
+#       occ_* 를 생략하면 가동률 캘린더 (PMS 예측 / 요일 프로필) 로 계산
+#       &estimator=weighted|ewma|mad|sql 로 실적 사용량 추정 방식 선택
+#   GET /plan/latest[?horizon=7][&days=14][&property=1]                            # 배치 작업이 저장한 최신 계획 (시설별)
+#   GET /properties
+#   GET /metrics                                                                    # Prometheus text (요청 / 쿼리 / 계산 단계별 시간)
+# Streamlit 측은 INVENTORY_FORECAST_API_URL=http://host:8502 로 이 서버를 사용
+import json
+import logging
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import db
+import forecast_service
+import metrics
+import usage_estimator
+
+logger = logging.getLogger("inventory.api")
+
+
+def _int(query, key, default, lo=1, hi=365):
+    try:
+        return min(max(int(query[key][0]), lo), hi)
+    except (KeyError, ValueError):
+        return default
+
+
+def parse_occupancy(query):
+    # occ_ALL=0.9 -> {"ALL": 0.9} ; 0~1 범위 밖은 % 로 간주
+    occ = {}
+    for key, vals in query.items():
+        if key.startswith("occ_"):
+            val = float(vals[0])
+            occ[key[4:].upper()] = val / 100.0 if val > 1 else val
+    return occ or None
+
+
+class PlanHandler(BaseHTTPRequestHandler):
+    server_version = "InventoryForecast/1.0"
+
+    def _send(self, status, body, content_type="application/json; charset=utf-8"):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        try:
+            if url.path == "/metrics":
+                self._send(200, metrics.prometheus(), "text/plain; version=0.0.4; charset=utf-8")
+            else:
+                with metrics.trace(f"api{url.path}"):
+                    self._route(url, query)
+        except ValueError as e:
+            self._send(400, json.dumps({"error": str(e)}))
+        except Exception as e:
+            logger.exception("request failed: %s", self.path)
+            self._send(500, json.dumps({"error": type(e).__name__}))
+
+    def _route(self, url, query):
+        if url.path == "/health":
+            self._send(200, json.dumps({"status": "ok"}))
+        elif url.path == "/plan":
+            estimator = query.get("estimator", [None])[0]
+            if estimator is not None and estimator not in usage_estimator.ESTIMATORS:
+                raise ValueError(f"estimator must be one of {usage_estimator.ESTIMATORS}")
+            plan = forecast_service.run_plan(_int(query, "days", 14), _int(query, "horizon", 7), parse_occupancy(query),
+                                             _int(query, "property", None, hi=2**31), estimator)
+            self._send(200, forecast_service.plan_to_json(plan))
+        elif url.path == "/plan/latest":
+            plan = forecast_service.get_latest_plan(_int(query, "horizon", None), _int(query, "property", None, hi=2**31),
+                                                    _int(query, "days", None))
+            self._send(200, forecast_service.plan_to_json(plan))
+        elif url.path == "/properties":
+            self._send(200, forecast_service.plan_to_json(db.get_property_areas_df()))
+        else:
+            self._send(404, json.dumps({"error": "not found"}))
+
+    def log_message(self, fmt, *args):
+        logger.info("%s %s", self.address_string(), fmt % args)
+
+
+def serve(host="127.0.0.1", port=8502):
+    httpd = ThreadingHTTPServer((host, port), PlanHandler)
+    logger.info("forecast API listening on http://%s:%s", host, port)
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
@@ -0,0 +1,456 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+import metrics
+
+# ==========================================
+# 예측 엔진 (컬럼 단위 벡터 연산)
+# page_home / page_forecast_general 공용
+# ==========================================
+
+# 구역별 객실 수
+AREA_ROOMS = {"ALL": 238, "STD": 225, "HAK": 13}
+# 구역별 기준 가동률 (실적 사용량이 측정된 평소 가동률)
+AREA_REF_OCC = {"ALL": 0.90, "STD": 0.93, "HAK": 0.70}
+DEFAULT_AREA = "ALL"
+
+NUMERIC_COLS = ["current_stock", "safety_stock", "cs_total_units", "units_per_box", "boxes_per_cs", "units_per_room"]
+
+
+def area_codes(areas, table=AREA_ROOMS, default=DEFAULT_AREA):
+    # 테이블에 없는 구역(None 포함)은 ALL 로 취급 (기존 row-wise 로직과 동일)
+    s = pd.Series(areas)
+    s = s.where(s.isin(list(table)), default)
+    return pd.factorize(s)
+
+
+def area_lookup(codes, table):
+    # factorize 결과 (codes, uniques) 로 구역별 값 배열을 만든다 (행 단위 dict 조회 없음)
+    idx, uniques = codes
+    return np.array([table[u] for u in uniques], dtype=float)[idx] if len(idx) else np.zeros(0)
+
+
+def _num(df, col):
+    if col not in df.columns:
+        return np.zeros(len(df))
+    return pd.to_numeric(df[col], errors="coerce").fillna(0).to_numpy(dtype=float)
+
+
+def merge_inputs(stock_df, usage_df=None, incoming_df=None):
+    # usage_df / incoming_df 가 None 이면 stock_df 에 이미 있는 컬럼을 그대로 사용
+    merged = stock_df.copy()
+    if usage_df is not None and not usage_df.empty:
+        # usage_std (구간 일 사용량 표준편차) 가 있으면 발주점 안전재고에 사용
+        cols = ["id", "daily_avg_usage"] + (["usage_std"] if "usage_std" in usage_df.columns else [])
+        merged = merged.drop(columns=[c for c in cols[1:] if c in merged.columns]).merge(usage_df[cols], on="id", how="left")
+    elif usage_df is not None or "daily_avg_usage" not in merged.columns:
+        merged["daily_avg_usage"] = 0.0
+    merged["daily_avg_usage"] = pd.to_numeric(merged["daily_avg_usage"], errors="coerce").fillna(0)
+
+    if incoming_df is not None and not incoming_df.empty:
+        inc = incoming_df[["item_id", "incoming_units"]].rename(columns={"item_id": "id"})
+        merged = merged.merge(inc, on="id", how="left")
+    elif incoming_df is not None or "incoming_units" not in merged.columns:
+        merged["incoming_units"] = 0.0
+    merged["incoming_units"] = pd.to_numeric(merged["incoming_units"], errors="coerce").fillna(0)
+    return merged
+
+
+PROFILE_HOLIDAY = 7  # occupancy_profiles.day_type: 0=月 .. 6=日, 7=祝日
+
+
+def horizon_dates(start, horizon):
+    # 예측 대상일: start 다음날부터 horizon 일 (입고 예정 조회 기간과 동일)
+    return pd.date_range(pd.Timestamp(start) + pd.Timedelta(days=1), periods=horizon, freq="D")
+
+
+@metrics.timed("compute", "forecast.occupancy_calendar")
+def occupancy_calendar(start, horizon, areas, forecast=None, profiles=None, holidays=None):
+    # (시설, 구역) x 날짜 가동률 행렬. 우선순위: PMS 예측(forecast) > 요일/祝日 프로필 > 기준 가동률(ref_occ)
+    # areas: property_id, area, ref_occ / forecast: property_id, area, occ_date, occ / profiles: property_id, area, day_type, occ
+    dates = horizon_dates(start, horizon)
+    index = pd.MultiIndex.from_arrays([areas["property_id"].astype(int), areas["area"]], names=["property_id", "area"])
+    mat = np.repeat(pd.to_numeric(areas["ref_occ"], errors="coerce").fillna(0).to_numpy(float)[:, None], len(dates), axis=1)
+
+    if profiles is not None and not profiles.empty:
+        prof = (profiles.assign(property_id=profiles["property_id"].astype(int), day_type=profiles["day_type"].astype(int))
+                .pivot_table(index=["property_id", "area"], columns="day_type", values="occ", aggfunc="last")
+                .reindex(index=index, columns=range(PROFILE_HOLIDAY + 1)).to_numpy(float))
+        by_day = prof[:, dates.weekday]
+        if holidays is not None:
+            hol = np.asarray(holidays, dtype=bool)
+            # 祝日 프로필이 없으면 그 요일 값 사용
+            by_day = np.where(hol[None, :] & ~np.isnan(prof[:, [PROFILE_HOLIDAY]]), prof[:, [PROFILE_HOLIDAY]], by_day)
+        mat = np.where(np.isnan(by_day), mat, by_day)
+
+    if forecast is not None and not forecast.empty:
+        fc = (forecast.assign(property_id=forecast["property_id"].astype(int), occ_date=pd.to_datetime(forecast["occ_date"]))
+              .pivot_table(index=["property_id", "area"], columns="occ_date", values="occ", aggfunc="last")
+              .reindex(index=index, columns=dates).to_numpy(float))
+        mat = np.where(np.isnan(fc), mat, fc)
+    return pd.DataFrame(mat, index=index, columns=dates)
+
+
+def calendar_rows(calendar, property_ids, keys, fallback, horizon):
+    # 품목별 (시설, 구역) 행을 골라 품목 x 날짜 행렬로. 달력에 없는 품목은 fallback(일정 가동률)
+    n = len(keys)
+    if property_ids is None:
+        property_ids = np.zeros(n, dtype=int)
+    idx = calendar.index.get_indexer(pd.MultiIndex.from_arrays([np.asarray(property_ids, dtype=int), np.asarray(keys, dtype=object)]))
+    mat = calendar.to_numpy(float)[:, :horizon]
+    out = mat[np.maximum(idx, 0)] if len(mat) else np.zeros((n, horizon))
+    missing = idx < 0
+    out[missing] = np.asarray(fallback, dtype=float)[missing, None]
+    return out
+
+
+def daily_usage_matrix(actual, upr, room_cnt, ref, occ_daily):
+    # 품목 x 날짜 일 사용량: 실적이 있으면 실적 x (그날 가동률 / 기준 가동률), 없으면 객실 수 x 가동률 x 1실당 사용수
+    actual, upr, room_cnt, ref = (np.asarray(a, dtype=float)[:, None] for a in (actual, upr, room_cnt, ref))
+    factor = np.divide(occ_daily, ref, out=np.ones_like(occ_daily), where=ref > 0)
+    simulated = actual * factor
+    theory = np.where(upr > 0, room_cnt * occ_daily * upr, 0.0)
+    return np.where(simulated > 0, simulated, theory)
+
+
+def arrivals_matrix(item_ids, arrivals, start, horizon):
+    # arrivals: item_id, arrival_date, units (입고 예정) -> 품목 x 날짜 입고 수량 (기간 밖 / 모르는 품목은 버림)
+    out = np.zeros((len(item_ids), horizon))
+    if arrivals is None or arrivals.empty or horizon <= 0:
+        return out
+    row = pd.Index(np.asarray(item_ids)).get_indexer(arrivals["item_id"].to_numpy())
+    day = (pd.to_datetime(arrivals["arrival_date"]) - pd.Timestamp(start)).dt.days.to_numpy() - 1
+    ok = (row >= 0) & (day >= 0) & (day < horizon)
+    np.add.at(out, (row[ok], day[ok]), pd.to_numeric(arrivals["units"], errors="coerce").fillna(0).to_numpy(float)[ok])
+    return out
+
+
+def balance_path(current_stock, daily_usage, arrivals):
+    # 품목 x 날짜 예상 재고 (그날 입고 / 사용 반영 후)
+    return np.asarray(current_stock, dtype=float)[:, None] + np.cumsum(arrivals - daily_usage, axis=1)
+
+
+def project_on_hand(current_stock, daily_usage, arrivals, start, safety=None, lead_days=None):
+    # 예상 재고 = 현재 재고 - 누적 사용량 + 누적 입고 (입고는 그날 아침 반영)
+    # -> 최초 결품일 / 기간 중 최저 재고 / 결품까지 일수 (결품이 없으면 기간 일수)
+    # safety / lead_days (품목별 안전재고 / 리드타임) 가 주어지면 발주 기한도 계산:
+    #   예상 재고가 안전재고 밑으로 내려가는 날 아침까지 도착하려면 그날 - 리드타임 에 발주 (지난 날짜면 이미 늦음)
+    horizon = daily_usage.shape[1]
+    stock = np.asarray(current_stock, dtype=float)
+    balance = balance_path(stock, daily_usage, arrivals)
+    out = pd.DataFrame(index=range(len(balance)))
+    if horizon == 0:
+        out["stockout_date"], out["min_balance"], out["days_of_cover"] = pd.NaT, stock, 0
+        if safety is not None:
+            out["order_by_date"] = pd.NaT
+        return out
+    short = balance < 0
+    has = short.any(axis=1)
+    first = short.argmax(axis=1)
+    dates = horizon_dates(start, horizon)
+    out["stockout_date"] = pd.Series(dates[first]).where(has).dt.date
+    out["min_balance"] = balance.min(axis=1)
+    out["days_of_cover"] = np.where(has, first, horizon)
+    if safety is not None:
+        safety = np.asarray(safety, dtype=float)
+        low = balance < safety[:, None]
+        # 오늘 이미 안전재고 미만이면 0일째 (오늘 아침) 기준
+        day = np.where(stock < safety, 0, low.argmax(axis=1) + 1)
+        hit = (stock < safety) | low.any(axis=1)
+        lead = np.ceil(np.asarray(lead_days, dtype=float)).astype(np.int64)
+        order_by = pd.Timestamp(start) + pd.to_timedelta(day - lead, unit="D")
+        out["order_by_date"] = pd.Series(order_by).where(hit).dt.date
+    return out
+
+
+# 리드타임 (발주일 -> 입고일): 이력이 LEAD_TIME_MIN_SAMPLES 건 미만인 품목은 전체 품목 풀링 값,
+# 이력이 전혀 없으면 LEAD_TIME_DEFAULT_DAYS 사용. SERVICE_Z: 안전재고 서비스 수준 (1.65 = 95%)
+LEAD_TIME_DEFAULT_DAYS = 7
+LEAD_TIME_MIN_SAMPLES = 3
+SERVICE_Z = 1.65
+LEAD_TIME_COLS = ["item_id", "lt_mean", "lt_std", "lt_samples"]
+
+
+def lead_times_from_deliveries(deliveries):
+    # deliveries: item_id, order_date, arrival_date -> 품목별 리드타임 평균 / 표준편차 / 건수 (SQL 집계가 없는 DB 용)
+    if deliveries is None or deliveries.empty:
+        return pd.DataFrame(columns=LEAD_TIME_COLS)
+    lt = (pd.to_datetime(deliveries["arrival_date"]) - pd.to_datetime(deliveries["order_date"])).dt.days
+    ok = lt.notna() & (lt >= 0)
+    stats = lt[ok].astype(float).groupby(deliveries.loc[ok, "item_id"]).agg(["mean", "std", "count"])
+    stats.columns = LEAD_TIME_COLS[1:]
+    stats["lt_std"] = stats["lt_std"].fillna(0)  # 1건이면 0 (DB 쪽 force_numeric 과 동일)
+    return stats.rename_axis("item_id").reset_index()
+
+
+def lead_time_arrays(item_ids, lead_times, default_days=LEAD_TIME_DEFAULT_DAYS, min_samples=LEAD_TIME_MIN_SAMPLES):
+    # 품목 순서대로 (리드타임 평균, 표준편차) 배열
+    n = len(item_ids)
+    if lead_times is None or lead_times.empty:
+        return np.full(n, float(default_days)), np.zeros(n)
+    lt = lead_times.assign(**{c: pd.to_numeric(lead_times[c], errors="coerce") for c in LEAD_TIME_COLS[1:]})
+    cnt = lt["lt_samples"].fillna(0).to_numpy(float)
+    mean = lt["lt_mean"].to_numpy(float)
+    var = lt["lt_std"].fillna(0).to_numpy(float) ** 2
+    # 풀링 값: 건수 가중 평균 / 분산 (표본 2건 이상만)
+    pooled_mean = np.average(mean, weights=cnt) if cnt.sum() > 0 else float(default_days)
+    w = np.clip(cnt - 1, 0, None)
+    pooled_std = float(np.sqrt(np.average(var, weights=w))) if w.sum() > 0 else 0.0
+
+    row = pd.Index(lt["item_id"].to_numpy()).get_indexer(np.asarray(item_ids))
+    own = (row >= 0) & (cnt[row] >= min_samples)
+    return (np.where(own, mean[row], pooled_mean),
+            np.where(own, np.sqrt(var[row]), pooled_std))
+
+
+def reorder_point(daily_mean, daily_std, lt_mean, lt_std, safety_stock, z=SERVICE_Z):
+    # 발주점 = 리드타임 중 수요 + 안전재고
+    # 안전재고 = max(품목 마스터 안전재고, z * sqrt(L * σd^2 + d^2 * σL^2))
+    d, sd, lt, slt = (np.asarray(a, dtype=float) for a in (daily_mean, daily_std, lt_mean, lt_std))
+    sigma = np.sqrt(lt * sd ** 2 + d ** 2 * slt ** 2)
+    safety = np.maximum(np.asarray(safety_stock, dtype=float), z * sigma)
+    return d * lt + safety, safety
+
+
+def compute_forecast(stock_df, usage_df, incoming_df, horizon, occ=None, rooms=None, ref_occ=None, occ_calendar=None,
+                     arrivals=None, start=None, lead_times=None, paths=False):
+    # occ: {"ALL": 0.9, "STD": 0.93, "HAK": 0.7} 형태. 생략 시 기준 가동률 사용
+    # rooms / ref_occ: 구역별 객실 수 / 기준 가동률 (생략 시 AREA_ROOMS / AREA_REF_OCC)
+    # stock_df 에 area_key / area_rooms / area_ref_occ (시설별 구역 정의) 가 있으면 행 단위로 그 값을 우선 사용
+    # occ_calendar: occupancy_calendar() 결과. 주어지면 일정 가동률(occ) 대신 날짜별 가동률로 일 단위 적산
+    # arrivals: 입고 예정 (item_id, arrival_date, units). 주어지면 날짜별 예상 재고로 결품일 / 최저 재고 / 커버 일수 계산
+    # lead_times: 품목별 리드타임 통계 (LEAD_TIME_COLS). 주어지면 발주점 / 발주 기한 (order_by_date) 계산
+    # paths: True 면 날짜별 예상 재고 배열을 balance_path 컬럼에 (추이 차트용, 품목 수가 적을 때만)
+    clock = metrics.Stopwatch("compute", "forecast")
+    rooms = rooms or AREA_ROOMS
+    ref_occ = ref_occ or AREA_REF_OCC
+    merged = merge_inputs(stock_df, usage_df, incoming_df)
+    clock.lap("merge", len(merged))
+    area = merged["target_area"] if "target_area" in merged.columns else pd.Series(DEFAULT_AREA, index=merged.index)
+
+    codes = area_codes(area, rooms)
+    key = codes[1].to_numpy(dtype=object)[codes[0]] if len(merged) else np.array([], dtype=object)
+    room_cnt = area_lookup(codes, rooms)
+    ref = area_lookup(codes, ref_occ)
+    if "area_rooms" in merged.columns:
+        has = merged["area_rooms"].notna().to_numpy()
+        key = np.where(has, merged["area_key"].to_numpy(dtype=object), key)
+        room_cnt = np.where(has, _num(merged, "area_rooms"), room_cnt)
+        ref = np.where(has, _num(merged, "area_ref_occ"), ref)
+    # 목표 가동률: occ 에 지정된 구역만 덮어씀
+    target = pd.Series(key, dtype=object).map(occ or {}).astype(float).fillna(pd.Series(ref)).to_numpy()
+    upr = _num(merged, "units_per_room")
+    actual = merged["daily_avg_usage"].to_numpy(dtype=float)
+
+    if occ_calendar is not None:
+        # 날짜별 가동률 (품목 x 날짜 행렬) 로 일 사용량을 구해 기간 합계
+        pids = merged["property_id"].to_numpy() if "property_id" in merged.columns else None
+        occ_daily = calendar_rows(occ_calendar, pids, key, target, horizon)
+        daily = daily_usage_matrix(actual, upr, room_cnt, ref, occ_daily)
+        mean_occ = occ_daily.mean(axis=1) if horizon > 0 else target
+        simulated = actual * np.divide(mean_occ, ref, out=np.ones_like(mean_occ), where=ref > 0)
+        theory = np.where(upr > 0, room_cnt * mean_occ * upr, 0.0)
+        forecast = daily.sum(axis=1)
+        final = forecast / horizon if horizon > 0 else np.where(simulated > 0, simulated, theory)
+    else:
+        # 실적 사용량을 목표 가동률 / 기준 가동률 비율로 보정
+        factor = np.divide(target, ref, out=np.ones_like(target), where=ref > 0)
+        simulated = actual * factor
+        # 가동률 기반 이론 사용량
+        theory = np.where(upr > 0, room_cnt * target * upr, 0.0)
+        # [하이브리드] 실적이 있으면 실적, 없으면 이론
+        final = np.where(simulated > 0, simulated, theory)
+        forecast = final * horizon
+        daily = None
+    clock.lap("usage")
+
+    safety = lead = None
+    if lead_times is not None:
+        lead, lead_std = lead_time_arrays(merged["id"], lead_times)
+        rop, safety = reorder_point(final, _num(merged, "usage_std"), lead, lead_std, _num(merged, "safety_stock"))
+        merged["lead_time_days"] = lead
+        merged["lead_time_std"] = lead_std
+        merged["reorder_point"] = rop
+        clock.lap("lead_time")
+
+    if arrivals is not None or lead_times is not None or paths:
+        start = start or date.today()
+        if daily is None:
+            daily = np.repeat(final[:, None], horizon, axis=1)
+        arr = arrivals_matrix(merged["id"], arrivals, start, horizon)
+        proj = project_on_hand(_num(merged, "current_stock"), daily, arr, start, safety, lead)
+        for col in proj.columns:
+            merged[col] = proj[col].to_numpy()
+        if paths:
+            merged["balance_path"] = list(balance_path(_num(merged, "current_stock"), daily, arr))
+        clock.lap("projection")
+
+    merged["simulated_usage"] = simulated
+    merged["theory_daily_usage"] = theory
+    merged["final_daily_usage"] = final
+    merged["forecast"] = forecast
+    merged["order_units"] = np.clip(
+        merged["forecast"].to_numpy() + _num(merged, "safety_stock")
+        - _num(merged, "current_stock") - merged["incoming_units"].to_numpy(),
+        0, None,
+    )
+    merged["order_display"] = format_order_display(
+        merged["order_units"], _num(merged, "cs_total_units"), merged.get("unit")
+    )
+    # 실제 발주 수량: 온전한 CS + 箱 으로 올림 (최소 발주 수량 반영). 1箱入数가 없으면 1CS入数 / 1CS箱数
+    cs, upb, bpc = _num(merged, "cs_total_units"), _num(merged, "units_per_box"), _num(merged, "boxes_per_cs")
+    box = np.where(upb > 0, upb, np.divide(cs, bpc, out=np.zeros_like(cs), where=bpc > 0))
+    qc, qb, total = round_order_packs(merged["order_units"], cs, box, _num(merged, "min_order_cs"))
+    merged["order_qty_cs"], merged["order_qty_box"], merged["order_total_units"] = qc, qb, total
+    merged["order_pack_display"] = format_pack_display(qc, qb, total, merged.get("unit"))
+    clock.lap("order_packs")
+    return merged
+
+
+PLAN_COLS = ["property_id", "item_id", "name", "target_area", "unit", "supplier", "current_stock", "final_daily_usage", "incoming_units",
+             "forecast", "safety_stock", "order_units", "order_cs", "order_display",
+             "order_qty_cs", "order_qty_box", "order_total_units", "order_pack_display",
+             "stockout_date", "min_balance", "days_of_cover", "lead_time_days", "reorder_point", "order_by_date"]
+
+
+def build_order_plan(stock_df, usage_df, incoming_df, occupancy=None, horizon=7, rooms=None, ref_occ=None, arrivals=None,
+                     lead_times=None):
+    # UI 와 무관한 순수 함수: (재고, 실적 사용량, 입고 예정, 가동률) -> 발주 계획
+    # occupancy: 구역별 일정 가동률 dict 또는 occupancy_calendar() 의 날짜별 가동률 DataFrame
+    # arrivals: 입고일별 입고 예정 (있으면 결품 예측 컬럼 포함) / lead_times: 리드타임 통계 (있으면 발주점 / 발주 기한 포함)
+    # 배치 작업 / HTTP API / Streamlit 화면이 모두 이 함수를 사용
+    if isinstance(occupancy, pd.DataFrame):
+        merged = compute_forecast(stock_df, usage_df, incoming_df, horizon, None, rooms, ref_occ, occ_calendar=occupancy, arrivals=arrivals,
+                                  lead_times=lead_times)
+    else:
+        merged = compute_forecast(stock_df, usage_df, incoming_df, horizon, occupancy, rooms, ref_occ, arrivals=arrivals,
+                                  lead_times=lead_times)
+    cs = _num(merged, "cs_total_units")
+    merged["order_cs"] = np.where(cs > 0, merged["order_units"].to_numpy() / np.where(cs > 0, cs, 1.0), np.nan)
+    plan = merged.rename(columns={"id": "item_id"}).reindex(columns=PLAN_COLS)
+    return plan.sort_values("order_units", ascending=False, kind="stable").reset_index(drop=True)
+
+
+def round_order_packs(units, cs_size, box_size, moq=None):
+    # 필요 수량 -> 발주 가능한 포장 단위 (qty_cs, qty_box, total_units 정수 배열)
+    # - CS / 箱 둘 다 있으면 온전한 CS + 나머지 箱 올림 (箱 합계가 1CS 이상이면 1CS 로)
+    # - CS 만 있으면 CS 올림 / 箱 만 있으면 箱 올림 / 둘 다 없으면 단위 올림
+    # - moq: 최소 발주 CS 수 (CS 가 없는 품목은 箱 수, 둘 다 없으면 단위 수). 필요 수량이 0 이면 0
+    eps = 1e-9
+    units = np.clip(np.asarray(units, dtype=float), 0, None)
+    cs, box = np.asarray(cs_size, dtype=float), np.asarray(box_size, dtype=float)
+    moq = np.zeros(len(units)) if moq is None else np.asarray(moq, dtype=float)
+    has_cs, has_box = cs > 0, box > 0
+    cs1, box1 = np.where(has_cs, cs, 1.0), np.where(has_box, box, 1.0)
+
+    qc = np.where(has_cs, np.where(has_box, np.floor(units / cs1 + eps), np.ceil(units / cs1 - eps)), 0.0)
+    qb = np.where(has_box, np.ceil((units - qc * np.where(has_cs, cs, 0.0)) / box1 - eps), 0.0)
+    full = has_cs & has_box & (qb * box >= cs)
+    qc, qb = np.where(full, qc + 1, qc), np.where(full, 0.0, qb)
+
+    # 최소 발주 수량
+    under_cs = has_cs & (qc * cs + qb * box < moq * cs)
+    qc, qb = np.where(under_cs, moq, qc), np.where(under_cs, 0.0, qb)
+    qb = np.where(~has_cs & has_box, np.maximum(qb, moq), qb)
+    total = np.where(has_cs | has_box, qc * cs + qb * box, np.maximum(np.ceil(units - eps), moq))
+
+    need = units > eps
+    return (np.where(need, qc, 0).astype(np.int64), np.where(need, qb, 0).astype(np.int64),
+            np.where(need, np.ceil(total - eps), 0).astype(np.int64))
+
+
+def format_pack_display(qty_cs, qty_box, total_units, unit_name=None):
+    # 발주 수량 -> "3 CS + 2 箱" / "3 CS" / "2 箱" / "35 本" / "-"
+    qc, qb, total = (np.asarray(a, dtype=np.int64) for a in (qty_cs, qty_box, total_units))
+    if unit_name is None:
+        unit_name = pd.Series("", index=range(len(qc)))
+    unit_name = pd.Series(unit_name).fillna("").astype(str).to_numpy().astype(str)
+    cs_txt = np.char.add(qc.astype(str), " CS")
+    box_txt = np.char.add(qb.astype(str), " 箱")
+    out = np.where((qc > 0) & (qb > 0), np.char.add(np.char.add(cs_txt, " + "), box_txt),
+                   np.where(qc > 0, cs_txt, np.where(qb > 0, box_txt, np.char.add(np.char.add(total.astype(str), " "), unit_name))))
+    return np.where(total > 0, out, "-").astype(object)
+
+
+DRAFT_NOTE = "自動下書き"
+DRAFT_COLS = ["item_id", "order_date", "arrival_date", "qty_cs", "qty_box", "total_units", "note", "po_ref"]
+
+
+@metrics.timed("compute", "forecast.draft_deliveries")
+def draft_deliveries(plan, start=None, window_days=7, consolidate=True):
+    # 발주 기한이 start + window_days 안에 드는 품목 -> 발주 초안 (deliveries 행 형태, 수량은 plan 의 포장 단위 발주 수량)
+    # 발주일 = max(발주 기한, 오늘), 입고 예정일 = 발주일 + 리드타임 (올림)
+    # consolidate: 같은 시설 / 같은 仕入先 품목은 가장 이른 발주일에 한 장의 발주서 (po_ref) 로 묶음
+    start = start or date.today()
+    if plan is None or plan.empty or "order_by_date" not in plan.columns:
+        return pd.DataFrame(columns=DRAFT_COLS)
+    by = pd.to_datetime(plan["order_by_date"])
+    due = by.notna() & (by <= pd.Timestamp(start) + pd.Timedelta(days=window_days)) & (_num(plan, "order_total_units") > 0)
+    p = plan[due].reset_index(drop=True)
+    order_date = pd.to_datetime(p["order_by_date"]).clip(lower=pd.Timestamp(start))
+    supplier = p["supplier"].fillna("").astype(str).str.strip() if "supplier" in p.columns else pd.Series("", index=p.index)
+    pid = p["property_id"].fillna(0).astype(int).astype(str) if "property_id" in p.columns else pd.Series("0", index=p.index)
+    grouped = supplier != ""
+    if consolidate:
+        order_date = order_date.where(~grouped, order_date.groupby([pid, supplier]).transform("min"))
+    arrival = order_date + pd.to_timedelta(np.ceil(_num(p, "lead_time_days")), unit="D")
+    # 발주서 번호: PO<발주일>-<시설>-<仕入先> (仕入先 미등록 품목은 품목 ID 로 단독 발주)
+    po_ref = "PO" + order_date.dt.strftime("%Y%m%d") + "-" + pid + "-" + supplier.where(grouped, "ITEM" + p["item_id"].astype(int).astype(str))
+    return pd.DataFrame({
+        "item_id": p["item_id"].astype(int).to_numpy(),
+        "order_date": order_date.dt.date.to_numpy(),
+        "arrival_date": arrival.dt.date.to_numpy(),
+        "qty_cs": _num(p, "order_qty_cs").astype(np.int64),
+        "qty_box": _num(p, "order_qty_box").astype(np.int64),
+        "total_units": _num(p, "order_total_units").astype(np.int64),
+        "note": DRAFT_NOTE,
+        "po_ref": po_ref.to_numpy(),
+    }, columns=DRAFT_COLS)
+
+
+def format_order_display(units, cs_size, unit_name=None):
+    # 필요 수량 -> "x.x CS" / "n 単位" / "-" 문자열 (한 번의 포맷 패스)
+    units = np.asarray(units, dtype=float)
+    cs_size = np.asarray(cs_size, dtype=float)
+    if unit_name is None:
+        unit_name = pd.Series("", index=range(len(units)))
+    unit_name = pd.Series(unit_name).fillna("").astype(str).to_numpy()
+
+    cs_txt = np.char.add(np.char.mod("%.1f", units / np.where(cs_size > 0, cs_size, 1.0)), " CS")
+    unit_txt = np.char.add(np.char.add(units.astype(np.int64).astype(str), " "), unit_name.astype(str))
+    out = np.where(cs_size > 0, cs_txt, unit_txt)
+    out = np.where(units > 0, out, "-")
+    return out.astype(object)
+
+
+@metrics.timed("compute", "to_display")
+def to_display(df, columns, round_cols=(), int_cols=()):
+    # 표시용 컬럼 선택 + 이름 변경 + 숫자 다듬기
+    out = df[list(columns)].rename(columns=columns)
+    for c in round_cols:
+        out[c] = pd.to_numeric(out[c], errors="coerce").fillna(0).round(1)
+    for c in int_cols:
+        out[c] = pd.to_numeric(out[c], errors="coerce").fillna(0).astype(np.int64)
+    return out
+
+
+def daily_usage_from_snapshots(snaps):
+    # snaps: item_id, snap_date, total_units (item_id, snap_date 순 정렬)
+    # 연속 스냅샷 간 (이전 - 현재) / 경과일수 중 양수만 평균 -> id, daily_avg_usage
+    if snaps is None or snaps.empty:
+        return pd.DataFrame(columns=["id", "daily_avg_usage", "usage_intervals"])
+    d = snaps.assign(
+        snap_date=pd.to_datetime(snaps["snap_date"]),
+        total_units=pd.to_numeric(snaps["total_units"], errors="coerce").fillna(0),
+    ).sort_values(["item_id", "snap_date"], kind="stable")
+
+    g = d.groupby("item_id", sort=False)
+    used = -g["total_units"].diff()
+    gap = g["snap_date"].diff().dt.days
+    valid = (gap > 0) & (used > 0)
+
+    rate = (used[valid] / gap[valid]).groupby(d.loc[valid, "item_id"]).agg(["mean", "count"])
+    rate.columns = ["daily_avg_usage", "usage_intervals"]
+    return rate.rename_axis("id").reset_index()
@@ -0,0 +1,155 @@
+import json
+import os
+import urllib.parse
+import urllib.request
+from datetime import date
+
+import pandas as pd
+from sqlalchemy import bindparam, text
+
+import db
+import forecast_engine
+from cache import cached, invalidate
+
+# ==========================================
+# 발주 계획 서비스 (Streamlit 없이 사용 가능)
+# ==========================================
+# - run_plan: DB 에서 입력을 읽어 forecast_engine.build_order_plan 실행
+# - save_plan / write_parquet: 배치 작업 결과 저장 (manage.py plan)
+# - create_drafts: 발주 기한이 가까운 품목의 발주 초안을 仕入先별 발주서로 묶어 deliveries 에 저장 (manage.py drafts)
+# - purchase_order_csv: 발주 초안 -> 발주서 CSV (발주서 번호 / 仕入先 순)
+# - get_plan: INVENTORY_FORECAST_API_URL 이 있으면 HTTP API(forecast_api.py) 에서 받아오고,
+#   없으면 같은 프로세스에서 계산 -> Streamlit 은 여러 클라이언트 중 하나
+API_URL = os.environ.get("INVENTORY_FORECAST_API_URL")
+API_TIMEOUT = float(os.environ.get("INVENTORY_FORECAST_API_TIMEOUT", "30"))
+
+PLAN_SAVE_COLS = ["property_id", "item_id", "current_stock", "final_daily_usage", "incoming_units", "forecast", "order_units", "order_cs",
+                  "order_qty_cs", "order_qty_box", "order_total_units",
+                  "stockout_date", "min_balance", "days_of_cover", "lead_time_days", "reorder_point", "order_by_date"]
+PO_CSV_COLS = {"po_ref": "po_ref", "supplier": "supplier", "order_date": "order_date", "arrival_date": "arrival_date",
+               "item_id": "item_id", "item": "item", "qty_cs": "qty_cs", "qty_box": "qty_box", "total_units": "total_units", "unit": "unit"}
+DATE_COLS = ["stockout_date", "order_by_date"]
+DRAFT_WINDOW_DAYS = 7  # 발주 기한이 오늘부터 이 일수 안이면 초안 작성
+
+
+def run_plan(days=14, horizon=7, occupancy=None, property_id=None, estimator=None):
+    # property_id=None -> 전체 시설 (시설별 구역 정의로 한 번에 계산)
+    # occupancy=None -> 가동률 캘린더 (PMS 예측 > 요일/祝日 프로필 > 기준 가동률), dict 이면 구역별 일정 가동률
+    # estimator: 실적 사용량 추정 방식 (usage_estimator.ESTIMATORS, None = 기본값)
+    bundle = db.get_forecast_bundle(days, horizon, property_id, estimator)
+    occ = bundle["occ_calendar"] if occupancy is None else occupancy
+    return forecast_engine.build_order_plan(bundle["stock"], bundle["usage"], bundle["incoming"], occ, horizon,
+                                            arrivals=bundle["arrivals"], lead_times=bundle["lead_times"])
+
+
+def create_drafts(days=14, horizon=30, property_id=None, window_days=DRAFT_WINDOW_DAYS, consolidate=True):
+    # 발주 기한 (order_by_date) 이 window_days 안인 품목 -> deliveries 에 status='draft' 로 저장 (기존 초안은 교체)
+    # 수량은 포장 단위 (CS + 箱, 최소 발주 수량) 로 올린 값, consolidate=True 면 仕入先별로 발주일을 맞춰 한 장의 발주서로
+    plan = run_plan(days, horizon, None, property_id)
+    drafts = forecast_engine.draft_deliveries(plan, window_days=window_days, consolidate=consolidate)
+    return db.replace_draft_deliveries(drafts)
+
+
+def purchase_order_csv(drafts):
+    # db.get_draft_deliveries() 형태 -> 발주서 CSV 문자열 (Excel 에서 열 수 있도록 BOM 포함)
+    out = drafts.reindex(columns=list(PO_CSV_COLS)).rename(columns=PO_CSV_COLS)
+    out = out.sort_values(["po_ref", "item"], kind="stable")
+    return "\ufeff" + out.to_csv(index=False)
+
+
+def save_plan(plan, days, horizon, plan_date=None):
+    # 같은 날짜 / 조건 / 시설의 계획은 덮어씀
+    plan_date = plan_date or date.today()
+    rows = plan.reindex(columns=PLAN_SAVE_COLS).astype(object)
+    rows = rows.where(rows.notna(), None).assign(plan_date=plan_date, usage_days=days, horizon_days=horizon).to_dict("records")
+    if not rows:
+        return 0
+    pids = sorted({int(r["property_id"]) for r in rows})
+    with db.transaction() as conn:
+        conn.execute(text("""
+            DELETE FROM order_plans
+            WHERE plan_date = :d AND usage_days = :days AND horizon_days = :h AND property_id IN :pids
+        """).bindparams(bindparam("pids", expanding=True)), {"d": plan_date, "days": days, "h": horizon, "pids": pids})
+        conn.execute(text("""
+            INSERT INTO order_plans (plan_date, usage_days, horizon_days, property_id, item_id, current_stock,
+                                     final_daily_usage, incoming_units, forecast, order_units, order_cs,
+                                     order_qty_cs, order_qty_box, order_total_units,
+                                     stockout_date, min_balance, days_of_cover, lead_time_days, reorder_point, order_by_date)
+            VALUES (:plan_date, :usage_days, :horizon_days, :property_id, :item_id, :current_stock,
+                    :final_daily_usage, :incoming_units, :forecast, :order_units, :order_cs,
+                    :order_qty_cs, :order_qty_box, :order_total_units,
+                    :stockout_date, :min_balance, :days_of_cover, :lead_time_days, :reorder_point, :order_by_date)
+        """), rows)
+    invalidate("order_plans")
+    return len(rows)
+
+
+def write_parquet(plan, path):
+    # pyarrow / fastparquet 필요 (requirements 에는 넣지 않음)
+    try:
+        plan.to_parquet(path, index=False)
+    except ImportError as e:
+        raise RuntimeError("Parquet 出力には pyarrow が必要です (pip install pyarrow)") from e
+    return len(plan)
+
+
+@cached("items", "order_plans")
+def get_latest_plan(horizon=None, property_id=None, usage_days=None):
+    # 시설마다 조건 (예측 일수 / 실적 기간) 에 맞는 가장 최근 실행 1건의 계획 (품목당 1행). None 인 조건은 걸지 않음
+    # 실행 = (계획일, 실적 기간, 예측 일수). 같은 계획일에 조건이 다른 실행이 여러 개면 나중에 저장한 것 (save_plan 은 지우고 다시 넣음)
+    # (:h IS NULL OR ...) 형태는 psycopg3 서버 측 바인딩에서 타입을 정할 수 없으므로 조건을 있는 것만 조립
+    conds, params = [], {}
+    for col, key, value in [("horizon_days", "h", horizon), ("usage_days", "days", usage_days), ("property_id", "pid", property_id)]:
+        if value is not None:
+            conds.append(f"p.{col} = :{key}")
+            params[key] = int(value)
+    where = ("WHERE " + " AND ".join(conds)) if conds else ""
+    sql = f"""
+        SELECT p.property_id, p.item_id, i.name, i.target_area, i.unit, i.supplier, p.current_stock, p.final_daily_usage, p.incoming_units,
+               p.forecast, i.safety_stock, p.order_units, p.order_cs, i.cs_total_units,
+               p.order_qty_cs, p.order_qty_box, p.order_total_units, p.stockout_date, p.min_balance,
+               p.days_of_cover, p.lead_time_days, p.reorder_point, p.order_by_date, p.plan_date, p.usage_days, p.horizon_days
+        FROM order_plans p
+        JOIN (
+            SELECT p.property_id, p.plan_date, p.usage_days, p.horizon_days,
+                   ROW_NUMBER() OVER (PARTITION BY p.property_id ORDER BY p.plan_date DESC, p.id DESC) AS rn
+            FROM order_plans p {where}
+        ) latest ON latest.rn = 1 AND latest.property_id = p.property_id AND latest.plan_date = p.plan_date
+                AND latest.usage_days = p.usage_days AND latest.horizon_days = p.horizon_days
+        JOIN items i ON i.id = p.item_id
+        ORDER BY p.order_units DESC, p.item_id
+    """
+    df = db.read_df(sql, params, label="latest_plan")
+    if df.empty:
+        return df
+    df["order_display"] = forecast_engine.format_order_display(
+        pd.to_numeric(df["order_units"], errors="coerce").fillna(0).to_numpy(),
+        pd.to_numeric(df["cs_total_units"], errors="coerce").fillna(0).to_numpy(), df["unit"])
+    qty = db.force_numeric(df, ["order_qty_cs", "order_qty_box", "order_total_units"])
+    df["order_pack_display"] = forecast_engine.format_pack_display(qty["order_qty_cs"], qty["order_qty_box"], qty["order_total_units"], df["unit"])
+    return df.drop(columns=["cs_total_units"])
+
+
+def plan_to_json(plan):
+    return plan.to_json(orient="records", date_format="iso", force_ascii=False)
+
+
+def fetch_plan(api_url, days=14, horizon=7, occupancy=None, property_id=None, estimator=None):
+    query = {"days": days, "horizon": horizon, **{f"occ_{k}": v for k, v in (occupancy or {}).items()}}
+    if property_id is not None:
+        query["property"] = property_id
+    if estimator:
+        query["estimator"] = estimator
+    url = api_url.rstrip("/") + "/plan?" + urllib.parse.urlencode(query)
+    with urllib.request.urlopen(url, timeout=API_TIMEOUT) as resp:
+        records = json.loads(resp.read().decode("utf-8"))
+    plan = pd.DataFrame.from_records(records, columns=forecast_engine.PLAN_COLS)
+    for col in DATE_COLS:
+        plan[col] = pd.to_datetime(plan[col]).dt.date
+    return plan
+
+
+def get_plan(days=14, horizon=7, occupancy=None, property_id=None, estimator=None):
+    if API_URL:
+        return fetch_plan(API_URL, days, horizon, occupancy, property_id, estimator)
+    return run_plan(days, horizon, occupancy, property_id, estimator)
@@ -0,0 +1,30 @@
+import numpy as np
+import pandas as pd
+
+# ==========================================
+# 일본 공휴일 데이터 (캘린더 표시 + 가동률 프로필의 祝日 구분)
+# ==========================================
+JAPAN_HOLIDAYS = {
+    "2025-01-01": "元日", "2025-01-13": "成人の日", "2025-02-11": "建国記念の日",
+    "2025-02-23": "天皇誕生日", "2025-02-24": "振替休日", "2025-03-20": "春分の日",
+    "2025-04-29": "昭和の日", "2025-05-03": "憲法記念日", "2025-05-04": "みどりの日",
+    "2025-05-05": "こどもの日", "2025-05-06": "振替休日", "2025-07-21": "海の日",
+    "2025-08-11": "山の日", "2025-09-15": "敬老の日", "2025-09-23": "秋分の日",
+    "2025-10-13": "スポーツの日", "2025-11-03": "文化の日", "2025-11-23": "勤労感謝の日",
+    "2025-11-24": "振替休日",
+    "2026-01-01": "元日", "2026-01-12": "成人の日", "2026-02-11": "建国記念の日",
+    "2026-02-23": "天皇誕生日", "2026-03-20": "春分の日", "2026-04-29": "昭和の日",
+    "2026-05-03": "憲法記念日", "2026-05-04": "みどりの日", "2026-05-05": "こどもの日",
+    "2026-05-06": "振替休日", "2026-07-20": "海の日", "2026-08-11": "山の日",
+    "2026-09-21": "敬老の日", "2026-09-22": "国民の休日", "2026-09-23": "秋分の日",
+    "2026-10-12": "スポーツの日", "2026-11-03": "文化の日", "2026-11-23": "勤労感謝の日",
+}
+
+
+def holiday_name(dt):
+    return JAPAN_HOLIDAYS.get(dt.isoformat(), None)
+
+
+def is_holiday(dates):
+    # DatetimeIndex / 날짜 배열 -> bool 배열
+    return np.asarray(pd.DatetimeIndex(dates).strftime("%Y-%m-%d").isin(list(JAPAN_HOLIDAYS)))
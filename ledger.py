@@ -0,0 +1,277 @@
+import calendar
+from datetime import date, timedelta
+
+import pandas as pd
+from sqlalchemy import bindparam, text
+
+# ==========================================
+# 재고 이벤트 원장 (inventory_events, 추가만 함) + 월말 체크포인트 (inventory_checkpoints)
+# ==========================================
+# - 이벤트 종류: count (재고 조사, qty = 센 수량) / receipt (확정 입고, 입고일 기준) / adjust (파손 / 폐기 등 증감, qty 부호 포함)
+#               void (삭제 표시: 같은 ref 의 이전 이벤트를 무효화)
+# - 같은 ref (원본 테이블 + id) 에서는 마지막 이벤트만 유효 (다시 센 값 / 삭제). 원본 행을 지워도 원장에는 남음
+# - 상태 = 마지막 조사 수량 + 그 뒤 입고 / 조정 (장부 재고) + 누적 입고 / 조정 / 소비 / 일수 (구간 사용량은 두 시점의 차)
+#   소비는 usage_estimator.consumption_intervals 와 같은 정의 (직전 수량 + 구간 입고 - 이번 수량, 같은 날은 입고가 먼저)
+# - 체크포인트: 품목별 월말 상태. 과거 시점 재현 = 그 시점 이전 마지막 체크포인트 + 이후 이벤트 (최대 1개월분)
+# - 체크포인트보다 이전 날짜의 이벤트가 들어오면 (소급 입력 / 삭제) 그 날짜 이후 체크포인트는 지움 -> 다음 compact 에서 다시 만듦
+KINDS = ("count", "receipt", "adjust", "void")
+EPOCH = "1900-01-01"
+STATE_COLS = ["last_count_date", "last_count_units", "since_receipts", "since_adjust", "cum_receipts", "cum_adjust",
+              "cum_consumed", "cum_days", "intervals", "last_event_id"]
+
+# ref 별 최신 이벤트만 (NOT EXISTS 는 ix_events_ref 로 확인)
+EFFECTIVE_SQL = """
+    NOT EXISTS (SELECT 1 FROM inventory_events l WHERE l.ref_table = e.ref_table AND l.ref_id = e.ref_id AND l.id > e.id)
+"""
+LAST_CHECKPOINT_SQL = """
+    SELECT item_id, MAX(checkpoint_date) AS checkpoint_date FROM inventory_checkpoints
+    WHERE checkpoint_date <= :as_of{item_filter} GROUP BY item_id
+"""
+CHECKPOINT_SQL = f"""
+    SELECT c.* FROM inventory_checkpoints c
+    JOIN ({LAST_CHECKPOINT_SQL}) m ON m.item_id = c.item_id AND m.checkpoint_date = c.checkpoint_date
+"""
+# 품목에서 시작해 (item_id, 체크포인트 이후 날짜) 범위만 읽음 (ix_events_item_date)
+# CROSS JOIN: SQLite 가 통계 없이 원장 전체를 먼저 훑지 않도록 조인 순서 고정 (Postgres 는 일반 조인과 같음)
+TAIL_SQL = f"""
+    SELECT e.id, e.item_id, e.event_date, e.kind, e.qty FROM items i
+    LEFT JOIN ({LAST_CHECKPOINT_SQL}) m ON m.item_id = i.id
+    CROSS JOIN inventory_events e
+    WHERE e.item_id = i.id AND e.event_date > COALESCE(m.checkpoint_date, :epoch) AND e.event_date <= :as_of
+      AND e.kind <> 'void'{{i_item_filter}} AND {EFFECTIVE_SQL}
+"""
+# 체크포인트 없이 품목의 유효 이벤트 전체 (추이 집계용, rollups.py)
+EVENTS_SQL = f"""
+    SELECT e.id, e.item_id, e.event_date, e.kind, e.qty FROM inventory_events e
+    WHERE e.kind <> 'void' AND e.event_date <= :as_of{{item_filter}} AND {EFFECTIVE_SQL}
+"""
+
+# 원본 행 -> 이벤트. 유효한 값이 이미 같으면 추가하지 않음 (같은 제출의 재전송 / 값이 안 바뀐 UPSERT)
+SAME_AS_LATEST_SQL = """
+    EXISTS (SELECT 1 FROM inventory_events e WHERE e.ref_table = '{table}' AND e.ref_id = {src}.id
+            AND e.kind = '{kind}' AND e.qty = {src}.total_units AND {effective})
+"""
+COUNT_EVENTS_SQL = f"""
+    INSERT INTO inventory_events (item_id, event_date, kind, qty, ref_table, ref_id, note)
+    SELECT s.item_id, s.snap_date, 'count', s.total_units, 'snapshots', s.id, s.note FROM snapshots s
+    WHERE s.id IN :ids
+      AND NOT {SAME_AS_LATEST_SQL.format(table="snapshots", src="s", kind="count", effective=EFFECTIVE_SQL)}
+"""
+RECEIPT_EVENTS_SQL = f"""
+    INSERT INTO inventory_events (item_id, event_date, kind, qty, ref_table, ref_id, note)
+    SELECT d.item_id, d.arrival_date, 'receipt', d.total_units, 'deliveries', d.id, d.note FROM deliveries d
+    WHERE d.id IN :ids AND d.status = 'confirmed' AND d.arrival_date IS NOT NULL
+      AND NOT {SAME_AS_LATEST_SQL.format(table="deliveries", src="d", kind="receipt", effective=EFFECTIVE_SQL)}
+"""
+VOID_EVENTS_SQL = f"""
+    INSERT INTO inventory_events (item_id, event_date, kind, qty, ref_table, ref_id, note)
+    SELECT e.item_id, e.event_date, 'void', 0, e.ref_table, e.ref_id, NULL FROM inventory_events e
+    WHERE e.ref_table = :table AND e.ref_id IN :ids AND e.kind <> 'void' AND {EFFECTIVE_SQL}
+"""
+# 이번 트랜잭션에서 추가한 이벤트 (id > mark) 보다 늦은 체크포인트 삭제
+INVALIDATE_SQL = """
+    DELETE FROM inventory_checkpoints WHERE EXISTS (
+        SELECT 1 FROM inventory_events e
+        WHERE e.id > :mark AND e.item_id = inventory_checkpoints.item_id AND e.event_date <= inventory_checkpoints.checkpoint_date)
+"""
+
+
+def _expanding(sql, *names):
+    return text(sql).bindparams(*[bindparam(n, expanding=True) for n in names])
+
+
+def _append(conn, stmt, params):
+    # 이벤트 추가 + 영향받는 체크포인트 무효화 (쓰기 함수의 트랜잭션 안에서 호출) -> 추가한 이벤트 수
+    mark = conn.execute(text("SELECT COALESCE(MAX(id), 0) FROM inventory_events")).scalar()
+    conn.execute(stmt, params)
+    n = conn.execute(text("SELECT COUNT(*) FROM inventory_events WHERE id > :mark"), {"mark": mark}).scalar()
+    if n:
+        conn.execute(text(INVALIDATE_SQL), {"mark": mark})
+    return n
+
+
+def record_counts(conn, snapshot_ids):
+    # 방금 쓴 (UPSERT RETURNING) snapshots 행 -> 조사 이벤트 1문
+    if not snapshot_ids: return 0
+    return _append(conn, _expanding(COUNT_EVENTS_SQL, "ids"), {"ids": [int(i) for i in snapshot_ids]})
+
+
+def record_receipts(conn, delivery_ids):
+    # 확정된 입고 예정만 (초안은 확정 시점에 기록)
+    if not delivery_ids: return 0
+    return _append(conn, _expanding(RECEIPT_EVENTS_SQL, "ids"), {"ids": [int(i) for i in delivery_ids]})
+
+
+def record_voids(conn, table, ids):
+    # 원본 행 삭제 -> 그 행의 유효 이벤트마다 삭제 표시
+    if not ids: return 0
+    return _append(conn, _expanding(VOID_EVENTS_SQL, "ids"), {"table": table, "ids": [int(i) for i in ids]})
+
+
+def record_adjustment(conn, item_id, event_date, qty, note=None):
+    return _append(conn, text("""
+        INSERT INTO inventory_events (item_id, event_date, kind, qty, note) VALUES (:iid, :dt, 'adjust', :qty, :note)
+    """), {"iid": int(item_id), "dt": event_date, "qty": int(qty), "note": note})
+
+
+def seed(conn, after_item_id=None):
+    # 원장 도입 시 1회: 기존 snapshots / 확정 deliveries 를 이벤트로 옮김 (이벤트가 하나라도 있으면 건너뜀)
+    # after_item_id: 그 id 보다 뒤의 품목 (방금 일괄로 넣은 이력, synthetic_data.write_db) 만 옮김
+    if after_item_id is None and conn.execute(text("SELECT 1 FROM inventory_events LIMIT 1")).first():
+        return 0
+    params = {"after": after_item_id or 0}
+    n = conn.execute(text("""
+        INSERT INTO inventory_events (item_id, event_date, kind, qty, ref_table, ref_id, note)
+        SELECT item_id, snap_date, 'count', total_units, 'snapshots', id, note FROM snapshots
+        WHERE snap_date IS NOT NULL AND item_id IN (SELECT id FROM items) AND item_id > :after ORDER BY id
+    """), params).rowcount
+    n += conn.execute(text("""
+        INSERT INTO inventory_events (item_id, event_date, kind, qty, ref_table, ref_id, note)
+        SELECT item_id, arrival_date, 'receipt', total_units, 'deliveries', id, note FROM deliveries
+        WHERE status = 'confirmed' AND arrival_date IS NOT NULL AND item_id IN (SELECT id FROM items) AND item_id > :after
+        ORDER BY id
+    """), params).rowcount
+    return n
+
+
+# ==========================================
+# 상태 계산 (fold)
+# ==========================================
+def _to_date(v):
+    return v if isinstance(v, date) or v is None else pd.Timestamp(v).date()
+
+
+def _empty_state():
+    return {"last_count_date": None, "last_count_units": 0, "since_receipts": 0, "since_adjust": 0, "cum_receipts": 0,
+            "cum_adjust": 0, "cum_consumed": 0.0, "cum_days": 0, "intervals": 0, "last_event_id": 0}
+
+
+def apply(state, kind, day, qty, event_id=0):
+    # 이벤트 1건을 상태에 반영 (같은 날짜 안에서는 receipt / adjust 를 count 보다 먼저 넣을 것)
+    if kind == "receipt":
+        state["since_receipts"] += qty
+        state["cum_receipts"] += qty
+    elif kind == "adjust":
+        state["since_adjust"] += qty
+        state["cum_adjust"] += qty
+    elif kind == "count":
+        prev = state["last_count_date"]
+        if prev is not None and day > prev:
+            state["cum_consumed"] += state["last_count_units"] + state["since_receipts"] + state["since_adjust"] - qty
+            state["cum_days"] += (day - prev).days
+            state["intervals"] += 1
+        state.update(last_count_date=day, last_count_units=qty, since_receipts=0, since_adjust=0)
+    state["last_event_id"] = max(state["last_event_id"], event_id)
+    return state
+
+
+def _ordered(events):
+    # 날짜 순 / 같은 날은 입고 -> 조사, 같은 날 여러 번 센 경우 마지막 값만 (db.LATEST_SNAPS_SQL 과 같음)
+    ev = events.assign(event_date=pd.to_datetime(events["event_date"]).dt.date,
+                       qty=pd.to_numeric(events["qty"], errors="coerce").fillna(0).astype(int))
+    counts = ev[ev["kind"] == "count"].sort_values("id").drop_duplicates(["item_id", "event_date"], keep="last")
+    ev = pd.concat([ev[ev["kind"] != "count"], counts])
+    ev["rank"] = (ev["kind"] == "count").astype(int)
+    return ev.sort_values(["item_id", "event_date", "rank", "id"])
+
+
+def _state_from_row(row):
+    state = _empty_state()
+    if row is not None:
+        state.update({c: row[c] for c in STATE_COLS})
+        state["last_count_date"] = _to_date(state["last_count_date"])
+        for c in ["last_count_units", "since_receipts", "since_adjust", "cum_receipts", "cum_adjust", "cum_days", "intervals",
+                  "last_event_id"]:
+            state[c] = int(state[c] or 0)
+        state["cum_consumed"] = float(state["cum_consumed"] or 0.0)
+    return state
+
+
+def _read(conn, sql, params, item_ids=None):
+    sql = sql.format(item_filter=" AND item_id IN :ids" if item_ids is not None else "",
+                     i_item_filter=" AND i.id IN :ids" if item_ids is not None else "")
+    stmt = text(sql)
+    if item_ids is not None:
+        stmt = stmt.bindparams(bindparam("ids", expanding=True))
+        params = {**params, "ids": [int(i) for i in item_ids]}
+    return pd.read_sql(stmt, conn, params=params)
+
+
+def replay(conn, as_of, item_ids=None):
+    # as_of 시점 품목별 상태 (마지막 체크포인트 + 이후 이벤트) -> item_id, checkpoint_date, STATE_COLS, book_stock
+    params = {"as_of": _to_date(as_of).isoformat(), "epoch": EPOCH}
+    base = _read(conn, CHECKPOINT_SQL, params, item_ids)
+    tail = _ordered(_read(conn, TAIL_SQL, params, item_ids))
+    states = {int(r["item_id"]): (_state_from_row(r), r["checkpoint_date"]) for _, r in base.iterrows()}
+    for row in tail.itertuples(index=False):
+        state, _ = states.setdefault(int(row.item_id), (_empty_state(), None))
+        apply(state, row.kind, row.event_date, int(row.qty), int(row.id))
+    out = pd.DataFrame([{"item_id": iid, "checkpoint_date": cp, **s} for iid, (s, cp) in states.items()],
+                       columns=["item_id", "checkpoint_date"] + STATE_COLS)
+    out["book_stock"] = out["last_count_units"] + out["since_receipts"] + out["since_adjust"]
+    return out.sort_values("item_id").reset_index(drop=True)
+
+
+def events(conn, as_of, item_ids=None):
+    # as_of 까지의 유효 이벤트 (_ordered 순서: 날짜 / 같은 날은 입고 -> 조사, 같은 날 조사는 마지막 값만)
+    return _ordered(_read(conn, EVENTS_SQL, {"as_of": _to_date(as_of).isoformat()}, item_ids))
+
+
+def usage_between(conn, start, end, item_ids=None):
+    # 두 시점 상태의 누적 소비 / 일수 차 -> db.USAGE 와 같은 컬럼 (id, daily_avg_usage, usage_intervals)
+    a = replay(conn, start, item_ids).set_index("item_id")
+    b = replay(conn, end, item_ids).set_index("item_id")
+    a = a.reindex(b.index).fillna({"cum_consumed": 0.0, "cum_days": 0, "intervals": 0})
+    days = b["cum_days"] - a["cum_days"]
+    out = pd.DataFrame({
+        "id": b.index,
+        "daily_avg_usage": ((b["cum_consumed"] - a["cum_consumed"]) / days.where(days > 0)).fillna(0.0).to_numpy(),
+        "usage_intervals": (b["intervals"] - a["intervals"]).astype(int).to_numpy(),
+    })
+    return out
+
+
+def month_end(d):
+    return date(d.year, d.month, calendar.monthrange(d.year, d.month)[1])
+
+
+def last_closed_month_end(today=None):
+    return (today or date.today()).replace(day=1) - timedelta(days=1)
+
+
+def compact_through(through=None):
+    # 접을 수 있는 마지막 월말 (기본: 지난달 말, 아직 끝나지 않은 달은 안 됨)
+    through = month_end(_to_date(through)) if through else last_closed_month_end()
+    return min(through, last_closed_month_end())
+
+
+def pending_items(conn, through=None):
+    # 마지막 체크포인트 이후 through 까지 접을 이벤트가 있는 품목 id (compact 전에 이 품목만 잠금)
+    params = {"as_of": compact_through(through).isoformat(), "epoch": EPOCH}
+    return sorted(int(i) for i in _read(conn, TAIL_SQL, params)["item_id"].unique())
+
+
+def compact(conn, through=None, item_ids=None):
+    # through (기본: 지난달 말) 까지의 이벤트를 품목별 월말 체크포인트로 접음 -> 만든 체크포인트 수
+    # 이미 있는 마지막 체크포인트 이후만 처리하므로 매월 1회 돌리면 한 달분만 읽음. item_ids: 그 품목만 (None = 전체)
+    through = compact_through(through)
+    params = {"as_of": through.isoformat(), "epoch": EPOCH}
+    base = {int(r["item_id"]): _state_from_row(r) for _, r in _read(conn, CHECKPOINT_SQL, params, item_ids).iterrows()}
+    tail = _ordered(_read(conn, TAIL_SQL, params, item_ids))
+    rows = []
+    for iid, ev in tail.groupby("item_id", sort=False):
+        state = base.get(int(iid)) or _empty_state()
+        ends = ev["event_date"].map(month_end)
+        for end, month in ev.groupby(ends, sort=True):
+            for row in month.itertuples(index=False):
+                apply(state, row.kind, row.event_date, int(row.qty), int(row.id))
+            rows.append({"item_id": int(iid), "checkpoint_date": end.isoformat(), **state,
+                         "last_count_date": state["last_count_date"].isoformat() if state["last_count_date"] else None})
+    if rows:
+        cols = ["item_id", "checkpoint_date"] + STATE_COLS
+        upd = ", ".join(f"{c} = EXCLUDED.{c}" for c in STATE_COLS)
+        conn.execute(text(f"""
+            INSERT INTO inventory_checkpoints ({", ".join(cols)}) VALUES ({", ".join(f":{c}" for c in cols)})
+            ON CONFLICT (item_id, checkpoint_date) DO UPDATE SET {upd}
+        """), rows)
+    return len(rows)
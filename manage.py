@@ -0,0 +1,195 @@
+# 관리용 커맨드 (Streamlit 밖에서 실행)
+#   python manage.py rebuild-stock-state   # item_stock_state 전체 백필
+#   python manage.py check-stock-state     # 요약 테이블 vs 원본 이력 정합성 확인 (불일치 시 종료 코드 1)
+#   python manage.py plan --days 14 --horizon 7 --occ STD=0.95 [--property 2] [--out plan.parquet]   # 야간 발주 계획 (생략 시 전체 시설)
+#   python manage.py drafts [--property 2] [--window 7] [--csv po/]   # 발주 기한이 가까운 품목의 발주 초안 (deliveries status=draft)
+#                                                                    # --csv: 발주서 번호별 CSV 출력
+#   python manage.py import-occupancy pms.csv [--property 1]   # PMS 가동률 예측 (date, area, occ|sold[, property])
+#   python manage.py add-property ANNEX 別館 --area ALL=120:0.85 --area STD=120:0.85   # 시설 + 구역(객실 수:기준 가동률) 등록
+#   python manage.py serve-api --port 8502  # 발주 계획 HTTP API (forecast_api.py)
+#   python manage.py sync-analytics --url sqlite:///history.db   # 이력 집계용 로컬 사본 갱신 (INVENTORY_ANALYTICS_URL)
+#   python manage.py compact-ledger [--through 2025-03-31]   # 재고 이벤트 원장 -> 월말 체크포인트 (월 1회, 기본: 지난달 말까지)
+#   python manage.py stock-at 2025-03-15 [--property 1] [--csv out.csv]   # 과거 시점 재고 재현 (체크포인트 + 이후 이벤트)
+#   python manage.py adjust 12 -5 --note 破損      # 조사 외 증감 (파손 / 폐기 등) 을 원장에 기록
+#   python manage.py refresh-rollups [--full]      # 추이 차트 사전 집계 갱신 (--full: 전체 재구축, 품목의 구역 변경 / 삭제 후)
+#   python manage.py --db-url sqlite:///inventory.db plan   # 로컬 SQLite 로 실행 (기존 inventory.db 도 자동 마이그레이션)
+import argparse
+import logging
+import sys
+
+
+def parse_occ(values):
+    # ["STD=0.95", "HAK=70"] -> {"STD": 0.95, "HAK": 0.7}
+    occ = {}
+    for v in values or []:
+        area, _, val = v.partition("=")
+        val = float(val)
+        occ[area.strip().upper()] = val / 100.0 if val > 1 else val
+    return occ or None
+
+
+def parse_areas(values):
+    # ["ALL=120:0.85"] -> {"ALL": (120, 0.85)}
+    areas = {}
+    for v in values or []:
+        area, _, spec = v.partition("=")
+        rooms, _, ref = spec.partition(":")
+        ref = float(ref or 0)
+        areas[area.strip().upper()] = (int(rooms), ref / 100.0 if ref > 1 else ref)
+    return areas
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Inventory SQL 管理コマンド")
+    ap.add_argument("--db-url", default=None, help="接続先 DB (省略時は環境変数 INVENTORY_DB_URL / secrets)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p_mig = sub.add_parser("migrate", help="スキーマを最新バージョンに更新 (デプロイ時に 1 回)")
+    p_mig.add_argument("--force", action="store_true", help="バージョンが最新でも全手順を再実行")
+    sub.add_parser("rebuild-stock-state", help="item_stock_state を履歴から再構築")
+    sub.add_parser("check-stock-state", help="item_stock_state と履歴の整合性チェック")
+    p_plan = sub.add_parser("plan", help="発注計画を計算して order_plans テーブル / Parquet に保存")
+    p_plan.add_argument("--days", type=int, default=14, help="実績算出期間 (日)")
+    p_plan.add_argument("--horizon", type=int, default=7, help="予測期間 (日)")
+    p_plan.add_argument("--occ", action="append", metavar="AREA=RATE", help="稼働率 (例: STD=0.95, 複数指定可)")
+    p_plan.add_argument("--property", type=int, default=None, help="施設 ID (省略時は全施設)")
+    p_plan.add_argument("--out", default="table", help="'table' または .parquet ファイルパス")
+    p_plan.add_argument("--estimator", default=None, choices=["weighted", "ewma", "mad", "sql"],
+                        help="実績使用量の推定方法 (省略時は INVENTORY_USAGE_ESTIMATOR / weighted)")
+    p_draft = sub.add_parser("drafts", help="発注期限が近い品目の発注下書きを入荷予定に作成")
+    p_draft.add_argument("--days", type=int, default=14, help="実績算出期間 (日)")
+    p_draft.add_argument("--horizon", type=int, default=30, help="予測期間 (日)")
+    p_draft.add_argument("--window", type=int, default=7, help="発注期限がこの日数以内の品目を対象")
+    p_draft.add_argument("--property", type=int, default=None, help="施設 ID (省略時は全施設)")
+    p_draft.add_argument("--no-consolidate", action="store_true", help="仕入先ごとにまとめない (品目ごとの発注期限のまま)")
+    p_draft.add_argument("--csv", default=None, metavar="DIR", help="発注書 CSV の出力先ディレクトリ (発注書番号ごとに 1 ファイル)")
+    p_occ = sub.add_parser("import-occupancy", help="PMS の稼働率予測 CSV / Excel を取り込み")
+    p_occ.add_argument("file")
+    p_occ.add_argument("--property", type=int, default=None, help="ファイルに施設列がない場合の施設 ID")
+    p_prop = sub.add_parser("add-property", help="施設とエリア定義を登録")
+    p_prop.add_argument("code")
+    p_prop.add_argument("name")
+    p_prop.add_argument("--area", action="append", required=True, metavar="AREA=ROOMS:REF_OCC", help="例: ALL=120:0.85")
+    p_api = sub.add_parser("serve-api", help="発注計画 HTTP API を起動")
+    p_api.add_argument("--host", default="127.0.0.1")
+    p_api.add_argument("--port", type=int, default=8502)
+    p_sync = sub.add_parser("sync-analytics", help="履歴集計用のローカルコピー (SQLite / DuckDB) を更新")
+    p_sync.add_argument("--url", default=None, help="コピー先 (省略時は INVENTORY_ANALYTICS_URL)")
+    p_compact = sub.add_parser("compact-ledger", help="在庫イベント台帳を月末チェックポイントに集約")
+    p_compact.add_argument("--through", default=None, help="この日を含む月末まで (省略時は先月末)")
+    p_at = sub.add_parser("stock-at", help="指定日時点の在庫を台帳から再現")
+    p_at.add_argument("date", help="YYYY-MM-DD")
+    p_at.add_argument("--property", type=int, default=None, help="施設 ID (省略時は全施設)")
+    p_at.add_argument("--csv", default=None, help="CSV 出力先 (省略時は画面表示)")
+    p_adj = sub.add_parser("adjust", help="棚卸し以外の在庫増減 (破損・廃棄など) を台帳に記録")
+    p_adj.add_argument("item_id", type=int)
+    p_adj.add_argument("qty", type=int, help="増減数 (符号付き, 例: -5)")
+    p_adj.add_argument("--date", default=None, help="YYYY-MM-DD (省略時は今日)")
+    p_adj.add_argument("--note", default=None)
+    p_roll = sub.add_parser("refresh-rollups", help="推移グラフ用の日次 / 週次集計を更新")
+    p_roll.add_argument("--full", action="store_true", help="全品目を作り直す (品目のエリア変更・削除の後)")
+    p_gen = sub.add_parser("generate-data", help="ベンチマーク用の合成データ (品目 / 棚卸し / 入荷) を投入")
+    p_gen.add_argument("--items", type=int, default=500, help="品目数 (SKU)")
+    p_gen.add_argument("--years", type=float, default=3, help="履歴の年数")
+    p_gen.add_argument("--counts", default="mixed", choices=["mixed", "weekly", "daily"], help="棚卸しの頻度")
+    p_gen.add_argument("--property", type=int, default=1, help="投入先の施設 ID")
+    p_gen.add_argument("--seed", type=int, default=0)
+    p_gen.add_argument("--replace", action="store_true", help="既存の品目と履歴をすべて削除してから投入 (ベンチマーク専用 DB のみ)")
+    args = ap.parse_args(argv)
+
+    import db
+    if args.db_url:
+        db.set_db_url(args.db_url)
+    applied = db.init_db(force=args.cmd == "migrate" and args.force)
+
+    if args.cmd == "migrate":
+        import schema
+        print(f"schema version {schema.SCHEMA_VERSION}: " + ("migrated" if applied else "up to date"))
+    elif args.cmd == "rebuild-stock-state":
+        n = db.rebuild_stock_state()
+        print(f"rebuilt item_stock_state: {n} items")
+    elif args.cmd == "check-stock-state":
+        diff = db.check_stock_state()
+        if not diff.empty:
+            print(diff.to_string())
+            print(f"{len(diff)} items out of sync (run rebuild-stock-state)")
+            return 1
+        print("item_stock_state OK")
+    elif args.cmd == "plan":
+        import forecast_service
+        plan = forecast_service.run_plan(args.days, args.horizon, parse_occ(args.occ), args.property, args.estimator)
+        if args.out == "table":
+            n = forecast_service.save_plan(plan, args.days, args.horizon)
+            print(f"saved order plan: {n} items -> order_plans")
+        else:
+            n = forecast_service.write_parquet(plan, args.out)
+            print(f"saved order plan: {n} items -> {args.out}")
+        print(f"items to order: {int((plan['order_units'] > 0).sum())} ({plan['property_id'].nunique()} properties)")
+    elif args.cmd == "drafts":
+        import forecast_service
+        n = forecast_service.create_drafts(args.days, args.horizon, args.property, args.window, not args.no_consolidate)
+        drafts = db.get_draft_deliveries(args.property)
+        print(f"draft deliveries: {n} items ({drafts['po_ref'].nunique()} purchase orders)")
+        if args.csv:
+            import os
+            import re
+            os.makedirs(args.csv, exist_ok=True)
+            for po, lines in drafts.groupby("po_ref"):
+                fname = re.sub(r"[^\w\-]+", "_", po) + ".csv"
+                with open(os.path.join(args.csv, fname), "w", encoding="utf-8", newline="") as f:
+                    f.write(forecast_service.purchase_order_csv(lines))
+            print(f"wrote {drafts['po_ref'].nunique()} CSV files -> {args.csv}")
+    elif args.cmd == "import-occupancy":
+        import occupancy_import
+        import stock_import
+        areas, props = db.get_property_areas_df(), db.get_properties_df()
+        pid = args.property if args.property is not None else (db.DEFAULT_PROPERTY_ID if len(props) == 1 else None)
+        saved, n_err, offset = 0, 0, 0
+        with open(args.file, "rb") as f:
+            for chunk in stock_import.iter_upload_chunks(f, args.file):
+                records, errors = occupancy_import.validate_occupancy(chunk, areas, props, pid, row_offset=offset)
+                saved += db.upsert_occupancy(records)
+                for r in errors.itertuples():
+                    print(f"row {r.row}: {r.reason}")
+                n_err += len(errors)
+                offset += len(chunk)
+        print(f"imported occupancy: {saved} rows, {n_err} errors")
+        return 1 if n_err else 0
+    elif args.cmd == "add-property":
+        pid = db.add_property(args.code, args.name, parse_areas(args.area))
+        print(f"added property {args.code}: id={pid}")
+    elif args.cmd == "serve-api":
+        import forecast_api
+        logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+        forecast_api.serve(args.host, args.port)
+    elif args.cmd == "sync-analytics":
+        counts = db.sync_analytics(args.url)
+        print("synced analytics copy: " + ", ".join(f"{t}={n}" for t, n in counts.items()) + f" -> {db.ANALYTICS_URL}")
+    elif args.cmd == "compact-ledger":
+        n = db.compact_ledger(args.through)
+        print(f"ledger checkpoints written: {n}")
+    elif args.cmd == "stock-at":
+        df = db.get_stock_at(args.date, args.property)
+        if args.csv:
+            df.to_csv(args.csv, index=False)
+            print(f"wrote {len(df)} items -> {args.csv}")
+        else:
+            print(df[["item_id", "name", "last_count_date", "last_count_units", "book_stock"]].to_string(index=False))
+    elif args.cmd == "adjust":
+        from datetime import date
+        db.add_adjustment(args.item_id, args.date or date.today().isoformat(), args.qty, args.note)
+        print(f"recorded adjustment: item {args.item_id} {args.qty:+d}")
+    elif args.cmd == "refresh-rollups":
+        n = db.refresh_rollups(args.full, wait=True)
+        print(f"rollups refreshed: {n} items")
+    elif args.cmd == "generate-data":
+        import synthetic_data
+        data = synthetic_data.generate(args.items, args.years, seed=args.seed, counts=args.counts)
+        n_items, n_snaps, n_del = synthetic_data.write_db(db.DB_URL, *data, replace=args.replace, property_id=args.property)
+        db.rebuild_stock_state()
+        db.refresh_rollups(full=True, wait=True)
+        print(f"generated {n_items} items, {n_snaps} snapshots, {n_del} deliveries")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
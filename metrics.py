@@ -0,0 +1,212 @@
+import contextvars
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+# ==========================================
+# 계측 (쿼리 / 계산 단계 / 화면 구역별 소요 시간)
+# ==========================================
+# - timer(kind, label): kind = query / compute / render. 프로세스 누적 (건수 / 합계 / 최대 / 행 수) + 현재 추적에 기록
+# - trace(name): Streamlit rerun 1회 / API 요청 1회 단위 기록 (contextvars -> 백그라운드 스레드의 쿼리는 섞이지 않음)
+# - prometheus(): Prometheus text 형식 / snapshot(): JSON / INVENTORY_METRICS_LOG=1 이면 추적마다 JSON 1줄 로그
+# - profile(path): cProfile 로 1회 실행을 덤프 (.prof, snakeviz 등으로 열람)
+LOG_TRACES = os.environ.get("INVENTORY_METRICS_LOG", "") not in ("", "0")
+METRICS_PORT = os.environ.get("INVENTORY_METRICS_PORT")  # Streamlit 프로세스에서 /metrics 를 따로 열 때
+PROFILE_DIR = os.environ.get("INVENTORY_PROFILE_DIR", "profiles")
+PROFILE_TOP = 30
+
+logger = logging.getLogger("inventory.metrics")
+
+_lock = threading.Lock()
+_totals = {}  # (kind, label) -> [건수, 합계 ms, 최대 ms, 행 수]
+_current = contextvars.ContextVar("inventory_trace", default=None)
+_server = None
+
+
+def record(kind, label, ms, rows=None):
+    with _lock:
+        t = _totals.setdefault((kind, label), [0, 0.0, 0.0, 0])
+        t[0] += 1
+        t[1] += ms
+        t[2] = max(t[2], ms)
+        t[3] += rows or 0
+    tr = _current.get()
+    if tr is not None:
+        tr["events"].append({"kind": kind, "label": label, "ms": ms, "rows": rows, "depth": tr["depth"]})
+
+
+@contextmanager
+def timer(kind, label):
+    # with timer("render", "home.table") as info: ... info["rows"] = n
+    info = {"rows": None}
+    tr = _current.get()
+    if tr is not None:
+        tr["depth"] += 1
+    t0 = time.perf_counter()
+    try:
+        yield info
+    finally:
+        ms = (time.perf_counter() - t0) * 1000
+        if tr is not None:
+            tr["depth"] -= 1
+        record(kind, label, ms, info["rows"])
+
+
+class Stopwatch:
+    # 한 함수 안의 단계 계측 (들여쓰기 없이): lap("merge") = 직전 lap 이후 시간을 "prefix.merge" 로 기록
+    def __init__(self, kind, prefix):
+        self.kind, self.prefix = kind, prefix
+        self._t = time.perf_counter()
+
+    def lap(self, name, rows=None):
+        now = time.perf_counter()
+        record(self.kind, f"{self.prefix}.{name}", (now - self._t) * 1000, rows)
+        self._t = now
+
+
+def timed(kind, label=None):
+    # 함수 전체 계측 데코레이터 (label 생략 시 함수 이름)
+    def deco(fn):
+        name = label or fn.__name__
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with timer(kind, name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return deco
+
+
+@contextmanager
+def trace(name):
+    # 이름은 안에서 tr["name"] 으로 바꿀 수 있음 (Streamlit 은 메뉴 선택 후에 페이지를 알 수 있으므로)
+    tr = {"name": name, "started": time.time(), "events": [], "depth": 0, "total_ms": None}
+    token = _current.set(tr)
+    t0 = time.perf_counter()
+    try:
+        yield tr
+    finally:
+        tr["total_ms"] = (time.perf_counter() - t0) * 1000
+        _current.reset(token)
+        record("trace", tr["name"], tr["total_ms"])
+        if LOG_TRACES:
+            logger.info(trace_json(tr))
+
+
+def summarize(tr):
+    # 추적 1건 -> kind / label 별 합계 (느린 순)
+    out = {}
+    for e in tr["events"]:
+        s = out.setdefault((e["kind"], e["label"]), {"kind": e["kind"], "label": e["label"], "count": 0, "ms": 0.0, "rows": 0})
+        s["count"] += 1
+        s["ms"] += e["ms"]
+        s["rows"] += e["rows"] or 0
+    return sorted(out.values(), key=lambda s: -s["ms"])
+
+
+def kind_totals(tr):
+    # 최상위 (depth 0) 이벤트만 합산 -> 중첩된 계측을 두 번 세지 않음
+    out = {}
+    for e in tr["events"]:
+        if e["depth"] == 0:
+            out[e["kind"]] = out.get(e["kind"], 0.0) + e["ms"]
+    return out
+
+
+def trace_json(tr):
+    return json.dumps({"trace": tr["name"], "ts": tr["started"], "total_ms": round(tr["total_ms"] or 0.0, 2),
+                       "by_kind": {k: round(v, 2) for k, v in kind_totals(tr).items()},
+                       "events": [{**e, "ms": round(e["ms"], 2)} for e in tr["events"]]}, ensure_ascii=False)
+
+
+def snapshot():
+    # 프로세스 누적값 -> [{"kind", "label", "count", "sum_ms", "max_ms", "rows"}]
+    with _lock:
+        return [{"kind": k, "label": lbl, "count": n, "sum_ms": s, "max_ms": mx, "rows": rows}
+                for (k, lbl), (n, s, mx, rows) in sorted(_totals.items())]
+
+
+def _esc(v):
+    return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+def prometheus():
+    lines = [
+        "# HELP inventory_duration_ms Time spent per query / compute stage / render section",
+        "# TYPE inventory_duration_ms summary",
+    ]
+    snap = snapshot()
+    for m in snap:
+        lbl = f'kind="{_esc(m["kind"])}",label="{_esc(m["label"])}"'
+        lines.append(f"inventory_duration_ms_count{{{lbl}}} {m['count']}")
+        lines.append(f"inventory_duration_ms_sum{{{lbl}}} {m['sum_ms']:.3f}")
+    lines += ["# HELP inventory_duration_ms_max Slowest single call", "# TYPE inventory_duration_ms_max gauge"]
+    lines += [f'inventory_duration_ms_max{{kind="{_esc(m["kind"])}",label="{_esc(m["label"])}"}} {m["max_ms"]:.3f}' for m in snap]
+    lines += ["# HELP inventory_rows_total Rows returned / affected", "# TYPE inventory_rows_total counter"]
+    lines += [f'inventory_rows_total{{kind="{_esc(m["kind"])}",label="{_esc(m["label"])}"}} {m["rows"]}'
+              for m in snap if m["kind"] == "query"]
+    return "\n".join(lines) + "\n"
+
+
+def reset():
+    with _lock:
+        _totals.clear()
+
+
+@contextmanager
+def profile(path=None, top=PROFILE_TOP):
+    # with profile("profiles/rerun.prof") as info: ... -> info["path"], info["stats"] (누적 시간 상위 top 함수)
+    prof = cProfile.Profile()
+    info = {"path": None, "stats": ""}
+    prof.enable()
+    try:
+        yield info
+    finally:
+        prof.disable()
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            prof.dump_stats(path)
+            info["path"] = path
+        buf = io.StringIO()
+        pstats.Stats(prof, stream=buf).sort_stats("cumulative").print_stats(top)
+        info["stats"] = buf.getvalue()
+
+
+def profile_path(name):
+    return os.path.join(PROFILE_DIR, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}.prof")
+
+
+def serve(port=None, host="0.0.0.0"):
+    # /metrics 전용 HTTP 서버 (데몬 스레드, 프로세스당 1개). forecast_api 는 자체 /metrics 를 사용
+    global _server
+    port = port or METRICS_PORT
+    if not port or _server is not None:
+        return _server
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = prometheus().encode("utf-8") if self.path.startswith("/metrics") else b"not found"
+            self.send_response(200 if self.path.startswith("/metrics") else 404)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, fmt, *args):
+            pass
+
+    with _lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, int(port)), Handler)
+            threading.Thread(target=_server.serve_forever, name="inventory-metrics", daemon=True).start()
+    return _server
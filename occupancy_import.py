@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+
+# ==========================================
+# PMS 가동률 예측 CSV 가져오기 (occupancy_forecast)
+# ==========================================
+# 한 행 = (날짜, 구역, 가동률 또는 판매 객실 수). 시설은 property 컬럼(코드 / ID) 또는 화면에서 선택한 시설
+# 파일 읽기(청크 단위)는 stock_import.iter_upload_chunks 를 그대로 사용
+
+COLUMN_ALIASES = {
+    "date": "occ_date", "occ_date": "occ_date", "日付": "occ_date", "宿泊日": "occ_date",
+    "area": "area", "エリア": "area", "room_type": "area",
+    "occ": "occ", "occupancy": "occ", "稼働率": "occ", "occ%": "occ",
+    "sold": "sold", "rooms_sold": "sold", "販売室数": "sold", "室数": "sold",
+    "property": "property", "property_id": "property", "施設": "property", "施設コード": "property",
+}
+
+
+def normalize_columns(df):
+    renamed = {c: COLUMN_ALIASES.get(str(c).strip(), COLUMN_ALIASES.get(str(c).strip().lower())) for c in df.columns}
+    out = df.rename(columns={c: n for c, n in renamed.items() if n})
+    return out.loc[:, ~out.columns.duplicated()]
+
+
+def validate_occupancy(df, areas, properties, property_id=None, row_offset=0):
+    # areas: property_areas (property_id, area, rooms) / properties: (id, code)
+    # -> (저장할 레코드[property_id, occ_date, area, occ], 오류[row, reason])
+    df = normalize_columns(df).reset_index(drop=True)
+    rows = pd.Series(np.arange(len(df)) + row_offset + 1)
+    reason = pd.Series("", index=df.index, dtype=object)
+
+    def flag(mask, msg):
+        mask = mask & (reason == "")
+        reason[mask] = msg
+
+    # 시설: property 컬럼 (코드 또는 ID) > 선택한 시설
+    if "property" in df.columns:
+        raw = df["property"].astype(str).str.strip()
+        by_code = dict(zip(properties["code"].astype(str), properties["id"].astype(int)))
+        pid = raw.map(by_code).fillna(pd.to_numeric(raw, errors="coerce"))
+        pid = pid.where(pid.isin(properties["id"].astype(int)))
+    else:
+        pid = pd.Series(property_id, index=df.index, dtype=float)
+    flag(pid.isna(), "unknown property")
+
+    area = df["area"].astype(str).str.strip().str.upper() if "area" in df.columns else pd.Series("ALL", index=df.index)
+    keys = pd.MultiIndex.from_arrays([pid.fillna(-1).astype(int), area])
+    area_rooms = areas.assign(property_id=areas["property_id"].astype(int)).set_index(["property_id", "area"])["rooms"]
+    rooms = pd.Series(area_rooms.reindex(keys).to_numpy(dtype=float), index=df.index)
+    flag(rooms.isna(), "unknown area")
+
+    occ_date = pd.to_datetime(df["occ_date"], errors="coerce") if "occ_date" in df.columns else pd.Series(pd.NaT, index=df.index)
+    flag(occ_date.isna(), "invalid date")
+
+    # 가동률: occ (0~1 또는 %) 우선, 없으면 판매 객실 수 / 구역 객실 수
+    # "%" 가 붙은 값은 항상 % ("1%" = 0.01), 숫자만 있으면 1 이하는 비율 / 1 초과는 % 로 간주
+    if "occ" in df.columns:
+        raw = df["occ"].astype(str).str.strip()
+        pct = raw.str.endswith("%")
+        occ = pd.to_numeric(raw.str.rstrip("%").str.strip(), errors="coerce")
+        occ = occ.where(~pct & (occ <= 1), occ / 100.0)
+    elif "sold" in df.columns:
+        occ = pd.to_numeric(df["sold"], errors="coerce") / rooms.where(rooms > 0)
+    else:
+        occ = pd.Series(np.nan, index=df.index)
+    flag(occ.isna() | (occ < 0) | (occ > 1), "invalid occupancy")
+
+    ok = reason == ""
+    records = pd.DataFrame({
+        "property_id": pid[ok].astype(int),
+        "occ_date": occ_date[ok].dt.strftime("%Y-%m-%d"),
+        "area": area[ok],
+        "occ": occ[ok].astype(float),
+    }).drop_duplicates(["property_id", "occ_date", "area"], keep="last")
+    errors = pd.DataFrame({"row": rows[~ok].to_numpy(), "reason": reason[~ok].to_numpy()})
+    return records, errors
@@ -0,0 +1,270 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import bindparam, text
+
+import ledger
+
+# ==========================================
+# 추이 차트용 사전 집계 (item_rollups / area_rollups / rollup_state)
+# ==========================================
+# - 품목별 일 단위 계열은 원장 (ledger.events) 에서 계산
+#   재고: 조사일은 센 수량, 조사 사이는 직전 수량 + 누적 입고 / 조정 - 구간 일평균 소비 x 경과일 (다음 조사 수량으로 이어짐)
+#         마지막 조사 이후는 장부 재고 (조사 + 이후 입고 / 조정). 첫 조사 전은 NULL
+#   사용량: 조사 구간 소비 / 일수 (ledger.apply 의 cum_consumed 와 같은 정의). 마지막 조사 이후는 다음 조사 전까지 NULL
+#   입고: 그날 확정 입고 합계 / counted: 조사일의 센 수량
+# - 주 단위 (월요일 기준): 재고 = 그 주 마지막 값, 사용량 = 평균, 입고 = 합계
+# - 구역 합계: 시설 / 使用エリア 별로 품목 값을 더함 (단위가 섞이므로 추세 비교용)
+# - refresh: rollup_state.last_event_id 이후 이벤트가 있는 품목만, 바뀐 날짜 직전 조사일부터 다시 씀 + 날짜가 바뀌면 오늘까지 연장
+#   품목을 잠그지 않음: 시작 시점의 MAX(id) (top) 까지만 반영, 아직 커밋되지 않은 이벤트는 다음 갱신에서
+#   (쓰기는 품목을 잠근 뒤 원장에 추가하므로 품목 안에서는 id 순으로 커밋됨 -> last_event_id 이후만 보면 됨)
+#   품목의 구역 변경 / 품목 삭제는 구역 합계에 반영되지 않음 -> refresh(full=True) (manage.py refresh-rollups --full)
+# - 읽기: 기간이 DAILY_MAX_DAYS 일을 넘으면 주 단위, 그래도 MAX_POINTS 를 넘으면 LTTB 로 줄임
+GRAINS = ("day", "week")
+DAILY_MAX_DAYS = 400
+MAX_POINTS = 300
+SERIES_COLS = ["bucket", "stock", "usage", "arrivals", "counted"]
+
+# 반영 위치 이후 이벤트가 있는 품목 (id 범위는 PK, 품목별 위치는 rollup_state 로 거름)
+STALE_SQL = """
+    SELECT e.item_id, MIN(e.event_date) AS changed_from, MAX(e.id) AS last_event_id
+    FROM inventory_events e LEFT JOIN rollup_state r ON r.item_id = e.item_id
+    WHERE e.id > :mark AND e.id <= :top AND e.id > COALESCE(r.last_event_id, 0)
+    GROUP BY e.item_id
+"""
+# 반영 위치가 없는 품목의 이벤트: 첫 이벤트가 갱신 중에 커밋되면 mark (다른 품목들의 최소 위치) 가 그 id 를 넘어설 수 있음
+UNBUILT_SQL = """
+    SELECT i.id AS item_id, (SELECT MAX(e.id) FROM inventory_events e WHERE e.item_id = i.id AND e.id <= :top) AS last_event_id
+    FROM items i LEFT JOIN rollup_state r ON r.item_id = i.id
+    WHERE r.item_id IS NULL
+"""
+AREA_SQL = """
+    INSERT INTO area_rollups (property_id, area, grain, bucket, stock, usage, arrivals, items)
+    SELECT i.property_id, COALESCE(i.target_area, 'ALL'), r.grain, r.bucket, SUM(r.stock), SUM(r.usage), SUM(r.arrivals), COUNT(r.stock)
+    FROM item_rollups r JOIN items i ON i.id = r.item_id
+    WHERE i.property_id = :pid AND COALESCE(i.target_area, 'ALL') = :area AND r.grain = :grain AND r.bucket >= :since
+    GROUP BY i.property_id, COALESCE(i.target_area, 'ALL'), r.grain, r.bucket
+"""
+ITEM_TREND_SQL = """
+    SELECT bucket, stock, usage, arrivals, counted FROM item_rollups
+    WHERE item_id = :item_id AND grain = :grain AND bucket >= :start AND bucket <= :end
+    ORDER BY bucket
+"""
+# 전체 시설이면 같은 구역 코드를 시설끼리 더함
+AREA_TREND_SQL = """
+    SELECT bucket, SUM(stock) AS stock, SUM(usage) AS usage, SUM(arrivals) AS arrivals, SUM(items) AS items FROM area_rollups
+    WHERE area = :area AND grain = :grain AND bucket >= :start AND bucket <= :end{prop_filter}
+    GROUP BY bucket ORDER BY bucket
+"""
+
+
+def week_start(d):
+    return d - timedelta(days=d.weekday())
+
+
+# ==========================================
+# 계열 계산
+# ==========================================
+def item_daily(ev, end):
+    # 품목 1개의 유효 이벤트 (ledger.events 순서) -> 첫 이벤트일부터 end 까지 일 단위 SERIES_COLS
+    if ev.empty:
+        return pd.DataFrame(columns=SERIES_COLS)
+    start = ev["event_date"].min()
+    n = (end - start).days + 1
+    if n <= 0:
+        return pd.DataFrame(columns=SERIES_COLS)
+    day = (pd.to_datetime(ev["event_date"]) - pd.Timestamp(start)).dt.days.to_numpy()
+    kind = ev["kind"].to_numpy()
+    qty = ev["qty"].to_numpy(dtype=float)
+    days = np.arange(n)
+
+    flow = np.zeros(n)
+    arrivals = np.zeros(n)
+    is_flow = kind != "count"
+    np.add.at(flow, day[is_flow], qty[is_flow])
+    np.add.at(arrivals, day[kind == "receipt"], qty[kind == "receipt"])
+    stock = np.full(n, np.nan)
+    usage = np.full(n, np.nan)
+    counted = np.full(n, np.nan)
+
+    cday, cq = day[kind == "count"], qty[kind == "count"]
+    if len(cday):
+        cum = np.cumsum(flow)
+        # 구간 k = 조사 k ~ 조사 k+1. 마지막 구간은 아직 모름 (소비 0 = 장부 재고)
+        consumed = cq[:-1] + (cum[cday[1:]] - cum[cday[:-1]]) - cq[1:]
+        rate = np.append(consumed / np.diff(cday), np.nan)
+        seg = np.searchsorted(cday, days, side="right") - 1      # 그날 이전 (당일 포함) 마지막 조사
+        has = seg >= 0
+        d, s = days[has], seg[has]
+        stock[has] = cq[s] + cum[d] - cum[cday[s]] - np.nan_to_num(rate[s]) * (d - cday[s])
+        useg = np.searchsorted(cday, days, side="left") - 1      # 그날 소비가 속한 구간 (전날까지의 마지막 조사)
+        used = useg >= 0
+        usage[used] = rate[useg[used]]
+        counted[cday] = cq
+
+    return pd.DataFrame({"bucket": pd.date_range(start, periods=n, freq="D").date, "stock": stock, "usage": usage,
+                         "arrivals": arrivals, "counted": counted})
+
+
+def weekly(daily):
+    # 일 단위 -> 주 단위 (item_id 컬럼이 있으면 품목별로 한 번에)
+    if daily.empty:
+        return daily
+    b = pd.to_datetime(daily["bucket"])
+    keys = [daily[c] for c in ["item_id"] if c in daily.columns]
+    g = daily.groupby(keys + [(b - pd.to_timedelta(b.dt.weekday, unit="D")).dt.date.rename("bucket")], sort=True)
+    out = pd.DataFrame({"stock": g["stock"].last(), "usage": g["usage"].mean(), "arrivals": g["arrivals"].sum(),
+                        "counted": g["counted"].last()})
+    return out.reset_index()
+
+
+def lttb(x, y, n):
+    # Largest-Triangle-Three-Buckets: 모양을 유지하면서 n 개 점의 위치 (처음 / 끝 포함)
+    size = len(x)
+    if n >= size or n < 3:
+        return np.arange(size)
+    edges = np.linspace(1, size - 1, n - 1).astype(int)
+    out = [0]
+    a = 0
+    for i in range(n - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            nx, ny = x[hi:edges[i + 2]].mean(), y[hi:edges[i + 2]].mean()
+        else:
+            nx, ny = x[-1], y[-1]
+        area = np.abs((x[a] - nx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (ny - y[a]))
+        a = lo + int(area.argmax())
+        out.append(a)
+    out.append(size - 1)
+    return np.array(out)
+
+
+def downsample(df, max_points=MAX_POINTS):
+    # 재고 선의 모양으로 점을 고르고, 고른 점 사이의 입고는 합계 / 사용량은 평균 / 조사는 마지막 값으로 모음
+    if len(df) <= max_points:
+        return df.reset_index(drop=True)
+    x = (pd.to_datetime(df["bucket"]) - pd.Timestamp(df["bucket"].iloc[0])).dt.days.to_numpy(dtype=float)
+    y = pd.to_numeric(df["stock"], errors="coerce").ffill().bfill().fillna(0).to_numpy(dtype=float)
+    idx = lttb(x, y, max_points)
+    seg = np.searchsorted(idx, np.arange(len(df)), side="right") - 1
+    g = df.reset_index(drop=True).groupby(seg)
+    out = df.iloc[idx].reset_index(drop=True)
+    out["usage"] = g["usage"].mean().to_numpy()
+    out["arrivals"] = g["arrivals"].sum().to_numpy()
+    if "counted" in out.columns:
+        out["counted"] = g["counted"].last().to_numpy()
+    return out
+
+
+def grain_for(start, end):
+    return "day" if (end - start).days <= DAILY_MAX_DAYS else "week"
+
+
+# ==========================================
+# 갱신
+# ==========================================
+def _since(ev, changed_from, built_through):
+    # 다시 써야 하는 첫 날짜: 바뀐 이벤트 직전 조사일 (그 구간 사용량이 바뀜). None = 품목 전체
+    since = None
+    if changed_from is not None:
+        counts = ev.loc[(ev["kind"] == "count") & (ev["event_date"] < changed_from), "event_date"]
+        if counts.empty:
+            return None
+        since = counts.max()
+    if built_through is not None:
+        nxt = built_through + timedelta(days=1)
+        since = nxt if since is None else min(since, nxt)
+    return since
+
+
+def refresh(conn, today=None, full=False):
+    # 쓰기 트랜잭션 (conn) 안에서 호출 -> 다시 계산한 품목 수
+    today = today or date.today()
+    if full:
+        for table in ["item_rollups", "area_rollups", "rollup_state"]:
+            conn.execute(text(f"DELETE FROM {table}"))
+    top = conn.execute(text("SELECT COALESCE(MAX(id), 0) FROM inventory_events")).scalar()
+    mark = conn.execute(text("SELECT COALESCE(MIN(last_event_id), 0) FROM rollup_state")).scalar()
+    stale = pd.read_sql(text(STALE_SQL), conn, params={"mark": int(mark), "top": int(top)})
+    state = pd.read_sql(text("SELECT item_id, last_event_id, built_through FROM rollup_state"), conn)
+    # 날짜가 바뀐 품목 (미래 날짜로 들어온 입고가 오늘 안으로 들어오고, 마지막 조사 이후 장부 재고가 이어짐)
+    old = state[pd.to_datetime(state["built_through"]) < pd.Timestamp(today)]
+    todo = {int(r["item_id"]): {"changed_from": ledger._to_date(r["changed_from"]), "last_event_id": int(r["last_event_id"])}
+            for _, r in stale.iterrows()}
+    built = {int(r["item_id"]): (ledger._to_date(r["built_through"]), int(r["last_event_id"] or 0)) for _, r in state.iterrows()}
+    for iid in old["item_id"].astype(int):
+        todo.setdefault(iid, {"changed_from": None, "last_event_id": built[iid][1]})
+    unbuilt = pd.read_sql(text(UNBUILT_SQL), conn, params={"top": int(top)}).dropna()
+    for _, r in unbuilt.iterrows():
+        todo.setdefault(int(r["item_id"]), {"changed_from": None, "last_event_id": int(r["last_event_id"])})
+    if not todo:
+        return 0
+
+    ids = sorted(todo)
+    events = ledger.events(conn, today, ids)
+    by_item = dict(tuple(events.groupby("item_id"))) if not events.empty else {}
+    dailies, touched = [], {}
+    for iid in ids:
+        ev = by_item.get(iid, events.iloc[:0])
+        touched[iid] = _since(ev, todo[iid]["changed_from"], built.get(iid, (None, 0))[0]) or date(1900, 1, 1)
+        dailies.append(item_daily(ev, today).assign(item_id=iid))
+    daily = pd.concat(dailies, ignore_index=True)
+    since = pd.Series(touched)
+    frames = []
+    for grain, series, starts in [("day", daily, since), ("week", weekly(daily), since.map(week_start))]:
+        if not full:
+            conn.execute(text("DELETE FROM item_rollups WHERE item_id = :iid AND grain = :grain AND bucket >= :since"),
+                         [{"iid": iid, "grain": grain, "since": d.isoformat()} for iid, d in starts.items()])
+        if not series.empty:
+            keep = pd.to_datetime(series["bucket"]) >= pd.to_datetime(series["item_id"].map(starts))
+            frames.append(series[keep].assign(grain=grain))
+    if frames:
+        # 행 단위 dict 변환 없이 한 번에 (NaN -> NULL)
+        new = pd.concat(frames, ignore_index=True).astype({"item_id": "int64", "arrivals": "int64", "counted": "Int64"})
+        new[["item_id", "grain", "bucket", "stock", "usage", "arrivals", "counted"]].to_sql(
+            "item_rollups", conn, if_exists="append", index=False, chunksize=20_000)
+
+    # 구역 합계: 바뀐 품목이 속한 (시설, 구역) 만, 가장 이른 날짜부터
+    items = pd.read_sql(text("SELECT id, property_id, COALESCE(target_area, 'ALL') AS area FROM items WHERE id IN :ids")
+                        .bindparams(bindparam("ids", expanding=True)), conn, params={"ids": ids})
+    items["since"] = items["id"].map(touched)
+    for (pid, area), since in items.groupby(["property_id", "area"])["since"].min().items():
+        for grain, start in [("day", since), ("week", week_start(since))]:
+            params = {"pid": int(pid), "area": area, "grain": grain, "since": start.isoformat()}
+            conn.execute(text("DELETE FROM area_rollups WHERE property_id = :pid AND area = :area AND grain = :grain AND bucket >= :since"),
+                         params)
+            conn.execute(text(AREA_SQL), params)
+
+    conn.execute(text("""
+        INSERT INTO rollup_state (item_id, last_event_id, built_through) VALUES (:iid, :eid, :today)
+        ON CONFLICT (item_id) DO UPDATE SET last_event_id = EXCLUDED.last_event_id, built_through = EXCLUDED.built_through
+    """), [{"iid": iid, "eid": todo[iid]["last_event_id"], "today": today.isoformat()} for iid in ids])
+    return len(ids)
+
+
+# ==========================================
+# 읽기
+# ==========================================
+def _trend(conn, sql, params, start, end, max_points):
+    grain = grain_for(start, end)
+    df = pd.read_sql(text(sql), conn, params={**params, "grain": grain, "start": start.isoformat(), "end": end.isoformat()})
+    for c in ["stock", "usage", "arrivals", "counted", "items"]:
+        if c in df.columns:
+            df[c] = pd.to_numeric(df[c], errors="coerce")
+    df["bucket"] = pd.to_datetime(df["bucket"]).dt.date
+    return downsample(df, max_points), grain
+
+
+def item_trend(conn, item_id, start, end, max_points=MAX_POINTS):
+    # -> (SERIES_COLS DataFrame, 단위 "day" / "week")
+    return _trend(conn, ITEM_TREND_SQL, {"item_id": int(item_id)}, start, end, max_points)
+
+
+def area_trend(conn, area, start, end, property_id=None, max_points=MAX_POINTS):
+    params = {"area": area}
+    flt = ""
+    if property_id is not None:
+        params["pid"] = int(property_id)
+        flt = " AND property_id = :pid"
+    return _trend(conn, AREA_TREND_SQL.format(prop_filter=flt), params, start, end, max_points)
@@ -0,0 +1,333 @@
+from sqlalchemy import inspect, text
+
+import forecast_engine
+import ledger
+
+# ==========================================
+# 스키마 생성 / 마이그레이션 (Postgres / SQLite 공용)
+# ==========================================
+# - 방언 차이는 dialect 이름 -> 구문 dict 로 ("default" = SQLite, db.LATEST_SNAPS_SQL 과 같은 방식)
+# - 컬럼 추가는 ADD COLUMN IF NOT EXISTS 대신 inspector 로 확인 후 ALTER (SQLite 는 IF NOT EXISTS 미지원)
+# - 기존 SQLite inventory.db (target_area / units_per_room / property_id 없음, total_units 가 8바이트 BLOB) 도 여기서 현재 스키마로 올림
+# - 적용한 버전은 schema_version 에 기록. 이미 최신이면 조회 1번으로 끝 (기동 시 CREATE / inspector 왕복 없음)
+# TABLES / COLUMNS / INDEXES / 데이터 이관을 바꾸면 SCHEMA_VERSION 을 올릴 것
+SCHEMA_VERSION = 1
+VERSION_TABLE = """
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )"""
+# [Postgres] 여러 프로세스가 동시에 기동해도 마이그레이션은 1곳에서만 (pg_advisory_xact_lock 키)
+MIGRATE_LOCK_KEY = 7401
+ID_PK = {"postgresql": "SERIAL PRIMARY KEY", "default": "INTEGER PRIMARY KEY AUTOINCREMENT"}
+
+TABLES = {
+    "items": """
+        CREATE TABLE IF NOT EXISTS items (
+            id {id_pk},
+            name TEXT NOT NULL,
+            target_area TEXT DEFAULT 'ALL',
+            unit TEXT,
+            units_per_room FLOAT DEFAULT 0.0,
+            cs_total_units INTEGER DEFAULT 0,
+            units_per_box INTEGER DEFAULT 0,
+            boxes_per_cs INTEGER DEFAULT 0,
+            safety_stock INTEGER DEFAULT 0
+        )""",
+    "snapshots": """
+        CREATE TABLE IF NOT EXISTS snapshots (
+            id {id_pk},
+            item_id INTEGER,
+            snap_date DATE,
+            qty_cs INTEGER DEFAULT 0,
+            qty_box INTEGER DEFAULT 0,
+            total_units INTEGER DEFAULT 0,
+            note TEXT,
+            FOREIGN KEY(item_id) REFERENCES items(id)
+        )""",
+    "deliveries": """
+        CREATE TABLE IF NOT EXISTS deliveries (
+            id {id_pk},
+            item_id INTEGER,
+            order_date DATE,
+            arrival_date DATE,
+            qty_cs INTEGER DEFAULT 0,
+            qty_box INTEGER DEFAULT 0,
+            total_units INTEGER DEFAULT 0,
+            note TEXT,
+            FOREIGN KEY(item_id) REFERENCES items(id)
+        )""",
+    # 시설 (멀티 프로퍼티) + 시설별 구역 정의 (객실 수 / 기준 가동률)
+    "properties": """
+        CREATE TABLE IF NOT EXISTS properties (
+            id {id_pk},
+            code TEXT UNIQUE NOT NULL,
+            name TEXT NOT NULL
+        )""",
+    "property_areas": """
+        CREATE TABLE IF NOT EXISTS property_areas (
+            property_id INTEGER NOT NULL REFERENCES properties(id) ON DELETE CASCADE,
+            area TEXT NOT NULL,
+            rooms INTEGER DEFAULT 0,
+            ref_occ FLOAT DEFAULT 0.0,
+            PRIMARY KEY (property_id, area)
+        )""",
+    # 품목별 재고 상태 요약 (쓰기 시점에 같은 트랜잭션에서 갱신)
+    "item_stock_state": """
+        CREATE TABLE IF NOT EXISTS item_stock_state (
+            item_id INTEGER PRIMARY KEY REFERENCES items(id) ON DELETE CASCADE,
+            last_snap_units INTEGER DEFAULT 0,
+            last_snap_date DATE,
+            daily_avg_usage FLOAT DEFAULT 0.0,
+            usage_intervals INTEGER DEFAULT 0,
+            pending_units INTEGER DEFAULT 0,
+            refreshed_on DATE
+        )""",
+    # 배치 / API 로 산출한 발주 계획 (forecast_service.save_plan)
+    "order_plans": """
+        CREATE TABLE IF NOT EXISTS order_plans (
+            id {id_pk},
+            plan_date DATE NOT NULL,
+            usage_days INTEGER,
+            horizon_days INTEGER,
+            item_id INTEGER REFERENCES items(id) ON DELETE CASCADE,
+            current_stock FLOAT DEFAULT 0.0,
+            final_daily_usage FLOAT DEFAULT 0.0,
+            incoming_units FLOAT DEFAULT 0.0,
+            forecast FLOAT DEFAULT 0.0,
+            order_units FLOAT DEFAULT 0.0,
+            order_cs FLOAT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )""",
+    # 날짜별 가동률 예측 (PMS CSV) + 요일/祝日 기본 프로필 (day_type 0=月 .. 6=日, 7=祝日)
+    "occupancy_forecast": """
+        CREATE TABLE IF NOT EXISTS occupancy_forecast (
+            property_id INTEGER NOT NULL REFERENCES properties(id) ON DELETE CASCADE,
+            occ_date DATE NOT NULL,
+            area TEXT NOT NULL,
+            occ FLOAT NOT NULL,
+            PRIMARY KEY (property_id, occ_date, area)
+        )""",
+    "occupancy_profiles": """
+        CREATE TABLE IF NOT EXISTS occupancy_profiles (
+            property_id INTEGER NOT NULL REFERENCES properties(id) ON DELETE CASCADE,
+            area TEXT NOT NULL,
+            day_type INTEGER NOT NULL,
+            occ FLOAT NOT NULL,
+            PRIMARY KEY (property_id, area, day_type)
+        )""",
+    # 재고 이벤트 원장 (추가만 함, ledger.py) + 품목별 월말 체크포인트
+    "inventory_events": """
+        CREATE TABLE IF NOT EXISTS inventory_events (
+            id {id_pk},
+            item_id INTEGER NOT NULL REFERENCES items(id) ON DELETE CASCADE,
+            event_date DATE NOT NULL,
+            kind TEXT NOT NULL,
+            qty INTEGER DEFAULT 0,
+            ref_table TEXT,
+            ref_id INTEGER,
+            note TEXT,
+            recorded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )""",
+    "inventory_checkpoints": """
+        CREATE TABLE IF NOT EXISTS inventory_checkpoints (
+            item_id INTEGER NOT NULL REFERENCES items(id) ON DELETE CASCADE,
+            checkpoint_date DATE NOT NULL,
+            last_count_date DATE,
+            last_count_units INTEGER DEFAULT 0,
+            since_receipts INTEGER DEFAULT 0,
+            since_adjust INTEGER DEFAULT 0,
+            cum_receipts INTEGER DEFAULT 0,
+            cum_adjust INTEGER DEFAULT 0,
+            cum_consumed FLOAT DEFAULT 0.0,
+            cum_days INTEGER DEFAULT 0,
+            intervals INTEGER DEFAULT 0,
+            last_event_id INTEGER DEFAULT 0,
+            PRIMARY KEY (item_id, checkpoint_date)
+        )""",
+    # 추이 차트용 사전 집계 (rollups.py): 품목 / 구역별 일 / 주 단위 재고 / 사용량 / 입고 + 품목별 반영 위치
+    "item_rollups": """
+        CREATE TABLE IF NOT EXISTS item_rollups (
+            item_id INTEGER NOT NULL REFERENCES items(id) ON DELETE CASCADE,
+            grain TEXT NOT NULL,
+            bucket DATE NOT NULL,
+            stock FLOAT,
+            usage FLOAT,
+            arrivals INTEGER DEFAULT 0,
+            counted INTEGER,
+            PRIMARY KEY (item_id, grain, bucket)
+        )""",
+    "area_rollups": """
+        CREATE TABLE IF NOT EXISTS area_rollups (
+            property_id INTEGER NOT NULL REFERENCES properties(id) ON DELETE CASCADE,
+            area TEXT NOT NULL,
+            grain TEXT NOT NULL,
+            bucket DATE NOT NULL,
+            stock FLOAT,
+            usage FLOAT,
+            arrivals INTEGER DEFAULT 0,
+            items INTEGER DEFAULT 0,
+            PRIMARY KEY (property_id, area, grain, bucket)
+        )""",
+    "rollup_state": """
+        CREATE TABLE IF NOT EXISTS rollup_state (
+            item_id INTEGER PRIMARY KEY REFERENCES items(id) ON DELETE CASCADE,
+            last_event_id INTEGER DEFAULT 0,
+            built_through DATE
+        )""",
+}
+
+# 나중에 추가된 컬럼: (테이블, 컬럼, 선언, 참조). 참조는 Postgres 에서만 붙임
+# (SQLite 는 ALTER 로 추가하는 컬럼에 기본값이 NULL 이 아닌 REFERENCES 를 붙일 수 없음)
+PROPERTY_FK = "properties(id)"
+COLUMNS = [
+    ("items", "target_area", "TEXT DEFAULT 'ALL'", None),
+    ("items", "units_per_room", "FLOAT DEFAULT 0.0", None),
+    # 仕入先 (발주서 묶음 단위) / 최소 발주 수량 (CS, CS 가 없는 품목은 箱)
+    ("items", "supplier", "TEXT", None),
+    ("items", "min_order_cs", "INTEGER DEFAULT 0", None),
+    ("items", "property_id", "INTEGER NOT NULL DEFAULT {pid}", PROPERTY_FK),
+    ("snapshots", "property_id", "INTEGER NOT NULL DEFAULT {pid}", PROPERTY_FK),
+    ("deliveries", "property_id", "INTEGER NOT NULL DEFAULT {pid}", PROPERTY_FK),
+    # 입고 예정 상태: confirmed (발주 완료) / draft (발주 기한으로 만든 초안, 재고 계산에서 제외)
+    ("deliveries", "status", "TEXT NOT NULL DEFAULT 'confirmed'", None),
+    # 발주서 번호 (같은 仕入先 / 발주일 초안을 한 장으로 묶음)
+    ("deliveries", "po_ref", "TEXT", None),
+    ("item_stock_state", "usage_std", "FLOAT DEFAULT 0.0", None),
+    ("order_plans", "property_id", "INTEGER NOT NULL DEFAULT {pid}", PROPERTY_FK),
+    ("order_plans", "stockout_date", "DATE", None),
+    ("order_plans", "min_balance", "FLOAT", None),
+    ("order_plans", "days_of_cover", "INTEGER", None),
+    ("order_plans", "lead_time_days", "FLOAT", None),
+    ("order_plans", "reorder_point", "FLOAT", None),
+    ("order_plans", "order_by_date", "DATE", None),
+    ("order_plans", "order_qty_cs", "INTEGER", None),
+    ("order_plans", "order_qty_box", "INTEGER", None),
+    ("order_plans", "order_total_units", "INTEGER", None),
+    # 동시 입력: 품목 수정 낙관적 잠금 버전 / 조사자 (기존 행은 NULL) / 클라이언트가 만든 멱등 키
+    ("items", "row_version", "INTEGER NOT NULL DEFAULT 1", None),
+    ("snapshots", "counter", "TEXT", None),
+    ("snapshots", "idempotency_key", "TEXT", None),
+    ("deliveries", "idempotency_key", "TEXT", None),
+]
+
+# 최신 재고 / 기간 조회용 인덱스 (시설별 조회는 property_id 로 시작하는 인덱스만 범위 스캔)
+INDEXES = [
+    "CREATE INDEX IF NOT EXISTS ix_snapshots_prop_item_date ON snapshots (property_id, item_id, snap_date DESC, id DESC)",
+    "CREATE INDEX IF NOT EXISTS ix_snapshots_prop_date_id ON snapshots (property_id, snap_date DESC, id DESC)",
+    "CREATE INDEX IF NOT EXISTS ix_deliveries_prop_arrival ON deliveries (property_id, arrival_date, item_id)",
+    "CREATE INDEX IF NOT EXISTS ix_items_property ON items (property_id, id)",
+    # 전체 시설 집계용
+    "CREATE INDEX IF NOT EXISTS ix_deliveries_arrival_item ON deliveries (arrival_date, item_id)",
+    "CREATE INDEX IF NOT EXISTS ix_snapshots_date_id ON snapshots (snap_date DESC, id DESC)",
+    "CREATE INDEX IF NOT EXISTS ix_order_plans_date ON order_plans (plan_date, horizon_days)",
+    # UPSERT 대상 (ON CONFLICT). NULL 은 서로 다른 값으로 취급 -> counter / 키가 없는 기존 행은 그대로 둠
+    "CREATE UNIQUE INDEX IF NOT EXISTS ux_snapshots_item_date_counter ON snapshots (item_id, snap_date, counter)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ux_deliveries_idempotency_key ON deliveries (idempotency_key)",
+    # 원장: 품목별 기간 (체크포인트 이후 꼬리) / ref 별 최신 이벤트
+    "CREATE INDEX IF NOT EXISTS ix_events_item_date ON inventory_events (item_id, event_date, id)",
+    "CREATE INDEX IF NOT EXISTS ix_events_ref ON inventory_events (ref_table, ref_id, id)",
+]
+DROPPED_INDEXES = ["ix_snapshots_item_date"]
+
+# 수량 컬럼 (기존 SQLite 파일의 BLOB 정수 변환 대상)
+QTY_COLUMNS = {"snapshots": ["qty_cs", "qty_box", "total_units"], "deliveries": ["qty_cs", "qty_box", "total_units"]}
+
+
+def _pick(table, dialect):
+    return table.get(dialect, table["default"])
+
+
+def add_column(conn, table, col, decl, ref=None):
+    # 없을 때만 추가 -> 추가했으면 True
+    if col in {c["name"] for c in inspect(conn).get_columns(table)}:
+        return False
+    if conn.dialect.name == "postgresql":
+        # 여러 프로세스가 동시에 올려도 실패하지 않도록
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {col} {decl}" + (f" REFERENCES {ref}" if ref else "")))
+    else:
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {col} {decl}"))
+    return True
+
+
+def _text_dates_to_date(conn):
+    # [Postgres] 예전 TEXT 날짜 컬럼 -> DATE
+    rows = conn.execute(text("""
+        SELECT table_name, column_name FROM information_schema.columns
+        WHERE table_name IN ('snapshots', 'deliveries')
+          AND column_name IN ('snap_date', 'order_date', 'arrival_date')
+          AND data_type = 'text' AND table_schema = current_schema()
+    """)).fetchall()
+    for table, col in rows:
+        conn.execute(text(f"ALTER TABLE {table} ALTER COLUMN {col} TYPE DATE USING NULLIF({col}, '')::date"))
+
+
+def _blob_ints_to_int(conn):
+    # [SQLite] 예전 파일은 numpy int64 를 그대로 넣어 수량이 8바이트 BLOB (little-endian) 으로 저장됨
+    n = 0
+    for table, cols in QTY_COLUMNS.items():
+        for col in cols:
+            rows = conn.execute(text(f"SELECT id, {col} FROM {table} WHERE typeof({col}) = 'blob'")).fetchall()
+            if rows:
+                conn.execute(text(f"UPDATE {table} SET {col} = :v WHERE id = :id"),
+                             [{"id": r[0], "v": int.from_bytes(r[1], "little", signed=True)} for r in rows])
+                n += len(rows)
+    return n
+
+
+def stored_version(conn):
+    # 기록된 스키마 버전 (버전 관리 이전 DB / 빈 DB = 0)
+    if not inspect(conn).has_table("schema_version"):
+        return 0
+    return conn.execute(text("SELECT COALESCE(MAX(version), 0) FROM schema_version")).scalar()
+
+
+def migrate(engine, default_property_id=1, force=False):
+    # 최신이면 아무것도 안 함 -> False. force=True 면 버전과 상관없이 전체 단계를 다시 실행
+    with engine.connect() as conn:
+        if not force and stored_version(conn) >= SCHEMA_VERSION:
+            return False
+    with engine.begin() as conn:
+        if engine.dialect.name == "postgresql":
+            conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MIGRATE_LOCK_KEY})
+            # 락을 기다리는 동안 다른 프로세스가 끝냈을 수 있음
+            if not force and stored_version(conn) >= SCHEMA_VERSION:
+                return False
+        _apply(conn, default_property_id)
+        conn.execute(text(VERSION_TABLE))
+        conn.execute(text("INSERT INTO schema_version (version) VALUES (:v) ON CONFLICT (version) DO NOTHING"),
+                     {"v": SCHEMA_VERSION})
+    return True
+
+
+def _apply(conn, default_property_id):
+    # 모든 단계가 멱등 (몇 번 실행해도 같은 결과)
+    dialect = conn.dialect.name
+    id_pk = _pick(ID_PK, dialect)
+    for ddl in TABLES.values():
+        conn.execute(text(ddl.format(id_pk=id_pk)))
+
+    # [자동 마이그레이션] 기존 단일 시설 데이터는 기본 시설(id=1)로 편입
+    # property_id 컬럼 추가 (Postgres 는 REFERENCES 를 기존 행으로 바로 검사) 보다 먼저 기본 시설을 넣어 둠
+    conn.execute(text("INSERT INTO properties (id, code, name) VALUES (:id, 'MAIN', '本館') ON CONFLICT (id) DO NOTHING"),
+                 {"id": default_property_id})
+    if dialect == "postgresql":
+        conn.execute(text("SELECT setval(pg_get_serial_sequence('properties', 'id'), (SELECT MAX(id) FROM properties))"))
+    if not conn.execute(text("SELECT 1 FROM property_areas WHERE property_id = :id"), {"id": default_property_id}).first():
+        conn.execute(text("INSERT INTO property_areas (property_id, area, rooms, ref_occ) VALUES (:pid, :area, :rooms, :ref)"),
+                     [{"pid": default_property_id, "area": a, "rooms": r, "ref": forecast_engine.AREA_REF_OCC[a]}
+                      for a, r in forecast_engine.AREA_ROOMS.items()])
+
+    for table, col, decl, ref in COLUMNS:
+        add_column(conn, table, col, decl.format(pid=default_property_id), ref)
+
+    if dialect == "postgresql":
+        _text_dates_to_date(conn)
+    elif dialect == "sqlite":
+        _blob_ints_to_int(conn)
+
+    for name in DROPPED_INDEXES:
+        conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+    for ddl in INDEXES:
+        conn.execute(text(ddl))
+    ledger.seed(conn)
@@ -0,0 +1,101 @@
+import io
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+# ==========================================
+# 재고 일괄 입력 / 핸디 스캐너 파일 가져오기
+# ==========================================
+CHUNK_ROWS = 500
+
+# 스캐너 export / 수기 엑셀에서 쓰이는 컬럼명 -> 내부 컬럼명
+COLUMN_ALIASES = {
+    "item_id": "item_id", "id": "item_id", "品目ID": "item_id",
+    "name": "name", "item": "name", "品目": "name", "品目名": "name",
+    "cs": "qty_cs", "qty_cs": "qty_cs", "CS": "qty_cs",
+    "box": "qty_box", "qty_box": "qty_box", "箱": "qty_box", "箱/袋": "qty_box",
+    "date": "snap_date", "snap_date": "snap_date", "日付": "snap_date",
+    "note": "note", "備考": "note",
+}
+
+
+def iter_upload_chunks(file, filename, chunksize=CHUNK_ROWS):
+    # CSV 는 chunksize 로 스트리밍, Excel 은 한 번 읽은 뒤 같은 크기로 잘라서 전달
+    if filename.lower().endswith((".xlsx", ".xls")):
+        df = pd.read_excel(file, dtype=str)
+        for start in range(0, len(df), chunksize):
+            yield df.iloc[start:start + chunksize]
+        return
+    if isinstance(file, (bytes, bytearray)):
+        file = io.BytesIO(file)
+    yield from pd.read_csv(file, dtype=str, chunksize=chunksize, encoding_errors="replace")
+
+
+def normalize_columns(df):
+    renamed = {c: COLUMN_ALIASES.get(str(c).strip(), COLUMN_ALIASES.get(str(c).strip().lower())) for c in df.columns}
+    out = df.rename(columns={c: n for c, n in renamed.items() if n})
+    return out.loc[:, ~out.columns.duplicated()]
+
+
+def validate_counts(df, items, default_date=None, row_offset=0):
+    # df: 입력 행 (name 또는 item_id, qty_cs, qty_box, [snap_date], [note])
+    # items: 품목 마스터 (id, name, cs_total_units, units_per_box)
+    # -> (저장할 레코드 DataFrame, 오류 DataFrame[row, reason]) ; 오류 행이 있어도 나머지는 저장 가능
+    df = normalize_columns(df).reset_index(drop=True)
+    rows = pd.Series(np.arange(len(df)) + row_offset + 1)
+    reason = pd.Series("", index=df.index, dtype=object)
+
+    def flag(mask, msg):
+        mask = mask & (reason == "")
+        reason[mask] = msg
+
+    # 품목 특정: item_id 우선, 없으면 품목명
+    ids_by_name = items.drop_duplicates("name").set_index("name")["id"]
+    item_id = pd.Series(np.nan, index=df.index)
+    if "item_id" in df.columns:
+        item_id = pd.to_numeric(df["item_id"], errors="coerce")
+    if "name" in df.columns:
+        item_id = item_id.fillna(df["name"].astype(str).str.strip().map(ids_by_name))
+    item_id = item_id.where(item_id.isin(items["id"]))
+    flag(item_id.isna(), "unknown item")
+
+    qty = {}
+    for col in ["qty_cs", "qty_box"]:
+        raw = df[col] if col in df.columns else pd.Series(None, index=df.index, dtype=object)
+        blank = raw.isna() | (raw.astype(str).str.strip() == "")
+        num = pd.to_numeric(raw, errors="coerce")
+        flag(~blank & (num.isna() | (num < 0) | (num % 1 != 0)), f"invalid {col}")
+        qty[col] = num.where(~blank, 0).fillna(0)
+    if "qty_cs" not in df.columns and "qty_box" not in df.columns:
+        flag(pd.Series(True, index=df.index), "no quantity columns")
+
+    if "snap_date" in df.columns:
+        given = df["snap_date"].notna() & (df["snap_date"].astype(str).str.strip() != "")
+        parsed = pd.to_datetime(df["snap_date"], errors="coerce")
+        flag(given & parsed.isna(), "invalid date")
+        snap_date = parsed.dt.date.where(given, default_date)
+    else:
+        snap_date = pd.Series([default_date] * len(df), index=df.index, dtype=object)
+    flag(snap_date.isna(), "missing date")
+    flag(pd.to_datetime(snap_date, errors="coerce") > pd.Timestamp(date.today()), "future date")
+
+    ok = reason == ""
+    sizes = items.set_index("id")[["cs_total_units", "units_per_box"]]
+    iid = item_id[ok].astype(int)
+    qc = qty["qty_cs"][ok].astype(int)
+    qb = qty["qty_box"][ok].astype(int)
+    cs_size = pd.to_numeric(iid.map(sizes["cs_total_units"]), errors="coerce").fillna(0)
+    box_size = pd.to_numeric(iid.map(sizes["units_per_box"]), errors="coerce").fillna(0)
+    note = df["note"].fillna("").astype(str) if "note" in df.columns else pd.Series("", index=df.index)
+
+    records = pd.DataFrame({
+        "iid": iid,
+        "dt": pd.to_datetime(snap_date[ok]).dt.strftime("%Y-%m-%d"),
+        "qc": qc,
+        "qb": qb,
+        "tot": (qc * cs_size + qb * box_size).astype(int),
+        "note": note[ok],
+    }).drop_duplicates(["iid", "dt"], keep="last")
+    errors = pd.DataFrame({"row": rows[~ok].to_numpy(), "reason": reason[~ok].to_numpy()})
+    return records, errors
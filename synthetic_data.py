@@ -0,0 +1,263 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, text
+
+import forecast_engine
+import jp_holidays
+import ledger
+import schema
+
+# ==========================================
+# 합성 이력 데이터 (오프라인 백테스트 / 벤치마크용 SQLite)
+# ==========================================
+# - 구역별 일 가동률: 연간 계절성 + 요일 효과 + 祝日 전날 (JAPAN_HOLIDAYS, 표에 없는 해는 같은 월일) + 노이즈
+# - 품목별 일 사용량: 객실 연동 품목은 객실 수 x 가동률 x 1실당 사용수, 나머지는 일정 사용량 x 노이즈
+# - 재고가 발주점 밑으로 내려가면 발주 -> 리드타임 (품목별 평균 + 노이즈) 후 입고 (deliveries). 일요일 / 祝日 입고는 다음 영업일로
+# - 재고 조사 (snapshots, 월말은 전 품목, 가끔 세기 실수): counts = "mixed" 주 1~3회 불규칙 / "weekly" 매주 월요일 / "daily" 매일
+# write_sqlite: 기존 inventory.db 스키마 + 이후 추가된 컬럼 (없으면 ALTER 로 추가) -> 레거시 파일 / 백테스트용
+# write_db: 현재 스키마 (schema.migrate) 의 SQLite / Postgres 에 쓰고 원장 이벤트까지 (벤치마크용)
+COUNT_MODES = ["mixed", "weekly", "daily"]
+
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS items (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        unit TEXT,
+        cs_total_units INTEGER DEFAULT 0,
+        units_per_box INTEGER DEFAULT 0,
+        boxes_per_cs INTEGER DEFAULT 0,
+        safety_stock INTEGER DEFAULT 0
+    )""",
+    """CREATE TABLE IF NOT EXISTS snapshots (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        item_id INTEGER,
+        snap_date TEXT,
+        qty_cs INTEGER DEFAULT 0,
+        qty_box INTEGER DEFAULT 0,
+        total_units INTEGER DEFAULT 0,
+        note TEXT,
+        FOREIGN KEY(item_id) REFERENCES items(id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS deliveries (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        item_id INTEGER,
+        order_date TEXT,
+        arrival_date TEXT,
+        qty_cs INTEGER DEFAULT 0,
+        qty_box INTEGER DEFAULT 0,
+        total_units INTEGER DEFAULT 0,
+        note TEXT,
+        FOREIGN KEY(item_id) REFERENCES items(id)
+    )""",
+]
+EXTRA_COLUMNS = {
+    "items": {"target_area": "TEXT DEFAULT 'ALL'", "units_per_room": "FLOAT DEFAULT 0.0", "supplier": "TEXT",
+              "min_order_cs": "INTEGER DEFAULT 0", "property_id": "INTEGER DEFAULT 1"},
+    "snapshots": {"property_id": "INTEGER DEFAULT 1"},
+    "deliveries": {"property_id": "INTEGER DEFAULT 1", "status": "TEXT DEFAULT 'confirmed'", "po_ref": "TEXT"},
+}
+SUPPLIERS = ["SUP-A", "SUP-B", "SUP-C", "SUP-D"]
+# write_db(replace=True) 로 비우는 테이블 (품목을 참조하는 쪽부터)
+ITEM_TABLES = ["rollup_state", "item_rollups", "area_rollups", "inventory_checkpoints", "inventory_events",
+               "item_stock_state", "order_plans", "deliveries", "snapshots", "items"]
+
+
+def ensure_schema(engine):
+    with engine.begin() as conn:
+        for ddl in SCHEMA:
+            conn.execute(text(ddl))
+        for table, cols in EXTRA_COLUMNS.items():
+            have = {r[1] for r in conn.execute(text(f"PRAGMA table_info({table})"))}
+            for col, decl in cols.items():
+                if col not in have:
+                    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {col} {decl}"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_snapshots_item_date ON snapshots (item_id, snap_date)"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_deliveries_arrival_item ON deliveries (arrival_date, item_id)"))
+
+
+def holidays(dates):
+    # 祝日 bool 배열. JAPAN_HOLIDAYS 에 없는 해는 표에 있는 월일을 그대로 씀 (이력을 몇 년씩 만들 때)
+    dates = pd.DatetimeIndex(dates)
+    covered = {k[:4] for k in jp_holidays.JAPAN_HOLIDAYS}
+    month_days = {k[5:] for k in jp_holidays.JAPAN_HOLIDAYS}
+    outside = ~dates.strftime("%Y").isin(list(covered))
+    return jp_holidays.is_holiday(dates) | (outside & dates.strftime("%m-%d").isin(list(month_days)))
+
+
+def closed_days(start, days):
+    # 입고 불가일 (일요일 / 祝日) -> 다음 영업일 인덱스 (days,)
+    dates = pd.date_range(start, periods=days)
+    closed = (dates.weekday == 6) | holidays(dates)
+    nxt = np.arange(days)
+    for i in range(days - 2, -1, -1):
+        if closed[i]:
+            nxt[i] = nxt[i + 1]
+    return nxt
+
+
+def occupancy_series(days, start, rng):
+    # 구역별 일 가동률 (days,) dict
+    d = np.arange(days)
+    doy = np.array([(start + timedelta(days=int(i))).timetuple().tm_yday for i in d])
+    weekday = np.array([(start + timedelta(days=int(i))).weekday() for i in d])
+    season = 0.08 * np.sin(2 * np.pi * (doy - 100) / 365.0)
+    weekend = np.where(weekday >= 4, 0.06, -0.02)
+    # 평일 祝日 전날 밤은 주말 수준으로
+    eve = holidays(pd.date_range(start + timedelta(days=1), periods=days)) & (weekday < 4)
+    weekend = np.where(eve, 0.06, weekend)
+    out = {}
+    for area, ref in forecast_engine.AREA_REF_OCC.items():
+        out[area] = np.clip(ref + season + weekend + rng.normal(0, 0.04, days), 0.2, 1.0)
+    return out
+
+
+def generate(n_items=200, years=3, end=None, seed=0, counts="mixed"):
+    # -> (items, snapshots, deliveries) DataFrame (id 는 1부터). end 이후에 도착하는 입고 = 입고 예정
+    if counts not in COUNT_MODES:
+        raise ValueError(f"counts must be one of {COUNT_MODES}")
+    rng = np.random.default_rng(seed)
+    end = end or date.today()
+    days = int(365 * years)
+    start = end - timedelta(days=days - 1)
+    occ = occupancy_series(days, start, rng)
+
+    ids = np.arange(1, n_items + 1)
+    area = rng.choice(["ALL", "STD", "HAK"], size=n_items, p=[0.5, 0.35, 0.15])
+    room_linked = rng.random(n_items) < 0.6
+    upr = np.where(room_linked, rng.integers(1, 30, n_items) / 10.0, 0.0)
+    base_rate = rng.uniform(2, 60, n_items)
+    cs = rng.choice([0, 12, 24, 48, 100], size=n_items, p=[0.15, 0.25, 0.3, 0.2, 0.1])
+    bpc = np.where(cs > 0, rng.choice([0, 2, 4, 6], size=n_items), 0)
+    upb = np.where(bpc > 0, cs // np.maximum(bpc, 1), rng.choice([0, 6, 10], size=n_items))
+    lead_mean = rng.integers(2, 15, n_items)
+    lead_sd = rng.uniform(0, 2.5, n_items)
+    items = pd.DataFrame({
+        "id": ids,
+        "name": [f"SYN-{i:05d}" for i in ids],
+        "target_area": area,
+        "unit": rng.choice(["本", "枚", "個", "袋"], size=n_items),
+        "units_per_room": upr,
+        "cs_total_units": cs,
+        "units_per_box": upb,
+        "boxes_per_cs": bpc,
+        "supplier": rng.choice(SUPPLIERS, size=n_items),
+        "min_order_cs": rng.integers(0, 3, n_items),
+    })
+
+    # 일 사용량 (품목 x 날짜)
+    rooms = np.array([forecast_engine.AREA_ROOMS[a] for a in area], dtype=float)
+    occ_m = np.vstack([occ[a] for a in area])
+    usage = np.where(room_linked[:, None], rooms[:, None] * occ_m * upr[:, None], base_rate[:, None])
+    usage = np.clip(usage * rng.lognormal(0, 0.25, usage.shape), 0, None)
+    mean_use = usage.mean(axis=1)
+    safety = np.round(mean_use * rng.uniform(1, 3, n_items))
+    items["safety_stock"] = safety.astype(int)
+    reorder = mean_use * (lead_mean + 3) + safety
+    lot = np.maximum(mean_use * rng.integers(10, 40, n_items), 1)
+    lot = np.where(cs > 0, np.ceil(lot / np.maximum(cs, 1)) * cs, np.ceil(lot))
+
+    # 일 단위 시뮬레이션 (날짜 루프, 품목 방향은 벡터)
+    stock = reorder + lot
+    pending = np.zeros((n_items, days + 60))
+    next_open = closed_days(start, pending.shape[1])
+    in_transit = np.zeros(n_items)
+    deliveries, snaps = [], []
+    count_prob = rng.uniform(1 / 7, 3 / 7, n_items)
+    for d in range(days):
+        today = start + timedelta(days=d)
+        arrived = pending[:, d]
+        stock = np.clip(stock + arrived - usage[:, d], 0, None)
+        in_transit -= arrived
+        # 재고 조사 (월말은 전 품목, 가끔 세기 실수)
+        month_end = (today + timedelta(days=1)).day == 1
+        if counts == "mixed":
+            counted = np.flatnonzero(month_end | (rng.random(n_items) < count_prob))
+        elif counts == "daily" or month_end or today.weekday() == 0:
+            counted = ids - 1
+        else:
+            counted = ids[:0]
+        noise = np.where(rng.random(len(counted)) < 0.02, rng.uniform(0.5, 1.5, len(counted)), 1.0)
+        snaps.append(pd.DataFrame({"item_id": ids[counted], "snap_date": today,
+                                   "total_units": np.round(stock[counted] * noise)}))
+        # 발주 (입고 대기분이 없고 재고가 발주점 미만)
+        need = np.flatnonzero((stock + in_transit < reorder) & (in_transit <= 0))
+        if len(need):
+            lt = np.maximum(1, np.round(rng.normal(lead_mean[need], lead_sd[need]))).astype(int)
+            lt = next_open[np.minimum(d + lt, pending.shape[1] - 1)] - d
+            pending[need, d + lt] += lot[need]
+            in_transit[need] += lot[need]
+            deliveries.append(pd.DataFrame({"item_id": ids[need], "order_date": today,
+                                            "arrival_date": [today + timedelta(days=int(x)) for x in lt], "total_units": lot[need]}))
+
+    snaps = pd.concat(snaps, ignore_index=True)
+    snaps = snaps.merge(items[["id", "cs_total_units", "units_per_box"]], left_on="item_id", right_on="id").drop(columns="id")
+    snaps["total_units"] = snaps["total_units"].astype(int)
+    csz, bsz = snaps["cs_total_units"].to_numpy(), snaps["units_per_box"].to_numpy()
+    snaps["qty_cs"] = np.where(csz > 0, snaps["total_units"] // np.maximum(csz, 1), 0).astype(int)
+    rest = snaps["total_units"].to_numpy() - snaps["qty_cs"].to_numpy() * csz
+    snaps["qty_box"] = np.where(bsz > 0, rest // np.maximum(bsz, 1), 0).astype(int)
+    snaps["note"] = ""
+    snaps = snaps.drop(columns=["cs_total_units", "units_per_box"])
+
+    deliveries = (pd.concat(deliveries, ignore_index=True) if deliveries
+                  else pd.DataFrame(columns=["item_id", "order_date", "arrival_date", "total_units"]))
+    dcs = items.set_index("id").loc[deliveries["item_id"], "cs_total_units"].to_numpy()
+    deliveries["qty_cs"] = np.where(dcs > 0, deliveries["total_units"] // np.maximum(dcs, 1), 0).astype(int)
+    deliveries["qty_box"] = 0
+    deliveries["total_units"] = deliveries["total_units"].astype(int)
+    deliveries["note"] = "synthetic"
+    deliveries["status"] = "confirmed"
+    return items, snaps, deliveries
+
+
+def write_sqlite(path, items, snaps, deliveries, replace=False):
+    # replace=True 면 기존 items / snapshots / deliveries 행을 지우고 새로 씀
+    engine = create_engine(f"sqlite:///{path}")
+    ensure_schema(engine)
+    with engine.begin() as conn:
+        if replace:
+            for table in ["deliveries", "snapshots", "items"]:
+                conn.execute(text(f"DELETE FROM {table}"))
+        offset = conn.execute(text("SELECT COALESCE(MAX(id), 0) FROM items")).scalar()
+    items = items.assign(id=items["id"] + offset)
+    snaps = snaps.assign(item_id=snaps["item_id"] + offset)
+    deliveries = deliveries.assign(item_id=deliveries["item_id"] + offset)
+    for df, table in [(items, "items"), (snaps, "snapshots"), (deliveries, "deliveries")]:
+        out = df.copy()
+        for c in ["snap_date", "order_date", "arrival_date"]:
+            if c in out.columns:
+                out[c] = pd.to_datetime(out[c]).dt.strftime("%Y-%m-%d")
+        out.to_sql(table, engine, if_exists="append", index=False, chunksize=20_000)
+    engine.dispose()
+    return len(items), len(snaps), len(deliveries)
+
+
+def write_db(url, items, snaps, deliveries, replace=False, property_id=1):
+    # 현재 스키마로 올린 DB (SQLite / Postgres) 에 씀 + 원장 이벤트 -> (품목, 조사, 입고) 건수
+    # replace=True 면 품목과 품목에 딸린 행 (이력 / 원장 / 집계) 을 모두 지움 (벤치마크 전용 DB 에만)
+    # 끝나면 item_stock_state / 추이 집계를 다시 만들 것 (manage.py generate-data 는 자동)
+    engine = create_engine(url)
+    schema.migrate(engine, property_id)
+    with engine.begin() as conn:
+        if replace:
+            for table in ITEM_TABLES:
+                conn.execute(text(f"DELETE FROM {table}"))
+        offset = conn.execute(text("SELECT COALESCE(MAX(id), 0) FROM items")).scalar()
+        ids = items["id"] + offset
+        frames = {
+            "items": items.assign(id=ids, name=[f"SYN-{i:05d}" for i in ids], property_id=property_id),
+            "snapshots": snaps.assign(item_id=snaps["item_id"] + offset, property_id=property_id),
+            "deliveries": deliveries.assign(item_id=deliveries["item_id"] + offset, property_id=property_id),
+        }
+        for table, df in frames.items():
+            for c in ["snap_date", "order_date", "arrival_date"]:
+                if c in df.columns:
+                    df[c] = pd.to_datetime(df[c]).dt.date
+            df.to_sql(table, conn, if_exists="append", index=False, chunksize=20_000)
+        if engine.dialect.name == "postgresql":
+            conn.execute(text("SELECT setval(pg_get_serial_sequence('items', 'id'), (SELECT MAX(id) FROM items))"))
+        ledger.seed(conn, after_item_id=offset)
+    engine.dispose()
+    return len(items), len(snaps), len(deliveries)
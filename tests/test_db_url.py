@@ -0,0 +1,28 @@
+# 접속 대상: 환경변수 / st.secrets 가 없으면 예비 값 없이 명확한 오류
+import pytest
+
+import db
+
+
+@pytest.fixture
+def no_db_url(monkeypatch, tmp_path):
+    # 현재 디렉터리 / 홈에 secrets.toml 이 없는 상태
+    monkeypatch.delenv("INVENTORY_DB_URL", raising=False)
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.chdir(tmp_path)
+    yield
+    db.set_db_url(None)
+
+
+def test_env_var_wins(no_db_url, monkeypatch):
+    monkeypatch.setenv("INVENTORY_DB_URL", "sqlite:///x.db")
+    assert db._resolve_db_url() == "sqlite:///x.db"
+
+
+def test_missing_url_fails_clearly(no_db_url):
+    assert db._resolve_db_url() is None
+    db.set_db_url(None)
+    with pytest.raises(RuntimeError, match="INVENTORY_DB_URL"):
+        db.init_db()
+    with pytest.raises(RuntimeError, match="INVENTORY_DB_URL"):
+        db.get_engine()
@@ -0,0 +1,44 @@
+# 저장된 최신 계획: 시설마다 (예측 일수 / 실적 기간 조건 안에서) 가장 최근 실행 1건, 품목당 1행
+from datetime import date
+
+import pandas as pd
+
+import forecast_service
+
+
+def plan_for(items, units):
+    return pd.DataFrame({"property_id": items["property_id"].astype(int), "item_id": items["id"].astype(int),
+                         "current_stock": 0.0, "order_units": float(units)})
+
+
+def one_per_item(df):
+    return not df.duplicated(["property_id", "item_id"]).any()
+
+
+def test_latest_plan_per_property_and_filters(app_db):
+    db = app_db
+    annex = db.add_property("ANNEX", "別館", {"ALL": (20, 0.8)})
+    db.add_item("タオル", "ALL", 1.0, "枚", 100, 0, 0, 0)
+    db.add_item("石鹸", "ALL", 1.0, "個", 10, 0, 0, 0, property_id=annex)
+    main, other = db.get_items_df(1), db.get_items_df(annex)
+
+    forecast_service.save_plan(plan_for(main, 1), 14, 7, date(2025, 3, 1))
+    forecast_service.save_plan(plan_for(main, 2), 30, 7, date(2025, 3, 1))
+    forecast_service.save_plan(plan_for(main, 5), 30, 30, date(2025, 3, 2))
+    forecast_service.save_plan(plan_for(main, 3), 14, 30, date(2025, 3, 2))
+    forecast_service.save_plan(plan_for(other, 4), 14, 7, date(2025, 2, 1))  # 별관은 배치가 멈춘 상태
+
+    # 시설마다 자기 최신 계획일 (전체 MAX 가 아님), 같은 날 조건이 다른 실행은 나중에 저장한 1건만
+    latest = forecast_service.get_latest_plan()
+    assert one_per_item(latest)
+    got = {(int(r.property_id), str(r.plan_date)[:10], int(r.usage_days), int(r.horizon_days), float(r.order_units))
+           for r in latest.itertuples()}
+    assert got == {(1, "2025-03-02", 14, 30, 3.0), (annex, "2025-02-01", 14, 7, 4.0)}
+
+    # 최신 실행은 조건 안에서 고름
+    h7 = forecast_service.get_latest_plan(horizon=7, property_id=1)
+    assert one_per_item(h7) and h7["order_units"].astype(float).tolist() == [2.0]
+    h7d14 = forecast_service.get_latest_plan(horizon=7, property_id=1, usage_days=14)
+    assert h7d14["order_units"].astype(float).tolist() == [1.0] and int(h7d14["usage_days"].iloc[0]) == 14
+    assert forecast_service.get_latest_plan(horizon=7, property_id=annex)["order_units"].astype(float).tolist() == [4.0]
+    assert forecast_service.get_latest_plan(horizon=90).empty
@@ -0,0 +1,84 @@
+# 원장 뒤처리 작업 (추이 집계 갱신 / 월말 압축) 이 진행 중인 쓰기를 막거나 놓치지 않는지 [Postgres]
+# SQLite 는 쓰기 트랜잭션이 원래 하나씩이라 해당 없음
+import threading
+from datetime import date, timedelta
+
+import pytest
+
+import ledger
+
+
+@pytest.fixture
+def pg_db(app_db):
+    if app_db.dialect_name() != "postgresql":
+        pytest.skip("concurrent writers need Postgres")
+    return app_db
+
+
+def in_thread(fn, timeout=20):
+    # fn 을 다른 스레드에서 실행 -> (끝났는지, 결과)
+    out = {}
+    t = threading.Thread(target=lambda: out.setdefault("value", fn()), daemon=True)
+    t.start()
+    t.join(timeout)
+    return not t.is_alive(), out.get("value")
+
+
+def open_writer(db, item_id, day, qty=5):
+    # 품목을 잠그고 원장에 추가한 채 커밋하지 않은 쓰기 (add_adjustment 의 도중) -> (conn, trans)
+    conn = db.get_engine().connect()
+    trans = conn.begin()
+    db._lock_items(conn, [item_id])
+    ledger.record_adjustment(conn, item_id, day, qty)
+    return conn, trans
+
+
+def add_items(db, n):
+    for i in range(n):
+        db.add_item(f"品目{i}", "ALL", 0.0, "個", 10, 0, 0, 0)
+    return db.get_items_df()["id"].astype(int).tolist()
+
+
+def test_refresh_does_not_block_writers_or_miss_their_events(pg_db):
+    db = pg_db
+    a, x = add_items(db, 2)
+    today = date.today().isoformat()
+    db.add_adjustment(a, today, 1)
+    assert db.refresh_rollups() == 1
+
+    # x 의 첫 이벤트가 커밋되지 않은 상태에서 a 에 이벤트 추가 후 갱신 -> 기다리지 않고 끝남
+    conn, trans = open_writer(db, x, today)
+    try:
+        db.add_adjustment(a, today, 2)
+        done, n = in_thread(db.refresh_rollups)
+        assert done, "refresh_rollups waited for an unrelated writer"
+        assert n == 1
+    finally:
+        trans.commit()
+        conn.close()
+
+    # a 의 반영 위치가 x 의 이벤트 id 를 넘었어도 다음 갱신에서 x 를 처음부터 만듦
+    assert db.refresh_rollups() == 1
+    built = db.read_df("SELECT item_id, last_event_id FROM rollup_state ORDER BY item_id")
+    x_event = db.read_df(f"SELECT MAX(id) AS id FROM inventory_events WHERE item_id = {x}")["id"].iloc[0]
+    assert built["item_id"].tolist() == [a, x]
+    assert int(built.set_index("item_id").loc[x, "last_event_id"]) == int(x_event)
+
+
+def test_compact_locks_only_items_with_events_to_fold(pg_db):
+    db = pg_db
+    a, x = add_items(db, 2)
+    last_month = (ledger.last_closed_month_end() - timedelta(days=3)).isoformat()
+    db.add_adjustment(a, last_month, 3)
+
+    # x 는 이번 달 쓰기 중 (접을 이벤트 없음) -> 압축은 기다리지 않음
+    conn, trans = open_writer(db, x, date.today().isoformat())
+    try:
+        done, n = in_thread(db.compact_ledger)
+        assert done, "compact_ledger waited for a writer on an item with nothing to fold"
+        assert n == 1
+    finally:
+        trans.commit()
+        conn.close()
+    cps = db.read_df("SELECT item_id FROM inventory_checkpoints")["item_id"].astype(int).tolist()
+    assert cps == [a]
@@ -0,0 +1,109 @@
+# 스키마 마이그레이션: 최초 버전 (단일 시설, TEXT 날짜, property_id 없음) 모양의 DB 에 행이 있는 상태에서 올림
+import os
+import shutil
+from datetime import date
+
+from sqlalchemy import create_engine, inspect, text
+
+import schema
+
+# 최초 app.py 의 init_db 가 만들던 테이블
+BASELINE_TABLES = [
+    """CREATE TABLE items (
+        id {id_pk},
+        name TEXT NOT NULL,
+        target_area TEXT DEFAULT 'ALL',
+        unit TEXT,
+        units_per_room FLOAT DEFAULT 0.0,
+        cs_total_units INTEGER DEFAULT 0,
+        units_per_box INTEGER DEFAULT 0,
+        boxes_per_cs INTEGER DEFAULT 0,
+        safety_stock INTEGER DEFAULT 0
+    )""",
+    """CREATE TABLE snapshots (
+        id {id_pk},
+        item_id INTEGER,
+        snap_date TEXT,
+        qty_cs INTEGER DEFAULT 0,
+        qty_box INTEGER DEFAULT 0,
+        total_units INTEGER DEFAULT 0,
+        note TEXT,
+        FOREIGN KEY(item_id) REFERENCES items(id)
+    )""",
+    """CREATE TABLE deliveries (
+        id {id_pk},
+        item_id INTEGER,
+        order_date TEXT,
+        arrival_date TEXT,
+        qty_cs INTEGER DEFAULT 0,
+        qty_box INTEGER DEFAULT 0,
+        total_units INTEGER DEFAULT 0,
+        note TEXT,
+        FOREIGN KEY(item_id) REFERENCES items(id)
+    )""",
+]
+LEGACY_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "inventory.db")
+
+
+def make_baseline(url):
+    engine = create_engine(url)
+    id_pk = schema._pick(schema.ID_PK, engine.dialect.name)
+    with engine.begin() as conn:
+        for ddl in BASELINE_TABLES:
+            conn.execute(text(ddl.format(id_pk=id_pk)))
+        conn.execute(text("INSERT INTO items (name, unit, cs_total_units, safety_stock) VALUES ('タオル', '枚', 100, 50), ('石鹸', '個', 0, 10)"))
+        conn.execute(text("""
+            INSERT INTO snapshots (item_id, snap_date, qty_cs, total_units, note) VALUES
+            (1, '2025-01-10', 3, 300, ''), (1, '2025-01-20', 2, 210, ''), (2, '2025-01-15', 0, 40, NULL)
+        """))
+        conn.execute(text("INSERT INTO deliveries (item_id, order_date, arrival_date, qty_cs, total_units, note) VALUES (1, '2025-01-12', '2025-01-15', 1, 100, '')"))
+    return engine
+
+
+def test_migrate_baseline_with_rows(empty_db_url):
+    engine = make_baseline(empty_db_url)
+    assert schema.migrate(engine) is True
+    assert schema.migrate(engine) is False  # 두 번째는 버전 확인만
+
+    with engine.connect() as conn:
+        assert schema.stored_version(conn) == schema.SCHEMA_VERSION
+        assert conn.execute(text("SELECT id FROM properties")).scalars().all() == [1]
+        for table in ["items", "snapshots", "deliveries"]:
+            assert conn.execute(text(f"SELECT DISTINCT property_id FROM {table}")).scalars().all() == [1]
+        assert conn.execute(text("SELECT COUNT(*) FROM snapshots")).scalar() == 3
+        assert conn.execute(text("SELECT COUNT(*) FROM property_areas WHERE property_id = 1")).scalar() > 0
+        # 원장: 기존 조사 3건 + 확정 입고 1건
+        kinds = dict(conn.execute(text("SELECT kind, COUNT(*) FROM inventory_events GROUP BY kind")).fetchall())
+        assert kinds == {"count": 3, "receipt": 1}
+        if engine.dialect.name == "postgresql":
+            cols = {c["name"]: c for c in inspect(conn).get_columns("snapshots")}
+            assert str(cols["snap_date"]["type"]) == "DATE"
+            assert conn.execute(text("SELECT MAX(snap_date) FROM snapshots")).scalar() == date(2025, 1, 20)
+            # 새 시설은 기존 id 뒤로
+            nid = conn.execute(text("INSERT INTO properties (code, name) VALUES ('ANNEX', '別館') RETURNING id")).scalar()
+            assert nid == 2
+    engine.dispose()
+
+
+def test_migrate_force_is_idempotent(empty_db_url):
+    engine = make_baseline(empty_db_url)
+    schema.migrate(engine)
+    assert schema.migrate(engine, force=True) is True
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM properties")).scalar() == 1
+        assert conn.execute(text("SELECT COUNT(*) FROM inventory_events")).scalar() == 4
+        assert conn.execute(text("SELECT COUNT(*) FROM schema_version")).scalar() == 1
+    engine.dispose()
+
+
+def test_migrate_legacy_sqlite_file(tmp_path):
+    # 저장소의 기존 inventory.db (수량이 8바이트 BLOB) -> 정수로 변환
+    path = tmp_path / "inventory.db"
+    shutil.copy(LEGACY_DB, path)
+    engine = create_engine(f"sqlite:///{path}")
+    schema.migrate(engine)
+    with engine.connect() as conn:
+        for table, cols in schema.QTY_COLUMNS.items():
+            for col in cols:
+                assert conn.execute(text(f"SELECT COUNT(*) FROM {table} WHERE typeof({col}) = 'blob'")).scalar() == 0
+    engine.dispose()
@@ -0,0 +1,26 @@
+# PMS 가동률 CSV: "%" 가 붙은 값은 항상 %, 숫자만 있으면 1 이하는 비율 / 1 초과는 %
+import pandas as pd
+
+import occupancy_import
+
+AREAS = pd.DataFrame({"property_id": [1], "area": ["ALL"], "rooms": [100]})
+PROPERTIES = pd.DataFrame({"id": [1], "code": ["MAIN"]})
+
+
+def occ_of(values):
+    df = pd.DataFrame({"date": pd.date_range("2025-04-01", periods=len(values)).strftime("%Y-%m-%d"), "occ": values})
+    records, errors = occupancy_import.validate_occupancy(df, AREAS, PROPERTIES, property_id=1)
+    return records["occ"].round(6).tolist(), errors["reason"].tolist()
+
+
+def test_percent_sign_always_divides_by_100():
+    assert occ_of(["1%", "0.5%", "85%", " 85 % ", "100%"]) == ([0.01, 0.005, 0.85, 0.85, 1.0], [])
+
+
+def test_bare_numbers_use_ratio_or_percent():
+    assert occ_of(["0.85", "85", "1", "0"]) == ([0.85, 0.85, 1.0, 0.0], [])
+    assert occ_of([0.5, 50.0]) == ([0.5, 0.5], [])
+
+
+def test_invalid_occupancy():
+    assert occ_of(["120%", "-5", "abc"]) == ([], ["invalid occupancy"] * 3)
@@ -0,0 +1,105 @@
+import os
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+import forecast_engine
+import metrics
+
+# ==========================================
+# 일평균 사용량 추정 (스냅샷 + 입고 이력)
+# ==========================================
+# 구간 소비량 = 이전 재고 + 구간 내 입고 - 현재 재고 (입고는 그날 아침, 같은 날 재고 조사보다 먼저 반영)
+# - weighted: 구간 소비량 합 / 경과일수 합 (1일 구간과 30일 구간을 일수만큼 가중)
+# - ewma:     weighted + 최근 구간일수록 큰 가중치 (반감기 EWMA_HALFLIFE_DAYS)
+# - mad:      구간 일 사용량이 품목 중앙값 ± MAD_K * 1.4826 * MAD 밖이면 제외 후 weighted
+# - sql:      기존 방식 (입고 무시, 감소한 구간만 등가중 평균) - 비교용
+ESTIMATORS = ["weighted", "ewma", "mad", "sql"]
+DEFAULT_ESTIMATOR = os.environ.get("INVENTORY_USAGE_ESTIMATOR", "weighted")
+EWMA_HALFLIFE_DAYS = 14
+MAD_K = 3.0
+MAD_MIN_INTERVALS = 3  # 구간이 이보다 적으면 이상치 제외를 하지 않음
+USAGE_COLS = ["id", "daily_avg_usage", "usage_intervals", "usage_std"]
+
+
+def consumption_intervals(snaps, received=None):
+    # snaps: item_id, snap_date, total_units (+ id) / received: item_id, arrival_date, units (입고 완료분)
+    # -> 연속 스냅샷 구간별 item_id, end_date, gap(일), consumed, rate
+    #    음수 소비 (세기 실수 / 미등록 입고) 도 남김: 일수 가중 합계에서는 앞뒤 구간과 상쇄되므로 버리면 오히려 과대 추정
+    cols = ["item_id", "end_date", "gap", "consumed", "rate"]
+    if snaps is None or snaps.empty:
+        return pd.DataFrame(columns=cols)
+    s = snaps.assign(
+        snap_date=pd.to_datetime(snaps["snap_date"]),
+        total_units=pd.to_numeric(snaps["total_units"], errors="coerce").fillna(0).astype(float),
+    )
+    order = ["item_id", "snap_date", "id"] if "id" in s.columns else ["item_id", "snap_date"]
+    # 같은 날 여러 번 센 경우 마지막 값만
+    s = s.sort_values(order, kind="stable").drop_duplicates(["item_id", "snap_date"], keep="last")
+
+    # 스냅샷 날짜까지의 누적 입고 (merge_asof: 품목별 직전 입고일 기준)
+    s["cum_in"] = 0.0
+    if received is not None and not received.empty:
+        r = received.assign(snap_date=pd.to_datetime(received["arrival_date"]),
+                            units=pd.to_numeric(received["units"], errors="coerce").fillna(0).astype(float))
+        r = r.groupby(["item_id", "snap_date"], as_index=False)["units"].sum().sort_values(["item_id", "snap_date"])
+        r["cum_in"] = r.groupby("item_id")["units"].cumsum()
+        r["item_id"] = r["item_id"].astype(s["item_id"].dtype)
+        s = pd.merge_asof(s.drop(columns="cum_in").sort_values("snap_date"), r[["item_id", "snap_date", "cum_in"]].sort_values("snap_date"),
+                          on="snap_date", by="item_id", direction="backward")
+        s["cum_in"] = s["cum_in"].fillna(0.0)
+        s = s.sort_values(["item_id", "snap_date"], kind="stable")
+
+    g = s.groupby("item_id", sort=False)
+    gap = g["snap_date"].diff().dt.days
+    consumed = g["total_units"].shift() + g["cum_in"].diff() - s["total_units"]
+    valid = (gap > 0) & consumed.notna()
+    out = pd.DataFrame({
+        "item_id": s.loc[valid, "item_id"].to_numpy(),
+        "end_date": s.loc[valid, "snap_date"].to_numpy(),
+        "gap": gap[valid].to_numpy(float),
+        "consumed": consumed[valid].to_numpy(float),
+    })
+    out["rate"] = out["consumed"] / out["gap"]
+    return out
+
+
+def reject_outliers(iv, k=MAD_K, min_intervals=MAD_MIN_INTERVALS):
+    # 품목별 중앙값 / MAD 로 구간 일 사용량 이상치 제외 (구간 수가 적은 품목은 그대로)
+    g = iv.groupby("item_id")["rate"]
+    med = g.transform("median")
+    dev = (iv["rate"] - med).abs()
+    mad = dev.groupby(iv["item_id"]).transform("median")
+    keep = (g.transform("size") < min_intervals) | (dev <= k * 1.4826 * mad + 1e-9)
+    return iv[keep]
+
+
+@metrics.timed("compute", "usage.estimate")
+def estimate_usage(snaps, received=None, method=DEFAULT_ESTIMATOR, halflife=EWMA_HALFLIFE_DAYS, mad_k=MAD_K, asof=None):
+    # -> id, daily_avg_usage, usage_intervals, usage_std (구간 일 사용량의 가중 표준편차)
+    if method == "sql":
+        return forecast_engine.daily_usage_from_snapshots(snaps)
+    if method not in ESTIMATORS:
+        raise ValueError(f"unknown usage estimator: {method}")
+    iv = consumption_intervals(snaps, received)
+    if iv.empty:
+        return pd.DataFrame(columns=USAGE_COLS)
+    if method == "mad":
+        iv = reject_outliers(iv, mad_k)
+    w = np.ones(len(iv))
+    if method == "ewma":
+        age = (pd.Timestamp(asof or date.today()) - pd.to_datetime(iv["end_date"])).dt.days.to_numpy(float)
+        w = 0.5 ** (np.clip(age, 0, None) / halflife)
+    # 일수 가중: sum(w * 소비량) / sum(w * 일수)
+    iv = iv.assign(wc=w * iv["consumed"], wg=w * iv["gap"])
+    agg = iv.groupby("item_id").agg(wc=("wc", "sum"), wg=("wg", "sum"), n=("gap", "size"))
+    rate = (agg["wc"] / agg["wg"]).clip(lower=0)
+    dev2 = (iv["rate"] - iv["item_id"].map(rate)) ** 2 * iv["wg"]
+    std = np.sqrt(dev2.groupby(iv["item_id"]).sum() / agg["wg"])
+    return pd.DataFrame({
+        "id": agg.index.to_numpy(),
+        "daily_avg_usage": rate.to_numpy(),
+        "usage_intervals": agg["n"].to_numpy(),
+        "usage_std": std.reindex(agg.index).to_numpy(),
+    })
@@ -0,0 +1,16 @@
+# 페이지 모듈: 메뉴 키 -> 모듈 (render() 를 가짐)
+# 선택된 페이지만 처음 열 때 import (무거운 모듈: altair / 파일 가져오기 / 예측 서비스 는 첫 화면 기동 시간에서 빠짐)
+import importlib
+
+PAGES = {
+    "home": "views.home",
+    "items": "views.items",
+    "stock": "views.stock",
+    "forecast": "views.forecast",
+    "calendar": "views.order_calendar",
+    "trends": "views.trends",
+}
+
+
+def load(name):
+    return importlib.import_module(PAGES.get(name, PAGES["home"]))
@@ -0,0 +1,141 @@
+import uuid
+from datetime import date
+
+import pandas as pd
+import streamlit as st
+
+import background
+import jp_holidays
+import metrics
+from db import get_property_areas_df
+
+# ==========================================
+# 화면 공용: 문구 (일본어 고정) / 표시 도우미 / 폼 멱등 키 / 시설 선택
+# ==========================================
+TEXTS = {
+    "jp": {
+        "title": "ホテル在庫予測システム", "menu_title": "メニュー", "menu_home": "🏠 ホーム・サマリー",
+        "menu_items": "📦 1. 品目マスター", "menu_stock": "📝 2. 在庫記録", "menu_forecast": "📊 3. 予測＆発注",
+        "menu_calendar": "📅 4. 発注カレンダー", "menu_trends": "📈 5. 推移分析",
+        "dashboard_alert": "発注推奨品目数", "dashboard_incoming": "入荷待ち件数", "dashboard_total_items": "登録品目数",
+        "items_header": "品目マスター管理", "items_new": "新規登録", "items_list": "登録済み一覧",
+        "item_name": "品目名", "item_cat": "使用エリア", "unit": "単位", "safety": "安全在庫", 
+        "upr": "1室あたり使用数", # New!
+        "cs_total": "1CS入数", "units_per_box": "1箱入数", "boxes_per_cs": "1CS箱数",
+        "btn_register": "登録", "btn_update": "更新", "items_edit": "編集・削除", "select_item_edit": "品目選択",
+        "err_itemname": "品目名は必須です。", "success_register": "登録しました。", "success_update": "更新しました。",
+        "err_conflict": "他の方が先にこの品目を更新しました。最新の内容を確認してからもう一度保存してください。",
+        "dup_submit": "同じ入力は既に保存済みです。", "stock_counter": "担当者名（棚卸し者）",
+        "stock_header": "在庫記録管理", "stock_tab_input": "新規入力", "stock_tab_history": "履歴確認・削除",
+        "stock_select_item": "品目選択", "stock_date": "日付", "stock_cs": "CS", "stock_box": "箱/袋", "stock_note": "備考",
+        "btn_save_stock": "保存", "success_save_stock": "保存しました。", "recent_stock": "最新在庫状況", "history_list": "最近の入力履歴（削除可能）", 
+        "stock_tab_bulk": "一括入力", "bulk_header": "棚卸し一括入力", "bulk_date": "棚卸日",
+        "bulk_hint": "数えた品目だけ CS / 箱 を入力してください（空欄の行は保存されません）。",
+        "btn_bulk_save": "一括保存", "success_bulk": "件保存しました。", "bulk_upload": "スキャナーデータ取込 (CSV / Excel)",
+        "btn_bulk_import": "取込", "bulk_errors": "エラー行（保存されていません）",
+        "btn_delete": "削除", "select_delete": "削除する記録を選択", "success_delete": "削除しました。", "warn_no_data": "データがありません。",
+        "forecast_header": "ハイブリッド在庫予測 (実績 vs 理論)",
+        "days_label": "過去実績算出期間(日)", "horizon_label": "予測期間(日)",
+        "forecast_result": "発注推奨リスト", "info_forecast": "実際の消費量(Actual)と、稼働率ベースの理論値(Theory)を比較して多い方を採用します。",
+        "cal_header": "入荷予定カレンダー", "cal_tab_new": "予定登録", "cal_tab_list": "カレンダー・検索・削除",
+        "cal_item": "品目", "cal_order_date": "発注日", "cal_arrival_date": "入荷予定日", "cal_cs": "CS", "cal_box": "箱/袋", "cal_note": "備考",
+        "btn_save_cal": "登録", "success_save_cal": "登録しました。", "cal_list": "入荷予定一覧", "cal_search_item": "品目検索",
+        "weekdays": ["月", "火", "水", "木", "金", "土", "日"], "prev_month": "◀ 前月", "next_month": "翌月 ▶", "today": "今日",
+        "lang": "Language", "page": "ページ", "prev_page": "◀ 前へ", "next_page": "次へ ▶",
+        "search_name": "品目名で検索", "date_from": "開始日", "date_to": "終了日",
+        "area_ALL": "全客室", "area_STD": "Standard", "area_HAK": "Hakata",
+        "property": "施設", "all_properties": "全施設", "property_summary": "施設別サマリー", "rooms": "室",
+        "occ_all_properties": "全施設表示では各施設の稼働率カレンダーで計算します。稼働率を手動で変更するには施設を選択してください。",
+        "forecast_tab_plan": "発注推奨", "forecast_tab_occ": "稼働率カレンダー",
+        "occ_mode": "稼働率", "occ_mode_calendar": "カレンダー (PMS予測・曜日プロフィール)", "occ_mode_flat": "一律 (手動)",
+        "occ_profile": "曜日・祝日プロフィール (%)", "occ_profile_hint": "空欄はエリアの基準稼働率を使用。PMS 予測がある日は予測を優先します。",
+        "btn_save_profile": "プロフィール保存", "occ_upload": "PMS 稼働率予測の取り込み (CSV / Excel)",
+        "occ_upload_hint": "列: date, area, occ (0-1 または %) または rooms_sold [, property]",
+        "btn_occ_import": "取り込み", "success_occ": "件の稼働率を保存しました。", "occ_preview": "今後30日の稼働率 (%)",
+        "holiday": "祝", "dashboard_stockout": "欠品予測", "overdue": "期限切れ",
+        "cal_tab_draft": "発注下書き", "draft_hint": "発注期限 (予想在庫が安全在庫を下回る日 − リードタイム) が{days}日以内の品目の下書きを作成します。下書きは確定するまで在庫計算に含まれません。",
+        "btn_make_drafts": "下書き作成", "success_drafts": "件の下書きを作成しました。", "draft_select": "選択",
+        "btn_confirm_drafts": "選択を確定", "btn_discard_drafts": "選択を削除", "success_confirm": "件を確定しました。",
+        "status": "状態", "status_draft": "下書き", "status_confirmed": "確定",
+        "estimator": "実績使用量の推定",
+        "estimator_weighted": "日数加重 (入荷反映)", "estimator_ewma": "EWMA (直近重視・入荷反映)",
+        "estimator_mad": "外れ値除外 (中央値/MAD・入荷反映)", "estimator_sql": "従来 (減少区間の平均)",
+        "supplier": "仕入先", "moq": "最小発注数 (CS / 箱)", "po_ref": "発注書番号", "btn_po_csv": "発注書 CSV ダウンロード",
+        "data_age": "データ更新", "sec_ago": "秒前", "min_ago": "分前", "data_refreshing": "更新中…",
+        "data_stale": "データが古くなっています", "refresh_failed": "更新失敗", "bg_stopped": "バックグラウンド更新停止中",
+        "debug_panel": "デバッグ (処理時間)", "btn_profile_next": "次の再実行を cProfile", "profile_saved": "プロファイル保存先",
+        "trend_scope": "対象", "trend_scope_item": "品目別", "trend_scope_area": "エリア別", "trend_range": "期間",
+        "trend_90d": "3ヶ月", "trend_1y": "1年", "trend_3y": "3年", "trend_all": "全期間",
+        "trend_stock": "在庫", "trend_projection": "予想在庫", "trend_arrivals": "入荷", "trend_counted": "棚卸し",
+        "trend_usage": "使用量/日", "trend_building": "推移データを集計しています…",
+        "trend_grain_day": "日次", "trend_grain_week": "週次 (月曜始まり)",
+        "trend_note": "在庫: 棚卸し間は使用量を按分した推定値、最終棚卸し以降は帳簿在庫 / 使用量: 棚卸し間の消費÷日数 / 予想在庫: 稼働率カレンダーと入荷予定 ({days}日)",
+        "trend_area_note": "エリア別は品目の数量をそのまま合計しています (単位が混在するため推移の比較用)。"
+    }
+}
+
+def t(key: str) -> str:
+    return TEXTS["jp"].get(key, key)
+
+@metrics.timed("compute", "safe_display")
+def safe_display(df):
+    # 표시용 문자열 변환 (셀 단위 lambda 대신 컬럼 단위 한 번) - 화면에 보이는 페이지만 넘길 것
+    if df is None or df.empty: return pd.DataFrame()
+    return df.astype(object).where(df.notna(), "").astype(str)
+
+PAGE_SIZE = 50
+
+def keyset_cursor(key, filters):
+    # 키셋 페이지네이션 상태: 필터가 바뀌면 첫 페이지로. 현재 페이지의 시작 커서를 반환
+    state = st.session_state.get(key)
+    if state is None or state["filters"] != filters:
+        state = {"filters": filters, "stack": [None]}
+        st.session_state[key] = state
+    return state["stack"][-1]
+
+def keyset_buttons(key, next_cursor):
+    state = st.session_state[key]
+    c1, c2, c3 = st.columns([1, 2, 1])
+    if c1.button(t("prev_page"), key=f"{key}_prev", disabled=len(state["stack"]) <= 1):
+        state["stack"].pop()
+        st.rerun()
+    c2.markdown(f"<div style='text-align:center'>{t('page')} {len(state['stack'])}</div>", unsafe_allow_html=True)
+    if c3.button(t("next_page"), key=f"{key}_next", disabled=next_cursor is None):
+        state["stack"].append(next_cursor)
+        st.rerun()
+
+def form_key(name):
+    # 폼 제출 1회분 멱등 키 (더블 탭 / 재실행으로 같은 제출이 두 번 와도 한 번만 저장). 저장이 끝나면 rotate_form_key
+    return st.session_state.setdefault(f"idem_{name}", uuid.uuid4().hex)
+
+def rotate_form_key(name):
+    st.session_state[f"idem_{name}"] = uuid.uuid4().hex
+
+def current_property():
+    # 사이드바에서 선택한 시설 ID (None = 전체 시설)
+    return st.session_state.get("property_id")
+
+def format_age(sec):
+    return f"{int(sec)}{t('sec_ago')}" if sec < 120 else f"{int(sec // 60)}{t('min_ago')}"
+
+def freshness_caption(info):
+    # background.get() 의 정보 -> 데이터 나이 표시 (갱신 주기의 2배 이상 지났거나 실패했으면 경고)
+    msg = f"🕒 {t('data_age')}: {format_age(info['age'])}"
+    if info["refreshing"]:
+        msg += f" ({t('data_refreshing')})"
+    if info["error"]:
+        st.warning(f"{msg} / {t('refresh_failed')}: {info['error']}")
+    elif info["age"] > 2 * background.REFRESH_SECONDS:
+        st.warning(f"{msg} / {t('data_stale')}")
+    else:
+        st.caption(msg)
+
+def area_options(property_id):
+    # 시설의 구역 정의 -> {구역코드: 표시명}. 전체 시설이면 구역코드 합집합 (객실 수 생략)
+    areas = get_property_areas_df(property_id)
+    if property_id is None:
+        return {a: TEXTS["jp"].get(f"area_{a}", a) for a in dict.fromkeys(areas["area"])}
+    return {r["area"]: f"{TEXTS['jp'].get('area_' + r['area'], r['area'])} ({int(r['rooms'])}{t('rooms')})" for r in areas.to_dict("records")}
+
+def get_jp_holiday_name(dt: date):
+    return jp_holidays.holiday_name(dt)
@@ -0,0 +1,131 @@
+import pandas as pd
+import streamlit as st
+
+import forecast_engine
+import forecast_service
+import jp_holidays
+import metrics
+import occupancy_import
+import stock_import
+import usage_estimator
+from db import (
+    get_items_df, get_properties_df, get_property_areas_df, get_occupancy_calendar, get_occupancy_profiles_df,
+    upsert_occupancy, set_occupancy_profile,
+)
+from views.common import t, safe_display, current_property, area_options
+
+# ==========================================
+# 3. 예측 & 발주: 발주 추천 (가동률 설정) / 가동률 캘린더 (프로필 / PMS 예측)
+# ==========================================
+def render():
+    st.header(t("forecast_header"))
+    pid = current_property()
+    tab_plan, tab_occ = st.tabs([t("forecast_tab_plan"), t("forecast_tab_occ")])
+    with tab_occ:
+        render_occupancy(pid)
+    with tab_plan:
+        render_plan(pid)
+
+def render_plan(pid):
+    items = get_items_df(pid)
+    if items is None or items.empty: return
+
+    # 1. 가동률 및 기간 설정: 기본은 가동률 캘린더, 시설 선택 시 구역별 일정 가동률(수동)도 가능
+    with st.expander("⚙️ 稼働率設定 (Occupancy Settings)", expanded=True):
+        occ = None
+        modes = ["calendar", "flat"] if pid is not None else ["calendar"]
+        mode = st.radio(t("occ_mode"), modes, format_func=lambda m: t(f"occ_mode_{m}"), horizontal=True)
+        if pid is None:
+            st.info(t("occ_all_properties"))
+        elif mode == "flat":
+            areas = get_property_areas_df(pid)
+            labels = area_options(pid)
+            cols = st.columns(max(len(areas), 1))
+            occ = {}
+            for col, (area, ref) in zip(cols, zip(areas["area"], areas["ref_occ"])):
+                default = int(round(ref * 100))
+                occ[area] = col.slider(f"{labels[area]} (Default {default}%)", 0, 100, default, key=f"occ_{pid}_{area}") / 100.0
+        
+        cc1, cc2 = st.columns(2)
+        # [수정] 기본값 변경: 과거 산출 14일 / 예측 기간 7일
+        days = cc1.slider(t("days_label"), 7, 120, 14)
+        hor = cc2.slider(t("horizon_label"), 7, 120, 7)
+        # 실적 사용량 추정 방식 (기존 방식과 비교용으로 선택 가능)
+        est = st.selectbox(t("estimator"), usage_estimator.ESTIMATORS, format_func=lambda e: t(f"estimator_{e}"),
+                           index=usage_estimator.ESTIMATORS.index(usage_estimator.DEFAULT_ESTIMATOR))
+
+    # 2. 발주 계획 계산 (forecast_service: API 서버가 설정되어 있으면 HTTP, 아니면 같은 프로세스)
+    plan = forecast_service.get_plan(days, hor, occ, pid, est)
+
+    # 3. 화면 표시
+    res_display = forecast_engine.to_display(plan, {
+        "name": "品目名",
+        "target_area": "エリア",
+        "current_stock": "現在在庫",
+        "final_daily_usage": "予想消費/日",
+        "stockout_date": "欠品予定日",
+        "min_balance": "最低在庫",
+        "order_display": "発注推奨 (CS)",
+        "order_pack_display": "発注数",
+        "supplier": "仕入先"
+    }, round_cols=["予想消費/日"], int_cols=["現在在庫", "最低在庫"])
+
+    with metrics.timer("render", "forecast.table") as m:
+        st.dataframe(safe_display(res_display), use_container_width=True)
+        m["rows"] = len(res_display)
+    
+    st.info("💡 '発注推奨 (CS)' は、必要数を1CS入数で割った値です。'発注数' は CS + 箱 単位に切り上げた実際の発注数量です (最小発注数を反映)。")
+
+PROFILE_DAYS = list(range(7)) + [forecast_engine.PROFILE_HOLIDAY]
+
+def render_occupancy(pid):
+    # 가동률 캘린더: 요일/祝日 프로필 편집 + PMS 예측 CSV 가져오기 + 향후 30일 미리보기
+    if pid is None:
+        st.info(t("occ_all_properties"))
+        return
+    areas = get_property_areas_df(pid)
+    labels = area_options(pid)
+    day_names = t("weekdays") + [t("holiday")]
+
+    st.subheader(t("occ_profile"))
+    st.caption(t("occ_profile_hint"))
+    prof = get_occupancy_profiles_df(pid)
+    grid = (prof.assign(occ=pd.to_numeric(prof["occ"]) * 100)
+            .pivot_table(index="area", columns="day_type", values="occ", aggfunc="last")
+            .reindex(index=areas["area"], columns=PROFILE_DAYS))
+    grid.columns = day_names
+    with st.form(f"occ_profile_{pid}"):
+        edited = st.data_editor(grid, use_container_width=True, key=f"occ_profile_grid_{pid}",
+                                column_config={d: st.column_config.NumberColumn(d, min_value=0, max_value=100, step=1) for d in day_names})
+        if st.form_submit_button(t("btn_save_profile")):
+            edited.columns = PROFILE_DAYS
+            set_occupancy_profile(pid, (edited.stack() / 100.0).to_dict())
+            st.toast(t("success_update"), icon="✅")
+            st.rerun()
+
+    st.divider()
+    st.subheader(t("occ_upload"))
+    st.caption(t("occ_upload_hint"))
+    up = st.file_uploader(t("occ_upload"), type=["csv", "xlsx", "xls"], label_visibility="collapsed", key="occ_upload")
+    if up is not None and st.button(t("btn_occ_import")):
+        saved, errs, offset = 0, [], 0
+        for chunk in stock_import.iter_upload_chunks(up, up.name):
+            records, errors = occupancy_import.validate_occupancy(chunk, get_property_areas_df(), get_properties_df(), pid, offset)
+            saved += upsert_occupancy(records)
+            errs.append(errors)
+            offset += len(chunk)
+        st.toast(f"{saved}{t('success_occ')}", icon="💾")
+        errors = pd.concat(errs, ignore_index=True) if errs else pd.DataFrame()
+        if not errors.empty:
+            st.error(f"{t('bulk_errors')}: {len(errors)}")
+            st.dataframe(errors, use_container_width=True)
+
+    st.divider()
+    st.subheader(t("occ_preview"))
+    cal = get_occupancy_calendar(30, pid)
+    preview = (cal * 100).round(0)
+    preview.index = [labels.get(a, a) for a in cal.index.get_level_values("area")]
+    hol = jp_holidays.is_holiday(cal.columns)
+    preview.columns = [f"{d:%m/%d}({day_names[PROFILE_DAYS.index(forecast_engine.PROFILE_HOLIDAY) if h else d.weekday()]})"
+                       for d, h in zip(cal.columns, hol)]
+    st.dataframe(preview, use_container_width=True)
@@ -0,0 +1,89 @@
+from datetime import date, timedelta
+
+import pandas as pd
+import streamlit as st
+
+import background
+import forecast_engine
+import forecast_service
+import metrics
+from db import get_properties_df, STATE_HORIZON_DAYS
+from views.common import t, safe_display, current_property, freshness_caption
+
+# ==========================================
+# 홈: 백그라운드 스냅샷으로 발주 기한 / 결품 예측 요약
+# ==========================================
+def render():
+    st.header(t("menu_home"))
+    pid = current_property()
+    # 최신 재고 / 실적(60일) / 입고예정(30일) 은 item_stock_state 에서, 입고 건수와 함께 한 번에 읽음
+    # 백그라운드 스레드가 미리 계산해 둔 스냅샷을 사용 (렌더링 중 DB 를 기다리지 않음)
+    bundle, info = background.get("home", pid)
+    freshness_caption(info)
+    stock_df = bundle["stock"]
+    
+    if stock_df is None or stock_df.empty:
+        st.info(t("warn_no_data"))
+        return
+
+    horizon = STATE_HORIZON_DAYS
+    
+    # --- [가동률 기반 이론 사용량 계산] ---
+    # 홈 화면에서는 각 시설 / 구역의 가동률 캘린더(PMS 예측 > 요일 프로필 > 기준 가동률)로 계산해서 보여줌
+    # 입고일별 예정으로 날짜별 예상 재고를 만들어 결품일 / 최저 재고 / 커버 일수까지 계산
+    # 입고 이력에서 구한 품목별 리드타임으로 발주점 / 발주 기한 (안전재고 밑으로 내려가는 날 - 리드타임) 계산
+    plan = forecast_engine.compute_forecast(stock_df, None, None, horizon, occ_calendar=bundle["occ_calendar"],
+                                            arrivals=bundle["arrivals"], lead_times=bundle["lead_times"])
+    # 발주 기한이 얼마 남지 않은 품목만 (기간 합계 기준이면 너무 이르고, 결품일 기준이면 리드타임만큼 늦음)
+    order_by = pd.to_datetime(plan["order_by_date"])
+    plan["urgent"] = order_by <= pd.Timestamp(date.today() + timedelta(days=forecast_service.DRAFT_WINDOW_DAYS))
+    urgent = plan[plan["urgent"]].sort_values(["order_by_date", "days_of_cover"], kind="stable")
+    overdue = int((order_by < pd.Timestamp(date.today())).sum())
+    
+    with metrics.timer("render", "home.cards"):
+        c1, c2, c3, c4 = st.columns(4)
+        c1.metric(t("dashboard_alert"), f"{len(urgent)}", delta=f"{overdue} {t('overdue')}" if overdue else None, delta_color="inverse")
+        c2.metric(t("dashboard_stockout"), f"{int(plan['stockout_date'].notna().sum())}", delta_color="inverse")
+        c3.metric(t("dashboard_incoming"), f"{bundle['delivery_count']}")
+        c4.metric(t("dashboard_total_items"), f"{len(stock_df)}")
+
+    # 전체 시설: 시설별 집계 (앱 하나에서 모든 시설을 한 번에)
+    props = get_properties_df()
+    if pid is None and len(props) > 1:
+        st.subheader(t("property_summary"))
+        summary = plan.groupby("property_id").agg(items=("id", "size"), urgent=("urgent", "sum"),
+                                                  stockout=("stockout_date", "count"))
+        summary = props.set_index("id")[["name"]].join(summary, how="inner").fillna(0)
+        st.dataframe(summary.rename(columns={"name": t("property"), "items": t("dashboard_total_items"),
+                                            "urgent": t("dashboard_alert"), "stockout": t("dashboard_stockout")}),
+                     use_container_width=True, hide_index=True)
+    
+    st.divider()
+    if not urgent.empty:
+        st.subheader("🚨 Urgent Orders (Recommended)")
+        
+        # 표시할 컬럼 및 이름 변경 + 숫자 다듬기
+        urgent_display = forecast_engine.to_display(urgent, {
+            "name": "品目名",
+            "target_area": "エリア",
+            "current_stock": "現在在庫",
+            "daily_avg_usage": "実績/日",
+            "theory_daily_usage": "理論/日",
+            "order_by_date": "発注期限",
+            "lead_time_days": "リードタイム",
+            "reorder_point": "発注点",
+            "stockout_date": "欠品予定日",
+            "min_balance": "最低在庫",
+            "days_of_cover": "在庫日数",
+            "order_display": "発注推奨",
+            "order_pack_display": "発注数"
+        }, round_cols=["実績/日", "理論/日", "リードタイム"], int_cols=["現在在庫", "発注点", "最低在庫"])
+
+        with metrics.timer("render", "home.table") as m:
+            st.dataframe(safe_display(urgent_display), use_container_width=True)
+            m["rows"] = len(urgent_display)
+        st.caption(f"※ 実績: 過去平均 / 理論: 稼働率カレンダー / 欠品予定日・最低在庫: 入荷日別の予想在庫 ({horizon}日) / "
+                   "リードタイム: 入荷履歴の発注日→入荷日 (日) / 発注期限: 予想在庫が安全在庫を下回る日 − リードタイム / "
+                   "発注推奨: 必要数を1CS入数で割った値 / 発注数: CS + 箱 単位に切り上げ (最小発注数を反映)")
+    else:
+        st.success("✅ All stocks are safe.")
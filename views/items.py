@@ -0,0 +1,95 @@
+import streamlit as st
+
+from db import add_item, update_item_logic, delete_item_logic, get_items_page, get_properties_df
+from views.common import t, safe_display, PAGE_SIZE, keyset_cursor, keyset_buttons, current_property, area_options
+
+# ==========================================
+# 1. 품목 마스터: 검색 / 키셋 페이지네이션 / 수정 (낙관적 잠금) / 등록
+# ==========================================
+def render():
+    st.header(t("items_header"))
+    tab1, tab2 = st.tabs([t("items_list"), t("items_new")])
+    pid = current_property()
+    AREA_OPTS = area_options(pid)
+    
+    with tab1:
+        # 서버 측 검색 + 키셋 페이지네이션 (보이는 페이지만 조회/변환)
+        f1, f2 = st.columns(2)
+        q = f1.text_input(t("search_name"), key="items_q").strip()
+        fa = f2.selectbox(t("item_cat"), ["All"] + list(AREA_OPTS.keys()), format_func=lambda x: AREA_OPTS.get(x, x), key="items_area")
+        filters = (q, fa, pid)
+        df, next_cursor = get_items_page(keyset_cursor("items_page", filters), PAGE_SIZE, q or None, None if fa == "All" else fa, pid)
+        if df is not None and not df.empty:
+            df_disp = df.drop(columns=["row_version"], errors="ignore")
+            df_disp["target_area"] = df_disp["target_area"].map(AREA_OPTS).fillna(df_disp["target_area"])
+            st.dataframe(safe_display(df_disp), use_container_width=True)
+            keyset_buttons("items_page", next_cursor)
+            
+            st.divider()
+            st.subheader(t("items_edit"))
+            opts = (df["name"].astype(str) + " (ID:" + df["id"].astype(str) + ")").tolist()
+            sel = st.selectbox(t("select_item_edit"), opts)
+            if sel:
+                iid = int(sel.split("ID:")[1].replace(")", ""))
+                row = df[df["id"] == iid].iloc[0]
+                with st.form("edit_item"):
+                    c1, c2 = st.columns(2)
+                    n = c1.text_input(t("item_name"), row["name"])
+                    
+                    curr_area = row["target_area"] if row["target_area"] in AREA_OPTS else next(iter(AREA_OPTS))
+                    area_key = c1.selectbox(t("item_cat"), list(AREA_OPTS.keys()), index=list(AREA_OPTS.keys()).index(curr_area), format_func=lambda x: AREA_OPTS[x])
+                    
+                    # [NEW] 1실당 사용수 입력
+                    upr = c1.number_input(t("upr"), 0.0, value=float(row.get("units_per_room", 0.0)), step=0.1)
+                    
+                    u = c1.text_input(t("unit"), row["unit"])
+                    s = c1.number_input(t("safety"), 0, value=int(row["safety_stock"]))
+                    ct = c2.number_input(t("cs_total"), 0, value=int(row["cs_total_units"]))
+                    up = c2.number_input(t("units_per_box"), 0, value=int(row["units_per_box"]))
+                    bp = c2.number_input(t("boxes_per_cs"), 0, value=int(row["boxes_per_cs"]))
+                    sp = c2.text_input(t("supplier"), row.get("supplier") or "")
+                    mq = c2.number_input(t("moq"), 0, value=int(row.get("min_order_cs") or 0))
+                    
+                    if st.form_submit_button(t("btn_update")):
+                        if update_item_logic(iid, n, area_key, upr, u, ct, up, bp, s, sp.strip(), mq, version=row.get("row_version")):
+                            st.toast(t("success_update"), icon="✅")
+                            st.rerun()
+                        else:
+                            st.error(t("err_conflict"))
+                
+                if st.button(t("btn_delete"), type="primary"):
+                    ok, sc, dc = delete_item_logic(iid)
+                    if ok:
+                        st.toast(t("success_delete"), icon="🗑️")
+                        st.rerun()
+                    else:
+                        st.error(f"Cannot delete. Used in {sc} snapshots, {dc} deliveries.")
+        else:
+            st.info("No items.")
+    with tab2:
+        with st.form("new_item"):
+            c1, c2 = st.columns(2)
+            n = c1.text_input(t("item_name"))
+            props = get_properties_df()
+            new_pid = pid
+            if pid is None:
+                new_pid = c1.selectbox(t("property"), props["id"].tolist(), format_func=dict(zip(props["id"], props["name"])).get)
+            area_key = c1.selectbox(t("item_cat"), list(AREA_OPTS.keys()), format_func=lambda x: AREA_OPTS[x])
+            
+            # [NEW] 1실당 사용수 입력
+            upr = c1.number_input(t("upr"), 0.0, step=0.1)
+            
+            u = c1.text_input(t("unit"), "本")
+            s = c1.number_input(t("safety"), 0)
+            ct = c2.number_input(t("cs_total"), 0)
+            up = c2.number_input(t("units_per_box"), 0)
+            bp = c2.number_input(t("boxes_per_cs"), 0)
+            sp = c2.text_input(t("supplier"))
+            mq = c2.number_input(t("moq"), 0)
+            if st.form_submit_button(t("btn_register")):
+                if n:
+                    add_item(n, area_key, upr, u, ct, up, bp, s, new_pid, sp.strip(), mq)
+                    st.toast(t("success_register"), icon="🎉")
+                    st.rerun()
+                else:
+                    st.error(t("err_itemname"))
@@ -0,0 +1,167 @@
+import calendar
+import html
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+import forecast_service
+import metrics
+from db import (
+    get_items_df, add_delivery, delete_delivery, get_draft_deliveries, confirm_deliveries, discard_draft_deliveries,
+    get_deliveries_between, get_delivery_page, count_deliveries,
+)
+from views.common import t, safe_display, form_key, rotate_form_key, current_property, get_jp_holiday_name
+
+# ==========================================
+# 4. 발주 캘린더: 입고 예정 등록 / 월 캘린더 + 목록 / 발주 초안 확정
+# ==========================================
+CAL_PAGE_SIZE = 50
+CAL_GRID = "<div style='display:grid;grid-template-columns:repeat(7,1fr);gap:6px;margin-bottom:6px'>{cells}</div>"
+
+def group_deliveries_by_day(m_df):
+    # 월 데이터 -> {일: 입고 표시 HTML} (일자별 반복 필터링 없이 groupby 한 번)
+    if m_df is None or m_df.empty: return {}
+    qc = pd.to_numeric(m_df["qty_cs"], errors="coerce").fillna(0).astype(int)
+    qb = pd.to_numeric(m_df["qty_box"], errors="coerce").fillna(0).astype(int)
+    q_txt = qc.astype(str) + " CS" + np.where(qb > 0, " + " + qb.astype(str) + " B", "")
+    # 발주 초안은 점선 테두리 + 📝 로 구분
+    draft = m_df["status"].eq("draft") if "status" in m_df.columns else pd.Series(False, index=m_df.index)
+    style = np.where(draft, "background:#fff8e1;border:1px dashed #f0a000", "background:#f0f0f0")
+    icon = np.where(draft, "📝 ", "📦 ")
+    snippet = ("<div style='" + style + ";font-size:0.8em;padding:2px;margin-top:2px'>" + icon
+               + m_df["item"].fillna("").astype(str).map(html.escape) + "<br><b>" + q_txt + "</b></div>")
+    return snippet.groupby(pd.to_datetime(m_df["arrival_date"]).dt.day).agg("".join).to_dict()
+
+def build_week_html(cy, cm, week, by_day):
+    cells = []
+    for i, day in enumerate(week):
+        if day == 0:
+            cells.append("<div></div>")
+            continue
+        dt = date(cy, cm, day)
+        hol = get_jp_holiday_name(dt)
+        bg = "#e3f2fd" if dt == date.today() else "white"
+        clr = "blue" if i==5 else "red" if i==6 or hol else "black"
+        lbl = f"{day}" + (f" <small>({hol})</small>" if hol else "")
+        cells.append(f"<div style='border:1px solid #ddd;border-radius:6px;padding:4px;min-height:72px'>"
+                     f"<div style='text-align:right;color:{clr};background:{bg}'>{lbl}</div>{by_day.get(day, '')}</div>")
+    return CAL_GRID.format(cells="".join(cells))
+
+def render():
+    st.header(t("cal_header"))
+    t1, t2, t3 = st.tabs([t("cal_tab_new"), t("cal_tab_list"), t("cal_tab_draft")])
+    pid = current_property()
+    items = get_items_df(pid)
+    with t1:
+        if items is not None and not items.empty:
+            c1, c2 = st.columns([1, 2])
+            with c1:
+                imap = {r["name"]: r["id"] for _, r in items.iterrows()}
+                sel = st.selectbox(t("cal_item"), list(imap.keys()))
+                if sel:
+                    iid = imap[sel]
+                    row = items[items["id"] == iid].iloc[0]
+                    with st.form("cal_in", clear_on_submit=True):
+                        od = st.date_input(t("cal_order_date"))
+                        ad = st.date_input(t("cal_arrival_date"))
+                        cc1, cc2 = st.columns(2)
+                        qc = cc1.number_input(t("cal_cs"), 0)
+                        qb = cc2.number_input(t("cal_box"), 0)
+                        nt = st.text_input(t("cal_note"))
+                        if st.form_submit_button(t("btn_save_cal")):
+                            qc = int(qc); qb = int(qb)
+                            tot = int(qc * row["cs_total_units"] + qb * row["units_per_box"])
+                            saved = add_delivery(iid, od.isoformat(), ad.isoformat(), qc, qb, tot, nt, form_key("cal_in"))
+                            rotate_form_key("cal_in")
+                            st.toast(t("success_save_cal") if saved else t("dup_submit"), icon="🚚")
+                            st.rerun()
+    with t2:
+        if "cy" not in st.session_state: st.session_state["cy"] = date.today().year
+        if "cm" not in st.session_state: st.session_state["cm"] = date.today().month
+        c_p, c_l, c_n = st.columns([1, 2, 1])
+        if c_p.button(t("prev_month")): 
+            if st.session_state["cm"] == 1: st.session_state["cm"]=12; st.session_state["cy"]-=1
+            else: st.session_state["cm"]-=1
+            st.rerun()
+        if c_n.button(t("next_month")):
+            if st.session_state["cm"] == 12: st.session_state["cm"]=1; st.session_state["cy"]+=1
+            else: st.session_state["cm"]+=1
+            st.rerun()
+        cy, cm = st.session_state["cy"], st.session_state["cm"]
+        c_l.markdown(f"<h3 style='text-align:center'>{cy} / {cm}</h3>", unsafe_allow_html=True)
+
+        # 보이는 달만 DB 에서 조회 -> 일자별로 한 번만 묶어서 주 단위 HTML 블록으로 출력
+        first = date(cy, cm, 1)
+        nxt = date(cy + (cm == 12), cm % 12 + 1, 1)
+        by_day = group_deliveries_by_day(get_deliveries_between(first.isoformat(), nxt.isoformat(), pid))
+        with metrics.timer("render", "calendar.month"):
+            head = "".join(
+                f"<div style='text-align:center;font-weight:bold;color:{'blue' if i==5 else 'red' if i==6 else 'black'}'>{d}</div>"
+                for i, d in enumerate(t("weekdays")))
+            st.markdown(CAL_GRID.format(cells=head), unsafe_allow_html=True)
+            for week in calendar.monthcalendar(cy, cm):
+                st.markdown(build_week_html(cy, cm, week, by_day), unsafe_allow_html=True)
+
+        # 목록: 서버 측 LIMIT/OFFSET 페이지네이션
+        st.divider()
+        st.subheader(t("cal_list"))
+        c1, c2 = st.columns(2)
+        si = c1.selectbox(t("cal_search_item"), ["All"] + list(items["name"]) if items is not None else ["All"])
+        iid = None if si == "All" else int(items.loc[items["name"] == si, "id"].iloc[0])
+        total = count_deliveries(iid, pid)
+        n_pages = max(1, -(-total // CAL_PAGE_SIZE))
+        pg = int(c2.number_input(f"{t('page')} (1-{n_pages}, {total})", 1, n_pages, 1))
+        df = get_delivery_page(iid, CAL_PAGE_SIZE, (pg - 1) * CAL_PAGE_SIZE, pid)
+        if df is not None and not df.empty:
+            df["status"] = df["status"].map({"draft": t("status_draft"), "confirmed": t("status_confirmed")})
+            st.dataframe(safe_display(df[["order_date", "arrival_date", "item", "qty_cs", "qty_box", "total_units", "status", "note"]]), use_container_width=True)
+            opts = [f"ID {r['id']}: {r['arrival_date']} - {r['item']} ({r['qty_cs']} CS)" for _, r in df.iterrows()]
+            sd = st.selectbox(t("select_delete"), opts, key="del_cal")
+            if st.button(t("btn_delete"), key="btn_del_cal", type="primary"):
+                if sd:
+                    did = int(sd.split(":")[0].replace("ID", "").strip())
+                    delete_delivery(did)
+                    st.toast(t("success_delete"), icon="🗑️")
+                    st.rerun()
+        else:
+            st.info(t("warn_no_data"))
+    with t3:
+        render_drafts(pid)
+
+def render_drafts(pid):
+    # 발주 기한 기반 발주 초안: 작성 -> 확인 -> 확정 (확정 전에는 입고 예정 / 재고 계산에서 제외)
+    st.caption(t("draft_hint").format(days=forecast_service.DRAFT_WINDOW_DAYS))
+    if st.button(t("btn_make_drafts"), type="primary"):
+        n = forecast_service.create_drafts(property_id=pid)
+        st.toast(f"{n}{t('success_drafts')}", icon="📝")
+        st.rerun()
+    drafts = get_draft_deliveries(pid)
+    if drafts is None or drafts.empty:
+        st.info(t("warn_no_data"))
+        return
+    grid = drafts[["id", "po_ref", "supplier", "order_date", "arrival_date", "item", "qty_cs", "qty_box", "total_units", "note"]].copy()
+    grid.insert(0, "select", True)
+    edited = st.data_editor(
+        grid, hide_index=True, use_container_width=True, key="draft_grid",
+        disabled=[c for c in grid.columns if c != "select"],
+        column_config={
+            "select": st.column_config.CheckboxColumn(t("draft_select")), "id": None,
+            "po_ref": t("po_ref"), "supplier": t("supplier"),
+            "order_date": t("cal_order_date"), "arrival_date": t("cal_arrival_date"), "item": t("cal_item"),
+            "qty_cs": t("cal_cs"), "qty_box": t("cal_box"), "note": t("cal_note"),
+        },
+    )
+    chosen = edited.loc[edited["select"], "id"].astype(int).tolist()
+    c1, c2, c3 = st.columns(3)
+    if c1.button(t("btn_confirm_drafts"), disabled=not chosen):
+        n = confirm_deliveries(chosen)
+        st.toast(f"{n}{t('success_confirm')}", icon="🚚")
+        st.rerun()
+    if c2.button(t("btn_discard_drafts"), disabled=not chosen):
+        discard_draft_deliveries(chosen)
+        st.toast(t("success_delete"), icon="🗑️")
+        st.rerun()
+    c3.download_button(t("btn_po_csv"), forecast_service.purchase_order_csv(drafts[drafts["id"].isin(chosen)]),
+                       file_name=f"purchase_orders_{date.today():%Y%m%d}.csv", mime="text/csv", disabled=not chosen)
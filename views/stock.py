@@ -0,0 +1,136 @@
+from datetime import date
+
+import pandas as pd
+import streamlit as st
+
+import stock_import
+from db import (
+    get_items_df, add_snapshot, add_snapshots_bulk, delete_snapshot, get_latest_stock_df, get_snapshot_page,
+)
+from views.common import (
+    t, safe_display, PAGE_SIZE, keyset_cursor, keyset_buttons, form_key, rotate_form_key, current_property, area_options,
+)
+
+# ==========================================
+# 2. 재고 기록: 1건 입력 / 棚卸し 일괄 입력 + 스캐너 파일 / 이력 삭제
+# ==========================================
+def render():
+    st.header(t("stock_header"))
+    t1, t_bulk, t2 = st.tabs([t("stock_tab_input"), t("stock_tab_bulk"), t("stock_tab_history")])
+    pid = current_property()
+    items = get_items_df(pid)
+    # 같은 품목 / 날짜를 같은 조사자가 다시 세면 덮어씀 (다른 조사자의 입력은 따로 남음)
+    counter = st.sidebar.text_input(t("stock_counter"), key="stock_counter").strip()
+    
+    with t1:
+        if items is not None and not items.empty:
+            c1, c2 = st.columns([1, 1.5])
+            with c1:
+                imap = {r["name"]: r["id"] for _, r in items.iterrows()}
+                sel = st.selectbox(t("stock_select_item"), list(imap.keys()))
+                if sel:
+                    iid = imap[sel]
+                    row = items[items["id"] == iid].iloc[0]
+                    st.caption(f"1CS={row['cs_total_units']}, 1Box={row['units_per_box']}")
+                    with st.form("stock_in", clear_on_submit=True):
+                        d = st.date_input(t("stock_date"), date.today())
+                        cc1, cc2 = st.columns(2)
+                        qc = cc1.number_input(t("stock_cs"), 0)
+                        qb = cc2.number_input(t("stock_box"), 0)
+                        nt = st.text_area(t("stock_note"), height=68)
+                        if st.form_submit_button(t("btn_save_stock")):
+                            qc = int(qc); qb = int(qb)
+                            tot = int(qc * row["cs_total_units"] + qb * row["units_per_box"])
+                            saved = add_snapshot(iid, d.isoformat(), qc, qb, tot, nt, counter, form_key("stock_in"))
+                            rotate_form_key("stock_in")
+                            st.toast(t("success_save_stock") if saved else t("dup_submit"), icon="💾")
+                            st.rerun()
+            with c2:
+                st.subheader(t("recent_stock"))
+                latest = get_latest_stock_df(pid)
+                if latest is not None and not latest.empty:
+                    st.dataframe(safe_display(latest[["name", "current_stock", "last_snap_date"]]), use_container_width=True)
+        else:
+            st.info("No items loaded.")
+    with t_bulk:
+        if items is not None and not items.empty:
+            render_bulk(items, counter)
+        else:
+            st.info("No items loaded.")
+    with t2:
+        # 필터 (품목명 / 엔트리 / 기간) + (snap_date, id) 키셋 페이지네이션
+        f1, f2, f3, f4 = st.columns(4)
+        q = f1.text_input(t("search_name"), key="hist_q").strip()
+        fa = f2.selectbox(t("item_cat"), ["All"] + list(area_options(pid)), key="hist_area")
+        d_from = f3.date_input(t("date_from"), value=None, key="hist_from")
+        d_to = f4.date_input(t("date_to"), value=None, key="hist_to")
+        filters = (q, fa, d_from, d_to, pid)
+        hist, next_cursor = get_snapshot_page(
+            keyset_cursor("hist_page", filters), PAGE_SIZE, q or None, None if fa == "All" else fa,
+            d_from.isoformat() if d_from else None, d_to.isoformat() if d_to else None, pid)
+        if hist is not None and not hist.empty:
+            st.dataframe(safe_display(hist.drop(columns=["idempotency_key"], errors="ignore")), use_container_width=True)
+            keyset_buttons("hist_page", next_cursor)
+            st.divider()
+            st.subheader(t("btn_delete"))
+            opts = ("ID " + hist["id"].astype(str) + ": " + hist["snap_date"].astype(str) + " - " + hist["name"].fillna("").astype(str)).tolist()
+            s = st.selectbox(t("select_delete"), opts)
+            if st.button(t("btn_delete"), key="del_snap", type="primary"):
+                if s:
+                    sid = int(s.split(":")[0].replace("ID", "").strip())
+                    delete_snapshot(sid)
+                    st.toast(t("success_delete"), icon="🗑️")
+                    st.rerun()
+
+def render_bulk(items, counter=""):
+    # [NEW] 월말 재고조사용: 전 품목 그리드 + 날짜 1개 -> 한 번의 트랜잭션으로 저장
+    st.subheader(t("bulk_header"))
+    with st.form("stock_bulk", clear_on_submit=True):
+        d = st.date_input(t("bulk_date"), date.today())
+        st.caption(t("bulk_hint"))
+        grid = items[["id", "name", "cs_total_units", "units_per_box"]].copy()
+        grid["qty_cs"] = None
+        grid["qty_box"] = None
+        grid["note"] = ""
+        edited = st.data_editor(
+            grid, hide_index=True, use_container_width=True, key="bulk_grid",
+            disabled=["id", "name", "cs_total_units", "units_per_box"],
+            column_config={
+                "name": t("item_name"), "cs_total_units": t("cs_total"), "units_per_box": t("units_per_box"),
+                "qty_cs": st.column_config.NumberColumn(t("stock_cs"), min_value=0, step=1),
+                "qty_box": st.column_config.NumberColumn(t("stock_box"), min_value=0, step=1),
+                "note": t("stock_note"),
+            },
+        )
+        if st.form_submit_button(t("btn_bulk_save")):
+            counted = edited[edited["qty_cs"].notna() | edited["qty_box"].notna()]
+            records, errors = stock_import.validate_counts(counted.rename(columns={"id": "item_id"}).drop(columns="name"), items, d)
+            n = add_snapshots_bulk(records, counter, form_key("stock_bulk"))
+            rotate_form_key("stock_bulk")
+            if not errors.empty:
+                st.error(t("bulk_errors"))
+                st.dataframe(errors, use_container_width=True)
+            st.toast(f"{n}{t('success_bulk')}", icon="💾")
+
+    # 핸디 스캐너 export 가져오기 (청크 단위로 검증 + 저장, 오류 행은 건너뜀)
+    st.divider()
+    st.subheader(t("bulk_upload"))
+    up = st.file_uploader(t("bulk_upload"), type=["csv", "xlsx", "xls"], label_visibility="collapsed")
+    up_date = st.date_input(t("bulk_date"), date.today(), key="bulk_upload_date")
+    if up is not None and st.button(t("btn_bulk_import")):
+        saved, errs, offset = 0, [], 0
+        try:
+            for chunk in stock_import.iter_upload_chunks(up, up.name):
+                records, errors = stock_import.validate_counts(chunk, items, up_date, row_offset=offset)
+                saved += add_snapshots_bulk(records, counter, form_key("bulk_upload"))
+                errs.append(errors)
+                offset += len(chunk)
+        except ImportError as e:
+            # Excel 읽기에는 openpyxl 등이 필요
+            st.error(f"Excel: {e}")
+        rotate_form_key("bulk_upload")
+        st.toast(f"{saved}{t('success_bulk')}", icon="💾")
+        errors = pd.concat(errs, ignore_index=True) if errs else pd.DataFrame()
+        if not errors.empty:
+            st.error(f"{t('bulk_errors')}: {len(errors)}")
+            st.dataframe(errors, use_container_width=True)
@@ -0,0 +1,102 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+import background
+import forecast_engine
+import metrics
+from db import (
+    get_items_df, refresh_rollups, get_rollups_built_through, get_item_trend, get_area_trend, STATE_HORIZON_DAYS,
+)
+from views.common import t, current_property, area_options
+
+# ==========================================
+# 5. 추이 분석: 사전 집계 (rollups.py) 에서 기간만 읽음 + 홈 화면과 같은 입력으로 예상 재고
+# ==========================================
+TREND_RANGES = {"trend_90d": 90, "trend_1y": 365, "trend_3y": 365 * 3, "trend_all": 365 * 30}
+
+def trend_projection(pid, scope, key):
+    # 선택한 품목 / 구역 품목의 날짜별 예상 재고 합계 (오늘 = 현재 재고)
+    bundle, _ = background.get("home", pid)
+    stock = bundle["stock"]
+    if stock is None or stock.empty:
+        return pd.DataFrame(columns=["bucket", "stock"])
+    rows = stock[stock["id"] == key] if scope == "item" else stock[stock["target_area"].fillna("ALL") == key]
+    if rows.empty:
+        return pd.DataFrame(columns=["bucket", "stock"])
+    horizon = STATE_HORIZON_DAYS
+    plan = forecast_engine.compute_forecast(rows, None, None, horizon, occ_calendar=bundle["occ_calendar"],
+                                            arrivals=bundle["arrivals"], paths=True)
+    path = np.vstack(plan["balance_path"].to_list()).sum(axis=0)
+    start = float(pd.to_numeric(plan["current_stock"], errors="coerce").fillna(0).sum())
+    return pd.DataFrame({"bucket": [pd.Timestamp(date.today())] + list(forecast_engine.horizon_dates(date.today(), horizon)),
+                         "stock": np.concatenate([[start], path])})
+
+def trend_charts(hist, proj):
+    # altair 는 이 화면에서만 import (다른 화면의 rerun 에 로딩 시간을 더하지 않도록)
+    import altair as alt
+    hist = hist.assign(bucket=pd.to_datetime(hist["bucket"]))
+    x = alt.X("bucket:T", title=None)
+    lines = pd.concat([hist[["bucket", "stock"]].assign(series=t("trend_stock")),
+                       proj.assign(series=t("trend_projection"))], ignore_index=True)
+    series = [t("trend_stock"), t("trend_projection")]
+    line = alt.Chart(lines).mark_line().encode(
+        x, alt.Y("stock:Q", title=t("trend_stock")),
+        color=alt.Color("series:N", scale=alt.Scale(domain=series), legend=alt.Legend(title=None, orient="top")),
+        strokeDash=alt.StrokeDash("series:N", scale=alt.Scale(domain=series, range=[[1, 0], [5, 4]]), legend=None),
+        tooltip=[alt.Tooltip("bucket:T", title=t("stock_date")), alt.Tooltip("stock:Q", format=",.0f", title=t("trend_stock"))])
+    bars = alt.Chart(hist[hist["arrivals"] > 0]).mark_bar(opacity=0.35, color="#2ca02c").encode(
+        x, alt.Y("arrivals:Q"), tooltip=[alt.Tooltip("bucket:T", title=t("stock_date")),
+                                          alt.Tooltip("arrivals:Q", format=",.0f", title=t("trend_arrivals"))])
+    layers = [bars, line]
+    if "counted" in hist.columns:
+        layers.append(alt.Chart(hist[hist["counted"].notna()]).mark_point(filled=True, size=30, color="#444").encode(
+            x, alt.Y("counted:Q"), tooltip=[alt.Tooltip("bucket:T", title=t("stock_date")),
+                                             alt.Tooltip("counted:Q", format=",.0f", title=t("trend_counted"))]))
+    stock_chart = alt.layer(*layers).properties(height=320)
+    usage_chart = alt.Chart(hist).mark_line(color="#d62728").encode(
+        x, alt.Y("usage:Q", title=t("trend_usage")),
+        tooltip=[alt.Tooltip("bucket:T", title=t("stock_date")), alt.Tooltip("usage:Q", format=",.1f", title=t("trend_usage"))]
+    ).properties(height=160)
+    return stock_chart, usage_chart
+
+def render():
+    st.header(t("menu_trends"))
+    pid = current_property()
+    if get_rollups_built_through() is None:
+        # 처음 한 번만 (이후는 백그라운드가 쓰기 직후 / 주기적으로 갱신)
+        with st.spinner(t("trend_building")):
+            refresh_rollups()
+    c1, c2, c3 = st.columns([1, 3, 1])
+    scope = c1.radio(t("trend_scope"), ["item", "area"], format_func=lambda s: t(f"trend_scope_{s}"))
+    if scope == "item":
+        items = get_items_df(pid)
+        if items.empty:
+            st.info(t("warn_no_data"))
+            return
+        labels = dict(zip(items["id"].astype(int), items["name"] + " (" + items["unit"].fillna("") + ")"))
+        key = c2.selectbox(t("cal_item"), list(labels), format_func=labels.get)
+    else:
+        opts = area_options(pid)
+        key = c2.selectbox(t("item_cat"), list(opts), format_func=opts.get)
+    span = c3.selectbox(t("trend_range"), list(TREND_RANGES), index=1, format_func=t)
+    end = date.today()
+    start = end - timedelta(days=TREND_RANGES[span])
+    if scope == "item":
+        hist, grain = get_item_trend(key, start, end)
+    else:
+        hist, grain = get_area_trend(key, start, end, pid)
+    proj = trend_projection(pid, scope, key)
+    if hist.empty and proj.empty:
+        st.info(t("warn_no_data"))
+        return
+    with metrics.timer("render", "trends.chart") as m:
+        stock_chart, usage_chart = trend_charts(hist, proj)
+        st.altair_chart(stock_chart, use_container_width=True)
+        st.altair_chart(usage_chart, use_container_width=True)
+        m["rows"] = len(hist) + len(proj)
+    st.caption(f"{t('trend_grain_' + grain)} / " + t("trend_note").format(days=STATE_HORIZON_DAYS))
+    if scope == "area":
+        st.caption(t("trend_area_note"))